@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Бенчмарк: пропускная способность save_word / get_user_dictionary
+
+Сравнивает два режима на временной базе:
+  - без пула: новое sqlite3.connect на каждый вызов и вложенное соединение
+    для подсчёта уникальных слов (как было в DatabaseManager раньше);
+  - с пулом: DatabaseManager с долгоживущими соединениями, WAL и synchronous=NORMAL.
+
+Запуск:
+    python benchmarks/bench_database_pool.py --users 20 --words 50
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseManager  # noqa: E402
+
+
+class LegacyDatabase:
+    """Прежняя реализация: соединение на каждый вызов"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        # Таблицы создаёт DatabaseManager, журнал оставляем по умолчанию (DELETE)
+        DatabaseManager(db_path).close()
+        with sqlite3.connect(db_path) as conn:
+            conn.execute('PRAGMA journal_mode=DELETE')
+
+    def save_word(self, user_id: int, word: str, explanation: str) -> bool:
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('''
+                INSERT INTO user_dictionaries (user_id, word, explanation, lookup_count, last_lookup)
+                VALUES (?, ?, ?, 1, CURRENT_TIMESTAMP)
+                ON CONFLICT(user_id, word) DO UPDATE SET
+                    lookup_count = lookup_count + 1,
+                    last_lookup = CURRENT_TIMESTAMP
+            ''', (user_id, word.lower(), explanation))
+            conn.execute('''
+                INSERT INTO user_stats (user_id, total_lookups) VALUES (?, 1)
+                ON CONFLICT(user_id) DO UPDATE SET total_lookups = total_lookups + 1
+            ''', (user_id,))
+            conn.commit()
+        # Вложенное соединение, как в старом _update_unique_words_count
+        with sqlite3.connect(self.db_path) as conn:
+            count = conn.execute('SELECT COUNT(*) FROM user_dictionaries WHERE user_id = ?', (user_id,)).fetchone()[0]
+            conn.execute('''
+                INSERT INTO user_stats (user_id, unique_words) VALUES (?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET unique_words = ?
+            ''', (user_id, count, count))
+            conn.commit()
+        return True
+
+    def get_user_dictionary(self, user_id: int, limit: int = 50):
+        with sqlite3.connect(self.db_path) as conn:
+            return conn.execute('''
+                SELECT word, explanation, lookup_count, first_lookup, last_lookup
+                FROM user_dictionaries WHERE user_id = ? ORDER BY last_lookup DESC LIMIT ?
+            ''', (user_id, limit)).fetchall()
+
+    def close(self):
+        pass
+
+
+def run(db, users: int, words: int) -> dict:
+    """Прогнать запись и чтение, вернуть операций в секунду"""
+    start = time.perf_counter()
+    for w in range(words):
+        for u in range(users):
+            db.save_word(u, f"слово{w}", "объяснение слова из классической литературы")
+    write_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(words):
+        for u in range(users):
+            db.get_user_dictionary(u)
+    read_time = time.perf_counter() - start
+
+    ops = users * words
+    return {"save_word": ops / write_time, "get_user_dictionary": ops / read_time}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--words", type=int, default=50)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, factory in (("без пула", LegacyDatabase), ("с пулом", DatabaseManager)):
+            db = factory(os.path.join(tmp, f"{factory.__name__}.db"))
+            results[name] = run(db, args.users, args.words)
+            db.close()
+
+    print(f"{'режим':<10} {'save_word, оп/с':>18} {'get_user_dictionary, оп/с':>28}")
+    for name, r in results.items():
+        print(f"{name:<10} {r['save_word']:>18.0f} {r['get_user_dictionary']:>28.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Бенчмарк: нечёткий поиск терминов на синтетическом словаре
+
+Строит словарь из --terms псевдорусских слов, делает запросы с одной-двумя
+опечатками и сравнивает:
+  - индекс FuzzyIndex (best_match и search с limit=5);
+  - линейный проход по всем терминам с тем же расстоянием Дамерау-Левенштейна.
+
+Запуск:
+    python benchmarks/bench_fuzzy_index.py --terms 100000 --queries 1000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fuzzy_index import FuzzyIndex, damerau_levenshtein  # noqa: E402
+
+CONSONANTS = "бвгджзклмнпрстфхцчшщ"
+VOWELS = "аеиоуыэюя"
+SUFFIXES = ["", "ник", "ость", "ание", "ство", "ец", "ка", "ий", "ный"]
+
+
+def make_word(rng: random.Random) -> str:
+    """Псевдорусское слово из слогов и типичных суффиксов"""
+    syllables = rng.randint(2, 4)
+    word = "".join(rng.choice(CONSONANTS) + rng.choice(VOWELS) for _ in range(syllables))
+    return word + rng.choice(SUFFIXES)
+
+
+def make_typo(rng: random.Random, word: str, edits: int) -> str:
+    """Внести в слово опечатки: замену, вставку, удаление или перестановку"""
+    letters = CONSONANTS + VOWELS
+    for _ in range(edits):
+        i = rng.randrange(len(word))
+        kind = rng.choice(("replace", "insert", "delete", "swap"))
+        if kind == "replace":
+            word = word[:i] + rng.choice(letters) + word[i + 1:]
+        elif kind == "insert":
+            word = word[:i] + rng.choice(letters) + word[i:]
+        elif kind == "delete" and len(word) > 3:
+            word = word[:i] + word[i + 1:]
+        elif kind == "swap" and i + 1 < len(word):
+            word = word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    return word
+
+
+def linear_search(terms, query: str, max_distance: int):
+    """Поиск полным перебором"""
+    results = []
+    for term in terms:
+        distance = damerau_levenshtein(query, term, max_distance)
+        if distance <= max_distance:
+            results.append((distance, term))
+    results.sort()
+    return results[:5]
+
+
+def percentile(values, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--terms", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--linear-queries", type=int, default=20, help="Запросов для медленного полного перебора")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    terms = list({make_word(rng) for _ in range(args.terms * 2)})[:args.terms]
+
+    start = time.perf_counter()
+    index = FuzzyIndex(terms)
+    print(f"Индекс на {len(index)} терминов построен за {time.perf_counter() - start:.2f} с")
+
+    queries = {edits: [make_typo(rng, rng.choice(terms), edits) for _ in range(args.queries)] for edits in (1, 2)}
+
+    for edits, typo_queries in queries.items():
+        for name, lookup in (("best_match", index.best_match), ("search(5)", index.search)):
+            timings = []
+            found = 0
+            for query in typo_queries:
+                start = time.perf_counter()
+                result = lookup(query)
+                timings.append((time.perf_counter() - start) * 1000)
+                found += bool(result)
+
+            print(f"опечаток {edits}, {name:<10}: среднее {statistics.mean(timings):.3f} мс, "
+                  f"p50 {percentile(timings, 0.5):.3f} мс, p99 {percentile(timings, 0.99):.3f} мс, "
+                  f"найдено {found}/{len(typo_queries)}")
+
+    linear = []
+    for query in queries[2][:args.linear_queries]:
+        start = time.perf_counter()
+        linear_search(index._terms, query, index.distance_limit(query))
+        linear.append((time.perf_counter() - start) * 1000)
+    print(f"Полный перебор:  среднее {statistics.mean(linear):.1f} мс ({len(linear)} запросов)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Бенчмарк: импорт и поиск по словарю терминов на синтетических данных
+
+Генерирует --terms терминов и сравнивает в отдельных процессах:
+  - словарь-литерал внутри модуля Python (как LITERARY_TERMS раньше);
+  - файл SQLite только для чтения (lexicon.py), который читает literary_data.
+
+Для каждого варианта печатает время импорта, пиковую память процесса и
+время поиска --lookups случайных слов.
+
+Запуск:
+    python benchmarks/bench_lexicon.py --terms 100000 --lookups 10000
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Код, который выполняется в отдельном процессе: импорт, затем поиск
+PROBE = '''
+import json, resource, sys, time
+sys.path.insert(0, {root!r})
+sys.path.insert(0, {workdir!r})
+start = time.perf_counter()
+{import_line}
+imported = (time.perf_counter() - start) * 1000
+with open({words_path!r}, encoding="utf-8") as f:
+    words = json.load(f)
+start = time.perf_counter()
+first = lookup(words[0])
+first_ms = (time.perf_counter() - start) * 1000
+start = time.perf_counter()
+for word in words:
+    assert lookup(word) is not None
+per_lookup = (time.perf_counter() - start) * 1e6 / len(words)
+# ru_maxrss наследуется от родителя через fork, поэтому пик памяти берём из /proc
+try:
+    with open("/proc/self/status") as f:
+        peak_kb = next(int(line.split()[1]) for line in f if line.startswith("VmHWM:"))
+except OSError:
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"import_ms": imported, "first_ms": first_ms, "lookup_us": per_lookup,
+                  "rss_mb": peak_kb / 1024}}))
+'''
+
+
+def make_terms(count: int) -> dict:
+    """Синтетические термины со статьями размером как в настоящей базе"""
+    rng = random.Random(42)
+    letters = "абвгдежзиклмнопрстуфхцчшщэюя"
+    terms = {}
+    while len(terms) < count:
+        word = "".join(rng.choice(letters) for _ in range(rng.randint(5, 12)))
+        terms[word] = {
+            "definition": f"Определение слова {word}: " + " ".join(rng.choice(letters) * 5 for _ in range(12)),
+            "synonym": "синоним",
+            "examples": [f"Пример употребления слова {word}."],
+            "category": "категория",
+        }
+    return terms
+
+
+def run_probe(workdir: str, import_line: str, env: dict) -> dict:
+    """Запустить измерение в чистом процессе"""
+    code = PROBE.format(root=ROOT, workdir=workdir, import_line=import_line,
+                        words_path=os.path.join(workdir, "words.json"))
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--terms", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=10000)
+    args = parser.parse_args()
+
+    terms = make_terms(args.terms)
+    words = random.Random(7).sample(list(terms), min(args.lookups, len(terms)))
+
+    with tempfile.TemporaryDirectory() as workdir:
+        with open(os.path.join(workdir, "words.json"), "w", encoding="utf-8") as f:
+            json.dump(words, f, ensure_ascii=False)
+
+        # Вариант 1: литерал в модуле
+        with open(os.path.join(workdir, "literal_terms.py"), "w", encoding="utf-8") as f:
+            f.write(f"LITERARY_TERMS = {terms!r}\n")
+
+        # Вариант 2: собранный файл словаря
+        with open(os.path.join(workdir, "literary_terms.json"), "w", encoding="utf-8") as f:
+            json.dump(terms, f, ensure_ascii=False)
+        with open(os.path.join(workdir, "literary_phrases.json"), "w", encoding="utf-8") as f:
+            json.dump({}, f)
+        env = dict(os.environ, LEXICON_SOURCE_DIR=workdir, LEXICON_PATH=os.path.join(workdir, "lexicon.db"),
+                   PYTHONDONTWRITEBYTECODE="1")
+
+        from lexicon import build_lexicon
+        build_lexicon(env["LEXICON_PATH"], workdir, lemmatize_func=str.lower)
+        size_mb = os.path.getsize(env["LEXICON_PATH"]) / 1024 / 1024
+
+        variants = [
+            ("Литерал в модуле", "from literal_terms import LITERARY_TERMS\nlookup = LITERARY_TERMS.get"),
+            ("Файл SQLite", "from literary_data import get_word_definition as lookup"),
+        ]
+        print(f"Терминов: {len(terms)}, файл словаря {size_mb:.1f} МБ, поисков: {len(words)}")
+        for name, import_line in variants:
+            result = run_probe(workdir, import_line, env)
+            print(f"{name:<18}: импорт {result['import_ms']:8.1f} мс, первый поиск {result['first_ms']:6.2f} мс, "
+                  f"поиск {result['lookup_us']:6.1f} мкс, пик памяти {result['rss_mb']:6.1f} МБ")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Бенчмарк: задержка запроса к LLM с переиспользованием соединений и без
+
+Поднимает локальный stub-сервер, отвечающий как OpenRouter /chat/completions,
+и сравнивает два режима:
+  - без пула: новый HTTP клиент (новое TCP соединение) на каждый запрос,
+    как это было с requests.post;
+  - с пулом: общий клиент LLMService с keep-alive.
+
+Stub-сервер задерживает каждое новое соединение на --handshake-ms миллисекунд,
+имитируя TCP+TLS рукопожатие до настоящего OpenRouter (100-300 мс).
+
+Запуск:
+    python benchmarks/bench_llm_connection_pool.py --requests 50 --handshake-ms 150
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_service import LLMService  # noqa: E402
+
+RESPONSE_BODY = json.dumps({
+    "choices": [{"message": {"content": "Помещик - владелец поместья."}}]
+}).encode("utf-8")
+
+
+def make_handler(handshake_delay: float):
+    """Создать обработчик stub-сервера с имитацией рукопожатия"""
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+
+        def setup(self):
+            # Вызывается один раз на новое соединение
+            time.sleep(handshake_delay)
+            self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            super().setup()
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            self.rfile.read(length)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(RESPONSE_BODY)))
+            self.end_headers()
+            self.wfile.write(RESPONSE_BODY)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+async def bench_without_pool(base_url: str, count: int) -> list:
+    """Новый клиент и новое соединение на каждый запрос"""
+    timings = []
+    payload = {"model": "stub", "messages": [{"role": "user", "content": "помещик"}]}
+    for _ in range(count):
+        start = time.perf_counter()
+        async with httpx.AsyncClient(base_url=base_url) as client:
+            response = await client.post("/chat/completions", json=payload)
+            response.json()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def bench_with_pool(base_url: str, count: int) -> list:
+    """Общий пул соединений LLMService"""
+    service = LLMService("stub_key", http2=False, base_url=base_url)
+    timings = []
+    try:
+        await service.warmup()
+        for _ in range(count):
+            start = time.perf_counter()
+            await service.explain_word("помещик")
+            timings.append(time.perf_counter() - start)
+    finally:
+        await service.close()
+    return timings
+
+
+def report(name: str, timings: list) -> None:
+    """Напечатать статистику задержек"""
+    ms = sorted(t * 1000 for t in timings)
+    p95 = ms[int(len(ms) * 0.95) - 1]
+    print(f"{name:<28} среднее {statistics.mean(ms):8.2f} мс | "
+          f"медиана {statistics.median(ms):8.2f} мс | p95 {p95:8.2f} мс")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=50, help="количество запросов в каждом режиме")
+    parser.add_argument("--handshake-ms", type=float, default=150.0,
+                        help="имитируемая стоимость нового соединения, мс")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.handshake_ms / 1000))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    print(f"Stub-сервер: {base_url}, рукопожатие {args.handshake_ms:.0f} мс, "
+          f"{args.requests} запросов в каждом режиме\n")
+    try:
+        report("Без пула (новое соединение)", asyncio.run(bench_without_pool(base_url, args.requests)))
+        report("С пулом LLMService", asyncio.run(bench_with_pool(base_url, args.requests)))
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
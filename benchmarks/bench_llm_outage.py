@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Бенчмарк: задержка ответа пользователю во время сбоя OpenRouter
+
+Имитирует сбой: каждый запрос к API висит --timeout секунд и заканчивается
+таймаутом. Сравнивает LLMService без выключателя (каждый пользователь ждёт
+таймаут, а с повторами - несколько) и с выключателем по умолчанию.
+
+Запуск:
+    python benchmarks/bench_llm_outage.py --requests 40 --timeout 0.2
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+from llm_service import LLMService  # noqa: E402
+from resilience import CircuitBreaker, CircuitBreakers, RetryPolicy  # noqa: E402
+
+
+async def measure(breakers: CircuitBreakers, requests: int, timeout: float) -> list:
+    """Задержки последовательных запросов во время сбоя, мс"""
+    async def hanging(request):
+        await asyncio.sleep(timeout)
+        raise httpx.ReadTimeout("timeout", request=request)
+
+    service = LLMService("bench_key", http2=False, breakers=breakers,
+                         retry_policy=RetryPolicy(attempts=2, base_delay=0.01))
+    await service.close()
+    service.client = httpx.AsyncClient(base_url=service.base_url, transport=httpx.MockTransport(hanging))
+
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        await service.generate_explanation("Объясни слово")
+        latencies.append((time.perf_counter() - start) * 1000)
+    await service.close()
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--timeout", type=float, default=0.2, help="сколько висит запрос к API, секунд")
+    args = parser.parse_args()
+    # Ошибки каждого запроса в логе здесь не нужны
+    logging.disable(logging.CRITICAL)
+
+    variants = [
+        ("без выключателя", CircuitBreakers(lambda model: CircuitBreaker(model, failure_rate=2.0))),
+        ("с выключателем", CircuitBreakers()),
+    ]
+    for name, breakers in variants:
+        latencies = asyncio.run(measure(breakers, args.requests, args.timeout))
+        ordered = sorted(latencies)
+        print(f"{name:<16}: p50 {statistics.median(latencies):8.1f} мс, "
+              f"p90 {ordered[int(len(ordered) * 0.9)]:8.1f} мс, всего {sum(latencies) / 1000:6.1f} с")
+
+
+if __name__ == "__main__":
+    main()
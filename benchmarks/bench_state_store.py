@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Бенчмарк: память и скорость StateStore по сравнению с обычным dict
+
+Моделирует поток пользователей: каждую секунду --rate новых пользователей
+нажимают кнопку меню, а затем отвечают. dict помнит всех пользователей,
+StateStore - только тех, кто был активен за последние --ttl секунд.
+
+Запуск:
+    python benchmarks/bench_state_store.py --users 500000 --rate 100 --ttl 600
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from state_store import StateStore  # noqa: E402
+
+
+class SimulatedClock:
+    """Время симуляции вместо настоящего"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def simulate(store, clock, users: int, rate: int) -> None:
+    """Прогнать поток пользователей"""
+    for user_id in range(users):
+        clock.now = user_id / rate
+        store[user_id] = 1          # нажата кнопка меню
+        store.get(user_id, 0)       # пришёл ответ
+        store[user_id] = 0          # возврат в меню
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=500000)
+    parser.add_argument("--rate", type=int, default=100, help="новых пользователей в секунду")
+    parser.add_argument("--ttl", type=int, default=600)
+    args = parser.parse_args()
+
+    print(f"Пользователей: {args.users}, {args.rate}/с, TTL {args.ttl} с "
+          f"(активных одновременно ~{min(args.users, args.rate * args.ttl)})")
+    for name, make in [("dict", lambda clock: {}),
+                       ("StateStore", lambda clock: StateStore("bench", ttl=args.ttl, clock=clock))]:
+        # Время меряем без tracemalloc - он сам замедляет выделение памяти
+        clock = SimulatedClock()
+        store = make(clock)
+        start = time.perf_counter()
+        simulate(store, clock, args.users, args.rate)
+        per_op = (time.perf_counter() - start) * 1e6 / (args.users * 3)
+
+        clock = SimulatedClock()
+        tracemalloc.start()
+        store = make(clock)
+        simulate(store, clock, args.users, args.rate)
+        peak_mb = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+        tracemalloc.stop()
+        entries = len(store)
+        print(f"{name:<11}: {per_op:5.2f} мкс на операцию, записей {entries:>8}, пик памяти {peak_mb:6.1f} МБ")
+
+
+if __name__ == "__main__":
+    main()
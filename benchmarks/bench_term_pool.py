@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Бенчмарк: стоимость одного вопроса викторины в зависимости от числа терминов
+
+Сравнивает прежнюю сборку вопроса (список словарей на каждый вопрос, копия
+без выбранного термина и list.remove) с выбором индексов из TermPool.
+
+Запуск:
+    python benchmarks/bench_term_pool.py --questions 2000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from term_pool import TermPool  # noqa: E402
+
+SIZES = (100, 1000, 10000, 100000)
+
+
+def legacy_question(terms: dict, rng: random.Random):
+    """Вопрос так, как он собирался раньше: get_literary_terms() и копии списка"""
+    literary_terms = [{'term': term, 'definition': definition} for term, definition in terms.items()]
+    term = rng.choice(literary_terms)
+    other_terms = [t for t in literary_terms if t != term]
+    wrong_options = []
+    for _ in range(3):
+        wrong_term = rng.choice(other_terms)
+        wrong_options.append(wrong_term['definition'][:100])
+        other_terms.remove(wrong_term)
+    return term['term'], term['definition'][:100], wrong_options
+
+
+def time_per_question(func, questions: int) -> float:
+    """Среднее время одного вызова, микросекунд"""
+    start = time.perf_counter()
+    for _ in range(questions):
+        func()
+    return (time.perf_counter() - start) * 1e6 / questions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print(f"{'терминов':>9} | {'прежняя сборка, мкс':>20} | {'TermPool, мкс':>14}")
+    for size in SIZES:
+        terms = {f"термин{i}": f"Определение термина номер {i}, достаточно длинное для варианта ответа" * 2
+                 for i in range(size)}
+        pool = TermPool(terms.items())
+
+        # Прежний вариант линейный по числу терминов - на больших наборах меряем меньше вопросов
+        legacy_questions = max(10, args.questions * 100 // size)
+        legacy = time_per_question(lambda: legacy_question(terms, rng), legacy_questions)
+        pooled = time_per_question(lambda: pool.sample(rng=rng), args.questions)
+        print(f"{size:>9} | {legacy:>20.1f} | {pooled:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
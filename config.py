@@ -9,14 +9,90 @@ load_dotenv()
 TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
 BOT_USERNAME = os.getenv('BOT_USERNAME')
 
+# Режим получения обновлений: polling (по умолчанию) или webhook
+BOT_MODE = os.getenv('BOT_MODE', 'polling').lower()
+WEBHOOK_URL = os.getenv('WEBHOOK_URL') or os.getenv('RENDER_EXTERNAL_URL')  # Публичный адрес сервиса (на Render подставляется сам)
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/telegram')          # Путь, на который Telegram присылает обновления
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET')                   # Секрет для заголовка X-Telegram-Bot-Api-Secret-Token
+WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('PORT', '8080'))                  # Render передаёт порт в переменной PORT
+BOT_WORKERS = int(os.getenv('BOT_WORKERS', '1'))                  # Процессов-обработчиков; больше 1 - только в режиме webhook
+WORKER_QUEUE_SIZE = int(os.getenv('WORKER_QUEUE_SIZE', '1000'))   # Сколько обновлений может ждать в очереди одного процесса
+
 # OpenRouter API (основной API для бота)
 OPENROUTER_API_KEY = os.getenv('OPENROUTER_API_KEY')
 
+# Пул HTTP соединений к OpenRouter
+LLM_POOL_SIZE = int(os.getenv('LLM_POOL_SIZE', '20'))                    # Максимум одновременных соединений
+LLM_POOL_KEEPALIVE = int(os.getenv('LLM_POOL_KEEPALIVE', '10'))          # Сколько простаивающих соединений держать открытыми
+LLM_POOL_IDLE_TIMEOUT = float(os.getenv('LLM_POOL_IDLE_TIMEOUT', '60'))  # Через сколько секунд закрывать простаивающее соединение
+LLM_HTTP2 = os.getenv('LLM_HTTP2', 'true').lower() in ('1', 'true', 'yes')  # HTTP/2 (нужен пакет h2)
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', '30'))                     # Таймаут запроса к OpenRouter, секунд
+LLM_CONNECT_TIMEOUT = float(os.getenv('LLM_CONNECT_TIMEOUT', '5'))      # Таймаут установки соединения, секунд
+
+# Повторы запросов к LLM и автоматический выключатель модели
+LLM_RETRY_ATTEMPTS = int(os.getenv('LLM_RETRY_ATTEMPTS', '3'))                # Всего попыток на запрос (429, 5xx, сетевые ошибки)
+LLM_RETRY_BASE_DELAY = float(os.getenv('LLM_RETRY_BASE_DELAY', '0.5'))        # Задержка перед первым повтором (со случайным разбросом), секунд
+LLM_RETRY_MAX_DELAY = float(os.getenv('LLM_RETRY_MAX_DELAY', '5'))            # Дольше не ждать, в том числе по Retry-After, секунд
+LLM_BREAKER_FAILURE_RATE = float(os.getenv('LLM_BREAKER_FAILURE_RATE', '0.5'))  # Доля ошибок, при которой запросы к модели прекращаются
+LLM_BREAKER_MIN_REQUESTS = int(os.getenv('LLM_BREAKER_MIN_REQUESTS', '5'))    # Минимум запросов в окне для решения
+LLM_BREAKER_WINDOW = float(os.getenv('LLM_BREAKER_WINDOW', '60'))             # Окно подсчёта ошибок, секунд
+LLM_BREAKER_OPEN_SECONDS = float(os.getenv('LLM_BREAKER_OPEN_SECONDS', '30')) # Через сколько секунд пробовать модель снова
+
+# Маршрутизация запросов к LLM по операциям (см. llm_routing.py)
+LLM_FAST_MODEL = os.getenv('LLM_FAST_MODEL', 'google/gemini-2.0-flash-lite-001')  # Быстрая дешёвая модель: объяснения слов и фраз
+LLM_LARGE_MODEL = os.getenv('LLM_LARGE_MODEL', 'google/gemini-2.0-flash-001')     # Модель для пересказов, характеристик героев и викторины
+LLM_ROUTES = os.getenv('LLM_ROUTES', '')              # JSON с изменениями маршрутов: {"retell_text": {"model": "...", "timeout": 90}}
+LLM_MODEL_PRICES = os.getenv('LLM_MODEL_PRICES', '')  # JSON с ценами моделей, USD за 1M токенов: {"модель": [вход, выход]}
+
 # Google Gemini API (больше не используется)
 GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
 
+# Параллельная обработка обновлений
+MAX_CONCURRENT_UPDATES = int(os.getenv('MAX_CONCURRENT_UPDATES', '64'))  # Сколько обновлений обрабатывается одновременно
+MAX_PENDING_UPDATES = int(os.getenv('MAX_PENDING_UPDATES', '1024'))      # Сколько обновлений может ждать в очереди
+
 # Database
 DATABASE_PATH = os.getenv('DATABASE_PATH', 'literary_bot.db')
+DB_READ_POOL_SIZE = int(os.getenv('DB_READ_POOL_SIZE', '4'))             # Читающих соединений в пуле (пишущее - одно)
+DB_BUSY_TIMEOUT = int(os.getenv('DB_BUSY_TIMEOUT', '5000'))               # Сколько ждать снятия блокировки, миллисекунд
+DB_SYNCHRONOUS = os.getenv('DB_SYNCHRONOUS', 'NORMAL').upper()            # PRAGMA synchronous (NORMAL безопасен в режиме WAL)
+DB_CACHED_STATEMENTS = int(os.getenv('DB_CACHED_STATEMENTS', '64'))       # Подготовленных выражений в кэше соединения
+DB_WRITE_FLUSH_INTERVAL_MS = int(os.getenv('DB_WRITE_FLUSH_INTERVAL_MS', '500'))  # Как часто записывать накопленные просмотры слов, миллисекунд
+DB_WRITE_BATCH_SIZE = int(os.getenv('DB_WRITE_BATCH_SIZE', '200'))                # Сколько просмотров копить до внеочередной записи
+DB_WRITE_MAX_ATTEMPTS = int(os.getenv('DB_WRITE_MAX_ATTEMPTS', '5'))              # После стольких неудачных записей строка отбрасывается
+DB_WRITE_MAX_PENDING = int(os.getenv('DB_WRITE_MAX_PENDING', '50000'))           # Больше стольких незаписанных слов буфер не держит, новые просмотры теряются
+DB_WRITE_MAX_BACKOFF_MS = int(os.getenv('DB_WRITE_MAX_BACKOFF_MS', '30000'))     # Предельная пауза между повторами после ошибки записи, миллисекунд
+DB_CONSISTENCY_CHECK_INTERVAL = float(os.getenv('DB_CONSISTENCY_CHECK_INTERVAL', '3600'))  # Как часто сверять счётчики уникальных слов, секунд (0 - не сверять)
+
+# Отладка event loop: предупреждения о медленных колбэках и о запросах к БД в потоке event loop
+ASYNCIO_DEBUG = os.getenv('ASYNCIO_DEBUG', 'false').lower() in ('1', 'true', 'yes')
+SLOW_CALLBACK_DURATION = float(os.getenv('SLOW_CALLBACK_DURATION', '0.1'))  # Порог медленного колбэка, секунд
+
+# Ограничение исходящих запросов к Telegram
+TELEGRAM_RATE_LIMIT_ENABLED = os.getenv('TELEGRAM_RATE_LIMIT_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', '30'))     # Запросов в секунду на весь бот
+TELEGRAM_GROUP_RATE = float(os.getenv('TELEGRAM_GROUP_RATE', '20'))       # Сообщений в одну группу за TELEGRAM_GROUP_PERIOD
+TELEGRAM_GROUP_PERIOD = float(os.getenv('TELEGRAM_GROUP_PERIOD', '60'))   # Окно ограничения для групп, секунд
+TELEGRAM_MAX_RETRIES = int(os.getenv('TELEGRAM_MAX_RETRIES', '3'))        # Повторов запроса после ответа 429 (RetryAfter)
+
+# Состояния диалога (какой ввод ждём от пользователя, активная викторина)
+STATE_BACKEND = os.getenv('STATE_BACKEND', 'memory').lower()          # memory - в памяти процесса, sqlite - переживают перезапуск, redis - общие для нескольких серверов
+STATE_TTL = int(os.getenv('STATE_TTL', '3600'))                         # Через сколько секунд без действий состояние забывается
+STATE_MAX_ENTRIES = int(os.getenv('STATE_MAX_ENTRIES', '100000'))       # Сколько состояний держать в памяти процесса
+REDIS_URL = os.getenv('REDIS_URL')                                      # Адрес Redis для STATE_BACKEND=redis
+STATE_KEY_PREFIX = os.getenv('STATE_KEY_PREFIX', 'literary_bot:state:') # Префикс ключей состояний в Redis
+
+# Кэш объяснений LLM (память + SQLite)
+LLM_CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+LLM_CACHE_MEMORY_SIZE = int(os.getenv('LLM_CACHE_MEMORY_SIZE', '5000'))     # Записей в LRU в памяти процесса
+LLM_CACHE_MAX_ROWS = int(os.getenv('LLM_CACHE_MAX_ROWS', '200000'))         # Записей в таблице SQLite
+LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', str(30 * 24 * 3600)))       # Время жизни записи, секунд
+
+# Словарь терминов и фраз: исходные JSON и собранный из них файл SQLite только для чтения
+LEXICON_SOURCE_DIR = os.getenv('LEXICON_SOURCE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'))
+LEXICON_PATH = os.getenv('LEXICON_PATH', os.path.join(LEXICON_SOURCE_DIR, 'lexicon.db'))
+LEXICON_CACHE_SIZE = int(os.getenv('LEXICON_CACHE_SIZE', '4096'))  # Сколько записей словаря держать разобранными в памяти
 
 # Admin
 ADMIN_USER_ID = os.getenv('ADMIN_USER_ID')
@@ -29,6 +105,22 @@ def validate_config():
         ('OPENROUTER_API_KEY', OPENROUTER_API_KEY),
     ]
 
+    if BOT_MODE == 'webhook':
+        required_vars += [
+            ('WEBHOOK_URL', WEBHOOK_URL),
+            ('WEBHOOK_SECRET', WEBHOOK_SECRET),
+        ]
+    elif BOT_MODE != 'polling':
+        raise ValueError(f"Неизвестный режим BOT_MODE: {BOT_MODE} (ожидается polling или webhook)")
+
+    if BOT_WORKERS > 1 and BOT_MODE != 'webhook':
+        raise ValueError("BOT_WORKERS больше 1 поддерживается только в режиме webhook")
+
+    if STATE_BACKEND == 'redis':
+        required_vars.append(('REDIS_URL', REDIS_URL))
+    elif STATE_BACKEND not in ('memory', 'sqlite'):
+        raise ValueError(f"Неизвестное хранилище STATE_BACKEND: {STATE_BACKEND} (ожидается memory, sqlite или redis)")
+
     missing_vars = []
     for var_name, var_value in required_vars:
         if not var_value:
@@ -42,4 +134,18 @@ def validate_config():
 # Bot settings
 MAX_MESSAGE_LENGTH = 4096  # Максимальная длина сообщения Telegram
 QUIZ_OPTIONS_COUNT = 4     # Количество вариантов ответа в викторине
+DICTIONARY_PAGE_SIZE = 10  # Слов на одной странице личного словаря
+CSV_EXPORT_SPOOL_SIZE = int(os.getenv('CSV_EXPORT_SPOOL_SIZE', str(1024 * 1024)))  # До скольки байт экспорт CSV держится в памяти, дальше пишется на диск
+PDF_FONT_PATH = os.getenv('PDF_FONT_PATH', '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf')  # TTF шрифт с кириллицей для PDF
+PDF_EXPORT_WORKERS = int(os.getenv('PDF_EXPORT_WORKERS', '2'))      # Процессов для вёрстки PDF
+PDF_EXPORT_MAX_QUEUE = int(os.getenv('PDF_EXPORT_MAX_QUEUE', '8'))  # Сколько PDF может готовиться одновременно (с ожидающими)
+MORPH_CACHE_SIZE = int(os.getenv('MORPH_CACHE_SIZE', '10000'))  # Сколько разобранных слов помнит лемматизатор
+QUIZ_POOL_ENABLED = os.getenv('QUIZ_POOL_ENABLED', 'true').lower() == 'true'  # Готовить вопросы викторины от LLM заранее, в фоне
+QUIZ_POOL_TOPICS = [topic.strip() for topic in os.getenv('QUIZ_POOL_TOPICS', 'литературные термины,русская классика XIX века,устаревшие слова').split(',') if topic.strip()]
+QUIZ_POOL_MIN_SIZE = int(os.getenv('QUIZ_POOL_MIN_SIZE', '10'))    # Тема с меньшим числом готовых вопросов пополняется
+QUIZ_POOL_MAX_SIZE = int(os.getenv('QUIZ_POOL_MAX_SIZE', '50'))    # Больше стольких вопросов на тему не хранить
+QUIZ_POOL_BATCH_SIZE = int(os.getenv('QUIZ_POOL_BATCH_SIZE', '5'))  # Вопросов в одном запросе к LLM
+QUIZ_POOL_REFILL_INTERVAL = float(os.getenv('QUIZ_POOL_REFILL_INTERVAL', '60'))  # Как часто проверять запас вопросов, секунд
+QUIZ_POOL_SIMILARITY = float(os.getenv('QUIZ_POOL_SIMILARITY', '0.8'))  # Доля общих слов, начиная с которой вопросы считаются повтором
 DEFAULT_LANGUAGE = 'ru'    # Язык по умолчанию
+STREAM_EDIT_INTERVAL = float(os.getenv('STREAM_EDIT_INTERVAL', '1.0'))  # Минимальный интервал между правками сообщения при потоковом ответе, секунд
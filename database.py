@@ -1,25 +1,127 @@
 """Работа с SQLite базой данных для пользовательских словарей"""
+import asyncio
+import csv
+import io
+import queue
 import sqlite3
 import logging
-from typing import List, Dict, Optional
-from config import DATABASE_PATH
+import tempfile
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import List, Dict, Optional, Iterator, Tuple, BinaryIO
+from config import (
+    DATABASE_PATH, DB_READ_POOL_SIZE, DB_BUSY_TIMEOUT, DB_SYNCHRONOUS, DB_CACHED_STATEMENTS,
+    DB_CONSISTENCY_CHECK_INTERVAL, CSV_EXPORT_SPOOL_SIZE, ASYNCIO_DEBUG
+)
+from write_behind import WriteBehindBuffer
 
 logger = logging.getLogger(__name__)
 
+def _warn_if_on_event_loop() -> None:
+    """В режиме отладки сообщить, если запрос к базе выполняется в потоке event loop"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    stack = "".join(traceback.format_stack(limit=8)[:-2])
+    logger.warning(f"Запрос к базе данных выполняется в потоке event loop:\n{stack}")
+
+class ConnectionPool:
+    """
+    Пул долгоживущих соединений SQLite: одно пишущее и несколько читающих
+
+    SQLite допускает только одного писателя, поэтому все записи идут через одно
+    соединение под замком. В режиме WAL читатели не блокируются писателем и
+    работают через собственные соединения. Подготовленные выражения кэшируются
+    в каждом соединении (cached_statements) и переиспользуются между вызовами.
+    """
+
+    def __init__(self, db_path: str, readers: int = DB_READ_POOL_SIZE,
+                 busy_timeout: int = DB_BUSY_TIMEOUT, synchronous: str = DB_SYNCHRONOUS,
+                 cached_statements: int = DB_CACHED_STATEMENTS):
+        self.db_path = db_path
+        self.busy_timeout = busy_timeout
+        self.synchronous = synchronous
+        self.cached_statements = cached_statements
+
+        self._write_lock = threading.Lock()
+        self._writer = self._connect()
+
+        # База в памяти у каждого соединения своя - читаем через писателя
+        self._shared = db_path == ':memory:'
+        self._readers = queue.Queue()
+        if not self._shared:
+            for _ in range(max(readers, 1)):
+                self._readers.put(self._connect())
+
+    def _connect(self) -> sqlite3.Connection:
+        """Открыть соединение с настройками пула"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout / 1000,
+            check_same_thread=False,
+            cached_statements=self.cached_statements
+        )
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(f'PRAGMA synchronous={self.synchronous}')
+        conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout)}')
+        return conn
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """
+        Получить пишущее соединение
+
+        Транзакция фиксируется при выходе из блока и откатывается при исключении.
+        """
+        if ASYNCIO_DEBUG:
+            _warn_if_on_event_loop()
+
+        with self._write_lock:
+            try:
+                yield self._writer
+                self._writer.commit()
+            except BaseException:
+                self._writer.rollback()
+                raise
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """Получить читающее соединение (ждёт, если все заняты)"""
+        if ASYNCIO_DEBUG:
+            _warn_if_on_event_loop()
+
+        if self._shared:
+            with self._write_lock:
+                yield self._writer
+            return
+
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    def close(self) -> None:
+        """Закрыть все соединения пула"""
+        with self._write_lock:
+            self._writer.close()
+        while not self._readers.empty():
+            self._readers.get_nowait().close()
+
 class DatabaseManager:
     """Класс для управления базой данных"""
 
     def __init__(self, db_path: str = DATABASE_PATH):
         self.db_path = db_path
+        self.pool = ConnectionPool(db_path)
         self.init_db()
 
-    def get_connection(self):
-        """Получить соединение с базой данных"""
-        return sqlite3.connect(self.db_path)
-
     def init_db(self):
         """Инициализировать базу данных и создать таблицы"""
-        with self.get_connection() as conn:
+        with self.pool.writer() as conn:
             cursor = conn.cursor()
 
             # Таблица пользовательских словарей
@@ -48,7 +150,38 @@ class DatabaseManager:
                 )
             ''')
 
-            conn.commit()
+            # Индекс под выборку "последние просмотренные": страница словаря читается
+            # из индекса без сортировки всего словаря пользователя. Индекс намеренно
+            # не покрывающий: word и explanation - основной объём таблицы, а last_lookup
+            # меняется при каждом просмотре, и вместе с ним переписывалась бы копия
+            # объяснения в индексе. Страница - это page_size + 1 строк, их дочитывают
+            # из таблицы по rowid
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_user_dictionaries_recent
+                ON user_dictionaries(user_id, last_lookup DESC, id DESC)
+            ''')
+
+            # Счётчик уникальных слов ведётся триггерами: стоимость записи
+            # не зависит от размера словаря пользователя
+            cursor.execute('''
+                CREATE TRIGGER IF NOT EXISTS trg_user_dictionaries_insert
+                AFTER INSERT ON user_dictionaries
+                BEGIN
+                    INSERT INTO user_stats (user_id, unique_words)
+                    VALUES (NEW.user_id, 1)
+                    ON CONFLICT(user_id) DO UPDATE SET
+                        unique_words = unique_words + 1;
+                END
+            ''')
+            cursor.execute('''
+                CREATE TRIGGER IF NOT EXISTS trg_user_dictionaries_delete
+                AFTER DELETE ON user_dictionaries
+                BEGIN
+                    UPDATE user_stats SET unique_words = MAX(unique_words - 1, 0)
+                    WHERE user_id = OLD.user_id;
+                END
+            ''')
+
             logger.info("База данных инициализирована")
 
     def save_word(self, user_id: int, word: str, explanation: str) -> bool:
@@ -63,35 +196,50 @@ class DatabaseManager:
         Returns:
             bool: True если сохранено, False если ошибка
         """
+        return self.save_words_batch([(user_id, word, explanation, 1)])
+
+    def save_words_batch(self, events: List[Tuple[int, str, str, int]]) -> bool:
+        """
+        Сохранить пакет просмотров слов одной транзакцией
+
+        Args:
+            events (List[Tuple]): Просмотры (user_id, слово, объяснение, число просмотров)
+
+        Returns:
+            bool: True если сохранено, False если ошибка (пакет не записан целиком)
+        """
+        if not events:
+            return True
+
+        lookups_by_user: Dict[int, int] = {}
+        for user_id, _, _, count in events:
+            lookups_by_user[user_id] = lookups_by_user.get(user_id, 0) + count
+
         try:
-            with self.get_connection() as conn:
+            with self.pool.writer() as conn:
                 cursor = conn.cursor()
 
-                # Попытаться вставить новое слово или обновить счетчик существующих
-                cursor.execute('''
+                # Вставить новые слова или увеличить счетчики существующих
+                cursor.executemany('''
                     INSERT INTO user_dictionaries (user_id, word, explanation, lookup_count, last_lookup)
-                    VALUES (?, ?, ?, 1, CURRENT_TIMESTAMP)
+                    VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
                     ON CONFLICT(user_id, word) DO UPDATE SET
-                        lookup_count = lookup_count + 1,
+                        lookup_count = lookup_count + excluded.lookup_count,
                         last_lookup = CURRENT_TIMESTAMP
-                ''', (user_id, word.lower(), explanation))
+                ''', [(user_id, word.lower(), explanation, count) for user_id, word, explanation, count in events])
 
-                # Обновить статистику пользователя
-                cursor.execute('''
+                # Обновить статистику пользователей
+                cursor.executemany('''
                     INSERT INTO user_stats (user_id, total_lookups)
-                    VALUES (?, 1)
+                    VALUES (?, ?)
                     ON CONFLICT(user_id) DO UPDATE SET
-                        total_lookups = total_lookups + 1
-                ''', (user_id,))
-
-                # Обновить количество уникальных слов
-                self._update_unique_words_count(user_id)
+                        total_lookups = total_lookups + excluded.total_lookups
+                ''', list(lookups_by_user.items()))
 
-                conn.commit()
                 return True
 
         except Exception as e:
-            logger.error(f"Ошибка при сохранении слова '{word}' для пользователя {user_id}: {e}")
+            logger.error(f"Ошибка при сохранении {len(events)} слов для {len(lookups_by_user)} пользователей: {e}")
             return False
 
     def get_user_dictionary(self, user_id: int, limit: int = 50) -> List[Dict]:
@@ -106,33 +254,103 @@ class DatabaseManager:
             List[Dict]: Список слов с объяснениями
         """
         try:
-            with self.get_connection() as conn:
+            with self.pool.reader() as conn:
                 cursor = conn.cursor()
 
                 cursor.execute('''
-                    SELECT word, explanation, lookup_count, first_lookup, last_lookup
+                    SELECT id, word, explanation, lookup_count, first_lookup, last_lookup
                     FROM user_dictionaries
                     WHERE user_id = ?
-                    ORDER BY last_lookup DESC
+                    ORDER BY last_lookup DESC, id DESC
                     LIMIT ?
                 ''', (user_id, limit))
 
-                words = []
-                for row in cursor.fetchall():
-                    words.append({
-                        'word': row[0],
-                        'explanation': row[1],
-                        'lookup_count': row[2],
-                        'first_lookup': row[3],
-                        'last_lookup': row[4]
-                    })
-
-                return words
+                return [self._row_to_word(row) for row in cursor.fetchall()]
 
         except Exception as e:
             logger.error(f"Ошибка при получении словаря пользователя {user_id}: {e}")
             return []
 
+    def get_user_dictionary_page(self, user_id: int, page_size: int,
+                                 cursor: Optional[Tuple[str, int]] = None,
+                                 direction: str = 'next') -> Dict:
+        """
+        Получить страницу словаря пользователя (keyset-пагинация)
+
+        Страница ищется по индексу от позиции курсора, поэтому её стоимость
+        не зависит ни от номера страницы, ни от размера словаря. Остальные
+        столбцы берутся из таблицы по rowid - не больше page_size + 1 чтений.
+
+        Args:
+            user_id (int): ID пользователя
+            page_size (int): Слов на странице
+            cursor (Optional[Tuple[str, int]]): Позиция (last_lookup, id) соседней страницы,
+                None - первая страница
+            direction (str): 'next' - более старые слова после курсора, 'prev' - более новые до курсора
+
+        Returns:
+            Dict: words - слова страницы (от новых к старым), has_next/has_prev - есть ли соседние страницы
+        """
+        if direction not in ('next', 'prev'):
+            raise ValueError(f"Неизвестное направление пагинации: {direction}")
+
+        try:
+            with self.pool.reader() as conn:
+                sql_cursor = conn.cursor()
+
+                if cursor is None:
+                    sql_cursor.execute('''
+                        SELECT id, word, explanation, lookup_count, first_lookup, last_lookup
+                        FROM user_dictionaries
+                        WHERE user_id = ?
+                        ORDER BY last_lookup DESC, id DESC
+                        LIMIT ?
+                    ''', (user_id, page_size + 1))
+                elif direction == 'next':
+                    sql_cursor.execute('''
+                        SELECT id, word, explanation, lookup_count, first_lookup, last_lookup
+                        FROM user_dictionaries
+                        WHERE user_id = ? AND (last_lookup, id) < (?, ?)
+                        ORDER BY last_lookup DESC, id DESC
+                        LIMIT ?
+                    ''', (user_id, cursor[0], cursor[1], page_size + 1))
+                else:
+                    sql_cursor.execute('''
+                        SELECT id, word, explanation, lookup_count, first_lookup, last_lookup
+                        FROM user_dictionaries
+                        WHERE user_id = ? AND (last_lookup, id) > (?, ?)
+                        ORDER BY last_lookup ASC, id ASC
+                        LIMIT ?
+                    ''', (user_id, cursor[0], cursor[1], page_size + 1))
+
+                rows = sql_cursor.fetchall()
+
+            # Лишняя строка показывает, есть ли страница дальше в направлении движения
+            has_more = len(rows) > page_size
+            words = [self._row_to_word(row) for row in rows[:page_size]]
+
+            if direction == 'prev' and cursor is not None:
+                words.reverse()
+                return {'words': words, 'has_next': True, 'has_prev': has_more}
+
+            return {'words': words, 'has_next': has_more, 'has_prev': cursor is not None}
+
+        except Exception as e:
+            logger.error(f"Ошибка при получении страницы словаря пользователя {user_id}: {e}")
+            return {'words': [], 'has_next': False, 'has_prev': False}
+
+    @staticmethod
+    def _row_to_word(row) -> Dict:
+        """Преобразовать строку user_dictionaries в словарь"""
+        return {
+            'id': row[0],
+            'word': row[1],
+            'explanation': row[2],
+            'lookup_count': row[3],
+            'first_lookup': row[4],
+            'last_lookup': row[5]
+        }
+
     def clear_user_dictionary(self, user_id: int) -> bool:
         """
         Очистить словарь пользователя
@@ -144,17 +362,12 @@ class DatabaseManager:
             bool: True если очищено, False если ошибка
         """
         try:
-            with self.get_connection() as conn:
+            with self.pool.writer() as conn:
                 cursor = conn.cursor()
 
                 cursor.execute('DELETE FROM user_dictionaries WHERE user_id = ?', (user_id,))
                 deleted_count = cursor.rowcount
 
-                # Обновить статистику
-                if deleted_count > 0:
-                    self._update_unique_words_count(user_id)
-
-                conn.commit()
                 logger.info(f"Удалено {deleted_count} слов из словаря пользователя {user_id}")
                 return True
 
@@ -173,7 +386,7 @@ class DatabaseManager:
             Optional[Dict]: Статистика пользователя
         """
         try:
-            with self.get_connection() as conn:
+            with self.pool.reader() as conn:
                 cursor = conn.cursor()
 
                 cursor.execute('SELECT * FROM user_stats WHERE user_id = ?', (user_id,))
@@ -194,63 +407,224 @@ class DatabaseManager:
             logger.error(f"Ошибка при получении статистики пользователя {user_id}: {e}")
             return None
 
-    def _update_unique_words_count(self, user_id: int):
-        """Обновить количество уникальных слов пользователя"""
+    def repair_unique_words(self) -> int:
+        """
+        Проверить счётчики уникальных слов и исправить расхождения
+
+        Счётчики ведутся триггерами; проверка ловит расхождения после ручных
+        правок базы или восстановления из резервной копии.
+
+        Returns:
+            int: Сколько пользователей исправлено
+        """
         try:
-            with self.get_connection() as conn:
+            with self.pool.writer() as conn:
                 cursor = conn.cursor()
 
-                # Посчитать уникальные слова
-                cursor.execute('SELECT COUNT(*) FROM user_dictionaries WHERE user_id = ?', (user_id,))
-                unique_count = cursor.fetchone()[0]
-
-                # Обновить статистику
+                # Пользователи со словами, но без строки статистики
                 cursor.execute('''
                     INSERT INTO user_stats (user_id, unique_words)
-                    VALUES (?, ?)
-                    ON CONFLICT(user_id) DO UPDATE SET
-                        unique_words = ?
-                ''', (user_id, unique_count, unique_count))
+                    SELECT DISTINCT user_id, 0 FROM user_dictionaries
+                    WHERE user_id NOT IN (SELECT user_id FROM user_stats)
+                ''')
 
-                conn.commit()
+                cursor.execute('''
+                    UPDATE user_stats
+                    SET unique_words = (
+                        SELECT COUNT(*) FROM user_dictionaries d WHERE d.user_id = user_stats.user_id
+                    )
+                    WHERE unique_words != (
+                        SELECT COUNT(*) FROM user_dictionaries d WHERE d.user_id = user_stats.user_id
+                    )
+                ''')
+                repaired = cursor.rowcount
+
+            if repaired:
+                logger.warning(f"Исправлены счётчики уникальных слов у {repaired} пользователей")
+            return repaired
 
         except Exception as e:
-            logger.error(f"Ошибка при обновлении количества уникальных слов для {user_id}: {e}")
+            logger.error(f"Ошибка при проверке счётчиков уникальных слов: {e}")
+            return 0
 
-    def export_user_dictionary_csv(self, user_id: int) -> str:
+    def export_user_dictionary_csv(self, user_id: int) -> Optional[BinaryIO]:
         """
         Экспортировать словарь пользователя в CSV формат
 
+        Строки читаются курсором по одной и сразу пишутся во временный файл:
+        до CSV_EXPORT_SPOOL_SIZE байт он хранится в памяти, дальше - на диске,
+        поэтому расход памяти не зависит от размера словаря.
+
         Args:
             user_id (int): ID пользователя
 
         Returns:
-            str: CSV текст словаря
+            Optional[BinaryIO]: Файл с CSV (позиция в начале), None если словарь пуст.
+                Закрыть файл должен вызывающий код.
         """
-        words = self.get_user_dictionary(user_id, limit=1000)
+        spool = tempfile.SpooledTemporaryFile(max_size=CSV_EXPORT_SPOOL_SIZE, mode='w+b')
+        try:
+            # utf-8-sig: Excel открывает кириллицу без выбора кодировки
+            text = io.TextIOWrapper(spool, encoding='utf-8-sig', newline='')
+            writer = csv.writer(text)
+            writer.writerow(["Слово", "Объяснение", "Количество просмотров", "Первое обращение", "Последнее обращение"])
+
+            rows = 0
+            with self.pool.reader() as conn:
+                cursor = conn.execute('''
+                    SELECT word, explanation, lookup_count, first_lookup, last_lookup
+                    FROM user_dictionaries
+                    WHERE user_id = ?
+                    ORDER BY last_lookup DESC, id DESC
+                ''', (user_id,))
+                for row in cursor:
+                    writer.writerow(row)
+                    rows += 1
+
+            text.flush()
+            text.detach()
+        except BaseException:
+            spool.close()
+            raise
+
+        if rows == 0:
+            spool.close()
+            return None
+
+        spool.seek(0)
+        return spool
+
+    def close(self):
+        """Закрыть соединения с базой данных"""
+        self.pool.close()
+
+class AsyncDatabase:
+    """
+    Асинхронный фасад над DatabaseManager для обработчиков бота
+
+    Каждый запрос выполняется в отдельном пуле потоков, поэтому ожидание
+    диска и блокировок SQLite не останавливает event loop.
+    """
+
+    def __init__(self, manager: DatabaseManager, max_workers: int = DB_READ_POOL_SIZE + 1):
+        self.manager = manager
+        # Потоков на одно больше числа читателей: писатель не ждёт освобождения читающих потоков
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db")
 
-        if not words:
-            return "Словарь пуст"
+    async def _run(self, func, *args):
+        """Выполнить синхронный метод DatabaseManager в пуле потоков"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
 
-        csv_lines = ["Слово,Объяснение,Количество просмотров,Первое обращение,Последнее обращение"]
+    async def save_word(self, user_id: int, word: str, explanation: str) -> bool:
+        """Сохранить слово в словарь пользователя"""
+        return await self._run(self.manager.save_word, user_id, word, explanation)
 
-        for word in words:
-            line = f'"{word["word"]}","{word["explanation"].replace(chr(34), chr(34) + chr(34))}","{word["lookup_count"]}","{word["first_lookup"]}","{word["last_lookup"]}"'
-            csv_lines.append(line)
+    async def save_words_batch(self, events: List[Tuple[int, str, str, int]]) -> bool:
+        """Сохранить пакет просмотров слов одной транзакцией"""
+        return await self._run(self.manager.save_words_batch, events)
 
-        return "\n".join(csv_lines)
+    async def get_user_dictionary(self, user_id: int, limit: int = 50) -> List[Dict]:
+        """Получить словарь пользователя"""
+        return await self._run(self.manager.get_user_dictionary, user_id, limit)
+
+    async def get_user_dictionary_page(self, user_id: int, page_size: int,
+                                       cursor: Optional[Tuple[str, int]] = None,
+                                       direction: str = 'next') -> Dict:
+        """Получить страницу словаря пользователя"""
+        return await self._run(self.manager.get_user_dictionary_page, user_id, page_size, cursor, direction)
+
+    async def clear_user_dictionary(self, user_id: int) -> bool:
+        """Очистить словарь пользователя"""
+        return await self._run(self.manager.clear_user_dictionary, user_id)
+
+    async def repair_unique_words(self) -> int:
+        """Проверить и исправить счётчики уникальных слов"""
+        return await self._run(self.manager.repair_unique_words)
+
+    async def get_user_stats(self, user_id: int) -> Optional[Dict]:
+        """Получить статистику пользователя"""
+        return await self._run(self.manager.get_user_stats, user_id)
+
+    async def export_user_dictionary_csv(self, user_id: int) -> Optional[BinaryIO]:
+        """Экспортировать словарь пользователя в CSV формат"""
+        return await self._run(self.manager.export_user_dictionary_csv, user_id)
+
+    def close(self) -> None:
+        """Дождаться выполняющихся запросов и закрыть соединения"""
+        self._executor.shutdown(wait=True)
+        self.manager.close()
 
 # Глобальный экземпляр менеджера БД
 db_manager = DatabaseManager()
 
-def save_word(user_id: int, word: str, explanation: str) -> bool:
-    """Глобальная функция для сохранения слова"""
-    return db_manager.save_word(user_id, word, explanation)
+# Асинхронный доступ к БД для обработчиков
+db = AsyncDatabase(db_manager)
 
-def get_user_dictionary(user_id: int, limit: int = 50) -> List[Dict]:
-    """Глобальная функция для получения словаря"""
-    return db_manager.get_user_dictionary(user_id, limit)
+# Отложенная пакетная запись просмотров слов
+write_buffer = WriteBehindBuffer(db.save_words_batch)
 
-def clear_user_dictionary(user_id: int) -> bool:
+async def save_word(user_id: int, word: str, explanation: str) -> bool:
+    """Глобальная функция для сохранения слова (запись откладывается и выполняется пакетом)"""
+    await write_buffer.add(user_id, word, explanation)
+    return True
+
+async def get_user_dictionary(user_id: int, limit: int = 50) -> List[Dict]:
+    """Глобальная функция для получения словаря"""
+    # Пользователь должен видеть только что просмотренные слова
+    if write_buffer.has_pending(user_id):
+        await write_buffer.flush()
+    return await db.get_user_dictionary(user_id, limit)
+
+async def get_user_dictionary_page(user_id: int, page_size: int,
+                                   cursor: Optional[Tuple[str, int]] = None,
+                                   direction: str = 'next') -> Dict:
+    """Глобальная функция для получения страницы словаря"""
+    if write_buffer.has_pending(user_id):
+        await write_buffer.flush()
+    return await db.get_user_dictionary_page(user_id, page_size, cursor, direction)
+
+async def get_user_stats(user_id: int) -> Optional[Dict]:
+    """Глобальная функция для получения статистики пользователя"""
+    if write_buffer.has_pending(user_id):
+        await write_buffer.flush()
+    return await db.get_user_stats(user_id)
+
+async def export_user_dictionary_csv(user_id: int) -> Optional[BinaryIO]:
+    """Глобальная функция для экспорта словаря в CSV"""
+    if write_buffer.has_pending(user_id):
+        await write_buffer.flush()
+    return await db.export_user_dictionary_csv(user_id)
+
+async def clear_user_dictionary(user_id: int) -> bool:
     """Глобальная функция для очистки словаря"""
-    return db_manager.clear_user_dictionary(user_id)
+    write_buffer.discard_user(user_id)
+    # Пакет, который сейчас пишется, может содержать слова пользователя - удаляем после него
+    await write_buffer.wait_inflight()
+    return await db.clear_user_dictionary(user_id)
+
+async def _check_consistency(interval: float) -> None:
+    """Периодически сверять счётчики уникальных слов со словарями"""
+    while True:
+        await db.repair_unique_words()
+        await asyncio.sleep(interval)
+
+_consistency_task: Optional[asyncio.Task] = None
+
+def start_database() -> None:
+    """Глобальная функция для запуска фоновых задач БД (вызывается из работающего event loop)"""
+    global _consistency_task
+    write_buffer.start()
+    if DB_CONSISTENCY_CHECK_INTERVAL > 0:
+        _consistency_task = asyncio.get_running_loop().create_task(
+            _check_consistency(DB_CONSISTENCY_CHECK_INTERVAL)
+        )
+
+async def close_database() -> None:
+    """Глобальная функция для записи буфера и закрытия соединений с базой данных"""
+    global _consistency_task
+    if _consistency_task is not None:
+        _consistency_task.cancel()
+        _consistency_task = None
+    await write_buffer.close()
+    db.close()
@@ -0,0 +1,220 @@
+"""Многопроцессный режим: один процесс принимает webhook, несколько обрабатывают обновления
+
+Принимающий процесс не разбирает обновление целиком - только находит в JSON
+ID пользователя (или чата) и кладёт обновление в очередь процесса-обработчика
+номер user_id % BOT_WORKERS. Каждый обработчик - обычное приложение бота со
+своими LLM сервисом, соединениями с БД и PerUserUpdateProcessor.
+
+Порядок обновлений одного пользователя сохраняется: все они попадают в один
+процесс, очередь процесса - FIFO, а при переполнении очереди запросы webhook
+ждут места по очереди (asyncio.Lock на каждый процесс).
+
+Состояния диалога (state_store) при этом живут в процессе пользователя.
+Чтобы они переживали перезапуск и смену числа процессов, нужен
+STATE_BACKEND=sqlite или redis.
+"""
+import asyncio
+import logging
+import multiprocessing
+import queue
+import signal
+from typing import Callable, List, Optional
+from telegram import Bot, Update
+from telegram.ext import Application
+from config import (
+    TELEGRAM_BOT_TOKEN, BOT_WORKERS, WORKER_QUEUE_SIZE,
+    WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_SECRET, WEBHOOK_HOST, WEBHOOK_PORT
+)
+
+logger = logging.getLogger(__name__)
+
+# Сколько ждать завершения процессов-обработчиков при остановке, секунд
+WORKER_STOP_TIMEOUT = 30
+
+
+def extract_user_key(data: dict) -> Optional[int]:
+    """
+    Найти в JSON обновления, чьё оно - так же, как PerUserUpdateProcessor.get_user_key
+
+    Args:
+        data (dict): Обновление Telegram в виде JSON
+
+    Returns:
+        Optional[int]: ID пользователя, иначе ID чата; None если обновление ничьё (например, опрос)
+    """
+    for field, payload in data.items():
+        if field == 'update_id' or not isinstance(payload, dict):
+            continue
+        for name in ('from', 'user'):
+            user = payload.get(name)
+            if isinstance(user, dict) and 'id' in user:
+                return user['id']
+        chat = payload.get('chat') or (payload.get('message') or {}).get('chat')
+        if isinstance(chat, dict) and 'id' in chat:
+            return chat['id']
+    return None
+
+
+def shard_for(data: dict, workers: int) -> int:
+    """Номер процесса-обработчика для обновления"""
+    key = extract_user_key(data)
+    if key is None:
+        # Ничьи обновления порядка не требуют
+        key = data.get('update_id', 0)
+    return key % workers
+
+
+async def serve_worker(application: Application, updates) -> None:
+    """
+    Работа процесса-обработчика: брать обновления из очереди и передавать приложению бота
+
+    Args:
+        application: Приложение бота с обработчиками
+        updates: Очередь JSON обновлений; None - сигнал остановки
+    """
+    async with application:
+        if application.post_init:
+            await application.post_init(application)
+
+        await application.start()
+        try:
+            while True:
+                data = await asyncio.to_thread(updates.get)
+                if data is None:
+                    break
+                try:
+                    update = Update.de_json(data, application.bot)
+                except Exception as e:
+                    logger.warning(f"Не удалось разобрать обновление {data.get('update_id')}: {e}")
+                    continue
+                await application.update_queue.put(update)
+        finally:
+            await application.stop()
+            if application.post_shutdown:
+                await application.post_shutdown(application)
+
+
+def run_worker(index: int, updates) -> None:
+    """Точка входа процесса-обработчика"""
+    # Останавливает обработчики принимающий процесс (через очередь), а не сигналы терминала
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+    from main import build_application
+    logger.info(f"Процесс-обработчик {index} запущен")
+    asyncio.run(serve_worker(build_application(), updates))
+    logger.info(f"Процесс-обработчик {index} остановлен")
+
+
+class UpdateDispatcher:
+    """Раздаёт обновления процессам-обработчикам по user_id"""
+
+    def __init__(self, workers: int = BOT_WORKERS, queue_size: int = WORKER_QUEUE_SIZE,
+                 target: Callable[[int, object], None] = run_worker, context=None):
+        """
+        Args:
+            workers (int): Число процессов-обработчиков
+            queue_size (int): Сколько обновлений может ждать в очереди одного процесса
+            target: Функция процесса-обработчика (номер, очередь)
+            context: Контекст multiprocessing (по умолчанию spawn - без копии event loop родителя)
+        """
+        if workers < 1:
+            raise ValueError("Нужен хотя бы один процесс-обработчик")
+
+        self.workers = workers
+        self._context = context or multiprocessing.get_context('spawn')
+        self._target = target
+        self.queues = [self._context.Queue(queue_size) for _ in range(workers)]
+        self._locks = [asyncio.Lock() for _ in range(workers)]
+        self._processes: List[multiprocessing.Process] = []
+
+        self.dispatched = [0] * workers
+        self.waited = 0
+
+    def start(self) -> None:
+        """Запустить процессы-обработчики"""
+        for index, updates in enumerate(self.queues):
+            process = self._context.Process(target=self._target, args=(index, updates), name=f"bot-worker-{index}")
+            process.start()
+            self._processes.append(process)
+        logger.info(f"Запущено процессов-обработчиков: {self.workers}")
+
+    async def dispatch(self, data: dict) -> int:
+        """
+        Передать обновление процессу его пользователя
+
+        Args:
+            data (dict): Обновление Telegram в виде JSON
+
+        Returns:
+            int: Номер процесса-обработчика
+        """
+        index = shard_for(data, self.workers)
+        async with self._locks[index]:
+            try:
+                self.queues[index].put_nowait(data)
+            except queue.Full:
+                # Обработчик не успевает - Telegram подождёт ответа на webhook
+                self.waited += 1
+                await asyncio.to_thread(self.queues[index].put, data)
+        self.dispatched[index] += 1
+        return index
+
+    @property
+    def alive(self) -> bool:
+        """Все ли процессы-обработчики работают"""
+        return bool(self._processes) and all(process.is_alive() for process in self._processes)
+
+    def stats(self) -> dict:
+        """Состояние процессов для проверки здоровья"""
+        workers = []
+        for index, updates in enumerate(self.queues):
+            try:
+                pending = updates.qsize()
+            except NotImplementedError:
+                # macOS не умеет qsize
+                pending = None
+            process = self._processes[index] if index < len(self._processes) else None
+            workers.append({
+                "alive": process is not None and process.is_alive(),
+                "pending": pending,
+                "dispatched": self.dispatched[index],
+            })
+        return {"workers": workers, "waited": self.waited}
+
+    def stop(self, timeout: float = WORKER_STOP_TIMEOUT) -> None:
+        """Попросить обработчики доделать очередь и остановиться; зависшие - завершить"""
+        for updates in self.queues:
+            updates.put(None)
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                logger.warning(f"{process.name} не остановился за {timeout} с, завершаем")
+                process.terminate()
+                process.join()
+        self._processes = []
+
+
+async def run_dispatcher() -> None:
+    """Запустить процессы-обработчики и принимающий webhook сервер"""
+    import uvicorn
+    from webhook_server import create_webhook_app
+
+    dispatcher = UpdateDispatcher()
+    dispatcher.start()
+
+    server = uvicorn.Server(uvicorn.Config(
+        app=create_webhook_app(None, WEBHOOK_SECRET, dispatcher=dispatcher),
+        host=WEBHOOK_HOST,
+        port=WEBHOOK_PORT,
+        log_level="info",
+    ))
+    webhook_url = f"{WEBHOOK_URL.rstrip('/')}{WEBHOOK_PATH}"
+
+    try:
+        async with Bot(TELEGRAM_BOT_TOKEN) as bot:
+            await bot.set_webhook(url=webhook_url, secret_token=WEBHOOK_SECRET, allowed_updates=Update.ALL_TYPES)
+            logger.info(f"Webhook зарегистрирован: {webhook_url}, слушаем {WEBHOOK_HOST}:{WEBHOOK_PORT}")
+            await server.serve()
+    finally:
+        await asyncio.to_thread(dispatcher.stop)
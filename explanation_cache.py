@@ -0,0 +1,206 @@
+"""Двухуровневый кэш ответов LLM: LRU в памяти процесса + таблица SQLite"""
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict
+from config import (
+    DATABASE_PATH, LLM_CACHE_MEMORY_SIZE, LLM_CACHE_MAX_ROWS, LLM_CACHE_TTL
+)
+
+logger = logging.getLogger(__name__)
+
+# Как часто (в записях) проверять размер таблицы и удалять устаревшие записи
+EVICTION_INTERVAL = 500
+
+
+def normalize_input(text: str) -> str:
+    """
+    Нормализовать пользовательский ввод для ключа кэша
+
+    Args:
+        text (str): Исходный текст
+
+    Returns:
+        str: Текст в нижнем регистре, с ё -> е и схлопнутыми пробелами
+    """
+    return " ".join(text.lower().replace('ё', 'е').split())
+
+
+class ExplanationCache:
+    """Кэш объяснений: горячие записи в памяти, все остальные - в SQLite"""
+
+    def __init__(self, db_path: str = DATABASE_PATH, memory_size: int = LLM_CACHE_MEMORY_SIZE,
+                 max_rows: int = LLM_CACHE_MAX_ROWS, ttl: int = LLM_CACHE_TTL):
+        self.db_path = db_path
+        self.memory_size = memory_size
+        self.max_rows = max_rows
+        self.ttl = ttl
+
+        # key -> (value, expires_at)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes_since_eviction = 0
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._init_table()
+
+    def _init_table(self):
+        """Создать таблицу кэша"""
+        with self._lock:
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    operation TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            ''')
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_llm_cache_created_at ON llm_cache(created_at)'
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def make_key(operation: str, text: str, model: str, prompt_version: int) -> str:
+        """
+        Построить ключ кэша
+
+        Args:
+            operation (str): Операция (explain_word, retell_text, ...)
+            text (str): Пользовательский ввод
+            model (str): Модель LLM
+            prompt_version (int): Версия промптов - при изменении промптов старые ответы не используются
+
+        Returns:
+            str: Ключ кэша
+        """
+        raw = f"{operation}\x00{model}\x00{prompt_version}\x00{normalize_input(text)}"
+        return f"{operation}:{hashlib.sha1(raw.encode('utf-8')).hexdigest()}"
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Получить ответ из кэша
+
+        Args:
+            key (str): Ключ кэша
+
+        Returns:
+            Optional[str]: Сохранённый ответ или None
+        """
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return value
+                del self._memory[key]
+
+            try:
+                row = self._conn.execute(
+                    'SELECT value, created_at FROM llm_cache WHERE key = ?', (key,)
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.error(f"Ошибка чтения кэша объяснений: {e}")
+                row = None
+
+            if row is None or row[1] + self.ttl <= now:
+                self.misses += 1
+                return None
+
+            self.disk_hits += 1
+            self._remember(key, row[0], row[1] + self.ttl)
+            return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        """
+        Сохранить ответ в кэш
+
+        Args:
+            key (str): Ключ кэша
+            value (str): Ответ LLM
+        """
+        now = time.time()
+        operation = key.split(':', 1)[0]
+
+        with self._lock:
+            self._remember(key, value, now + self.ttl)
+
+            try:
+                self._conn.execute('''
+                    INSERT OR REPLACE INTO llm_cache (key, operation, value, created_at)
+                    VALUES (?, ?, ?, ?)
+                ''', (key, operation, value, now))
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Ошибка записи в кэш объяснений: {e}")
+                return
+
+            self._writes_since_eviction += 1
+            if self._writes_since_eviction >= EVICTION_INTERVAL:
+                self._writes_since_eviction = 0
+                self._evict(now)
+
+    def _remember(self, key: str, value: str, expires_at: float) -> None:
+        """Положить запись в LRU в памяти, вытеснив самую старую при переполнении"""
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _evict(self, now: float) -> None:
+        """Удалить устаревшие записи и самые старые записи сверх лимита"""
+        try:
+            expired = self._conn.execute(
+                'DELETE FROM llm_cache WHERE created_at <= ?', (now - self.ttl,)
+            ).rowcount
+
+            overflow = self._conn.execute('SELECT COUNT(*) FROM llm_cache').fetchone()[0] - self.max_rows
+            if overflow > 0:
+                self._conn.execute('''
+                    DELETE FROM llm_cache WHERE key IN (
+                        SELECT key FROM llm_cache ORDER BY created_at LIMIT ?
+                    )
+                ''', (overflow,))
+
+            self._conn.commit()
+            if expired or overflow > 0:
+                logger.info(f"Кэш объяснений: удалено {expired} устаревших и {max(overflow, 0)} лишних записей")
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка очистки кэша объяснений: {e}")
+
+    def evict(self) -> None:
+        """Принудительно очистить устаревшие и лишние записи"""
+        with self._lock:
+            self._evict(time.time())
+
+    def get_stats(self) -> Dict:
+        """
+        Получить статистику попаданий
+
+        Returns:
+            Dict: Счётчики попаданий/промахов и размер LRU
+        """
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            'memory_entries': len(self._memory)
+        }
+
+    def close(self) -> None:
+        """Закрыть соединение с базой данных"""
+        with self._lock:
+            self._conn.close()
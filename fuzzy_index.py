@@ -0,0 +1,302 @@
+"""Нечёткий поиск терминов с учётом опечаток
+
+Инвертированный индекс позиционных n-грамм (от биграмм до 4-грамм) отбирает
+кандидатов, маски набора букв отсеивают большую часть из них, а точное
+расстояние Дамерау-Левенштейна (битово-параллельным алгоритмом) считается
+только для оставшихся.
+
+Поиск идёт по возрастанию числа правок: сначала на расстоянии 1, где порог
+по n-граммам высокий и кандидатов единицы, и только если найдено меньше
+limit терминов - на расстоянии 2.
+
+Фильтр по n-граммам не теряет термины: его порог выводится из того, сколько
+n-грамм может испортить одна правка. Для коротких слов такого порога нет (две
+перестановки в пятибуквенном слове меняют все его биграммы) - тогда
+проверяются все термины подходящей длины. Результаты совпадают с полным
+перебором.
+"""
+from collections import Counter
+from itertools import chain, compress
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Допустимое число правок в зависимости от длины слова: в коротких словах
+# две опечатки превращают слово в другое
+SHORT_WORD_LENGTH = 4
+
+# Длины n-грамм в индексе: чем длиннее n-грамма, тем короче её список терминов
+GRAM_SIZES = (2, 3, 4)
+
+
+def _normalize(word: str) -> str:
+    """Привести слово к виду, в котором хранится в индексе"""
+    return word.strip().lower().replace('ё', 'е')
+
+
+def _grams(word: str, size: int) -> List[str]:
+    """N-граммы слова с маркерами начала и конца (по порядку позиций)"""
+    padded = f"^{word}$"
+    return [padded[i:i + size] for i in range(len(padded) - size + 1)]
+
+
+def _letter_mask(word: str) -> int:
+    """Битовая маска букв слова (совпадения битов у разных букв допустимы - это только фильтр)"""
+    mask = 0
+    for char in word:
+        mask |= 1 << (ord(char) & 63)
+    return mask
+
+
+def _pattern_masks(word: str) -> Dict[str, int]:
+    """Для каждой буквы слова - битовая маска позиций, где она стоит"""
+    masks: Dict[str, int] = {}
+    for position, char in enumerate(word):
+        masks[char] = masks.get(char, 0) | (1 << position)
+    return masks
+
+
+def _osa_distance(pattern_masks: Dict[str, int], length: int, text: str) -> int:
+    """
+    Битово-параллельное расстояние Дамерау-Левенштейна (алгоритм Хююрё)
+
+    Столбец матрицы расстояний хранится разностями в двух целых числах,
+    поэтому на каждую букву text приходится десяток битовых операций
+    вместо прохода по всей строке матрицы.
+
+    Args:
+        pattern_masks (Dict[str, int]): Маски позиций букв первого слова
+        length (int): Длина первого слова
+        text (str): Второе слово
+
+    Returns:
+        int: Расстояние между словами
+    """
+    if not length:
+        return len(text)
+
+    full = (1 << length) - 1
+    top = 1 << (length - 1)
+    vp, vn, d0, previous_match = full, 0, 0, 0
+    score = length
+    for char in text:
+        match = pattern_masks.get(char, 0)
+        transposed = (((~d0) & match) << 1) & previous_match
+        d0 = ((((match & vp) + vp) ^ vp) | match | vn | transposed) & full
+        hp = (vn | ~(d0 | vp)) & full
+        hn = d0 & vp
+        if hp & top:
+            score += 1
+        elif hn & top:
+            score -= 1
+        x = ((hp << 1) | 1) & full
+        vn = x & d0
+        vp = ((hn << 1) | ~(x | d0)) & full
+        previous_match = match
+    return score
+
+
+def damerau_levenshtein(a: str, b: str, max_distance: int) -> int:
+    """
+    Расстояние Дамерау-Левенштейна (вставка, удаление, замена, перестановка соседних букв)
+
+    Args:
+        a (str): Первое слово
+        b (str): Второе слово
+        max_distance (int): Порог: все расстояния больше него считаются равными max_distance + 1
+
+    Returns:
+        int: Расстояние или max_distance + 1, если оно больше порога
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    if a == b:
+        return 0
+    return min(_osa_distance(_pattern_masks(a), len(a), b), max_distance + 1)
+
+
+class _Query:
+    """Запрос, подготовленный для сравнения с кандидатами"""
+
+    def __init__(self, word: str):
+        self.word = word
+        self.length = len(word)
+        self.grams = {size: _grams(word, size) for size in GRAM_SIZES}
+        self.letters = _letter_mask(word)
+        self.masks = _pattern_masks(word)
+
+
+class FuzzyIndex:
+    """Индекс терминов для поиска с опечатками"""
+
+    def __init__(self, terms: Iterable[str], max_distance: int = 2):
+        """
+        Args:
+            terms: Термины (ключи базы)
+            max_distance (int): Максимальное число правок для длинных слов
+        """
+        self.max_distance = max_distance
+
+        # нормализованный термин -> исходный ключ
+        self.keys: Dict[str, str] = {}
+        self._terms: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._lengths: List[int] = []
+        self._letters: List[int] = []
+        # длина -> номера терминов (для коротких запросов без фильтра по n-граммам)
+        self._by_length: Dict[int, List[int]] = {}
+        # (n-грамма, позиция) -> номера терминов
+        self._postings: Dict[Tuple[str, int], List[int]] = {}
+
+        for term in terms:
+            normalized = _normalize(term)
+            if not normalized or normalized in self.keys:
+                continue
+            self.keys[normalized] = term
+            term_id = len(self._terms)
+            self._ids[normalized] = term_id
+            self._terms.append(normalized)
+            self._lengths.append(len(normalized))
+            self._letters.append(_letter_mask(normalized))
+            self._by_length.setdefault(len(normalized), []).append(term_id)
+            for size in GRAM_SIZES:
+                for position, gram in enumerate(_grams(normalized, size)):
+                    self._postings.setdefault((gram, position), []).append(term_id)
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def distance_limit(self, word: str) -> int:
+        """Допустимое число правок для слова такой длины"""
+        return 1 if len(word) <= SHORT_WORD_LENGTH else self.max_distance
+
+    def search(self, query: str, limit: int = 5, max_distance: Optional[int] = None) -> List[Tuple[str, int]]:
+        """
+        Найти термины, похожие на запрос
+
+        Args:
+            query (str): Слово пользователя
+            limit (int): Максимальное количество результатов
+            max_distance (Optional[int]): Число правок; по умолчанию зависит от длины слова
+
+        Returns:
+            List[Tuple[str, int]]: Пары (исходный ключ, число правок) от самых похожих
+        """
+        word = _normalize(query)
+        if not word:
+            return []
+        if max_distance is None:
+            max_distance = self.distance_limit(word)
+
+        exact = self.keys.get(word)
+        if exact is not None and (limit == 1 or max_distance == 0):
+            return [(exact, 0)]
+
+        # Большинство опечаток - одна правка, и для best_match второй проход обычно не нужен.
+        # Каждый следующий проход находит только термины дальше уже найденных
+        prepared = _Query(word)
+        found: Dict[int, tuple] = {}
+        if exact is not None:
+            found[self._ids[word]] = (0, 0, 0, word)
+        for distance_bound in range(1, max_distance + 1):
+            if len(found) >= limit:
+                break
+            self._collect(prepared, distance_bound, found)
+
+        results = sorted(found.values())
+        return [(self.keys[term], distance) for distance, _, _, term in results[:limit]]
+
+    def _collect(self, query: _Query, max_distance: int, found: Dict[int, tuple]) -> None:
+        """
+        Добавить в found термины на расстоянии не больше max_distance от запроса
+
+        Args:
+            query (_Query): Подготовленный запрос
+            max_distance (int): Допустимое число правок
+            found (Dict[int, tuple]): Номер термина -> ключ сортировки; уже найденные пропускаются
+        """
+        # Одна правка портит не больше n + 1 n-грамм (замена - n, перестановка соседних
+        # букв - n + 1). Берём самые длинные n-граммы, для которых после всех правок
+        # гарантированно остаётся общая: длинные встречаются в десятки раз реже коротких
+        size = next((size for size in sorted(GRAM_SIZES, reverse=True)
+                     if len(query.grams[size]) - (size + 1) * max_distance >= 1), None)
+        if size is None:
+            # Слово слишком короткое - общей n-граммы может не остаться совсем
+            # ("дезвг" и "едзгв"). Проверяем все термины подходящей длины
+            passed = ((term_id, 0) for term_id in chain.from_iterable(
+                self._by_length.get(length, ())
+                for length in range(query.length - max_distance, query.length + max_distance + 1)
+            ))
+        else:
+            passed = self._candidates(query, size, max_distance)
+
+        query_length, query_letters = query.length, query.letters
+        lengths, letters = self._lengths, self._letters
+        for term_id, count in passed:
+            if term_id in found or abs(lengths[term_id] - query_length) > max_distance:
+                continue
+            # Каждая правка добавляет или убирает не больше одной буквы из набора -
+            # дешёвая проверка по маскам отсеивает большинство кандидатов до подсчёта расстояния
+            term_letters = letters[term_id]
+            if ((query_letters & ~term_letters).bit_count() > max_distance
+                    or (term_letters & ~query_letters).bit_count() > max_distance):
+                continue
+            term = self._terms[term_id]
+            distance = _osa_distance(query.masks, query_length, term)
+            if distance <= max_distance:
+                # При равном числе правок выше термин с большим числом общих n-грамм
+                found[term_id] = (distance, -count, abs(len(term) - query_length), term)
+
+    def _candidates(self, query: _Query, size: int, max_distance: int) -> Iterable[Tuple[int, int]]:
+        """
+        Термины, у которых с запросом достаточно общих n-грамм
+
+        Args:
+            query (_Query): Подготовленный запрос
+            size (int): Длина n-грамм
+            max_distance (int): Допустимое число правок
+
+        Returns:
+            Iterable[Tuple[int, int]]: Пары (номер термина, число общих n-грамм)
+        """
+        grams = query.grams[size]
+        min_shared = len(grams) - (size + 1) * max_distance
+
+        # N-грамма ищется только в окне позиций +-max_distance: за k правок буквы
+        # сдвигаются не больше чем на k
+        postings = self._postings
+        slots = []
+        for position, gram in enumerate(grams):
+            lists = [postings[(gram, shifted)]
+                     for shifted in range(max(position - max_distance, 0), position + max_distance + 1)
+                     if (gram, shifted) in postings]
+            slots.append((sum(map(len, lists)), lists))
+
+        # Частые n-граммы (суффиксы, окончания) дают самые длинные списки. Если термин
+        # делит с запросом min_shared n-грамм, то без k самых частых списков он делит
+        # хотя бы min_shared - k: их можно не читать, снизив порог
+        skip = min(min_shared - 1, len(slots) - 1)
+        slots.sort(key=lambda slot: slot[0])
+        if skip:
+            del slots[-skip:]
+        min_shared -= skip
+
+        shared = Counter()
+        for _, lists in slots:
+            for candidates in lists:
+                shared.update(candidates)
+
+        # Порог по числу n-грамм проверяется без цикла на Python: кандидатов с одной-двумя
+        # общими n-граммами тысячи, а проходят порог намного меньше
+        return compress(shared.items(), map(min_shared.__le__, shared.values()))
+
+    def best_match(self, query: str) -> Optional[str]:
+        """
+        Найти самый похожий термин
+
+        Args:
+            query (str): Слово пользователя
+
+        Returns:
+            Optional[str]: Исходный ключ термина или None, если похожих нет
+        """
+        found = self.search(query, limit=1)
+        return found[0][0] if found else None
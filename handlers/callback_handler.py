@@ -13,7 +13,11 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 
     callback_data = query.data
 
-    if callback_data == "show_menu":
+    if callback_data.startswith("dict_"):
+        # Кнопки под личным словарём: страницы, экспорт, очистка
+        from handlers.dictionary_handler import handle_dictionary_callback
+        await handle_dictionary_callback(update, context)
+    elif callback_data == "show_menu":
         # Показать главное меню
         from keyboards import get_main_menu_keyboard
         await query.message.reply_text(
@@ -2,8 +2,9 @@
 from telegram import Update
 from telegram.ext import ContextTypes
 import logging
-from llm_service import generate_character_description, initialize_llm_service
+from llm_service import stream_character_description, initialize_llm_service
 from keyboards import get_response_actions_keyboard
+from handlers.streaming import stream_to_message, finish_message
 
 logger = logging.getLogger(__name__)
 
@@ -29,16 +30,17 @@ async def characterize_hero(update: Update, context: ContextTypes.DEFAULT_TYPE,
             )
             return
 
-        # Отправляем сообщение "бот думает"
+        # Отправляем сообщение "бот думает" - его будем править по мере генерации
         processing_msg = await update.message.reply_text("🔄 Обрабатываю текст...")
 
-        # Генерируем характеристику героя
+        # Генерируем характеристику героя потоком
         logger.info(f"Отправляем информацию о герое '{character_info}' в LLM API для характеристики")
 
-        description = generate_character_description(character_info)
+        header = f"🎭 Характеристика героя:\n\n{character_info}\n\n"
+        description, complete = await stream_to_message(processing_msg, stream_character_description(character_info), header)
 
         if description:
-            response = f"🎭 Характеристика героя:\n\n{character_info}\n\n{description}"
+            response = f"{header}{description}"
             logger.info(f"LLM API успешно вернул характеристику для пользователя {user_id} (длина: {len(description)} символов)")
         else:
             logger.error(f"LLM API не смог дать характеристику героя для пользователя {user_id}")
@@ -48,22 +50,20 @@ async def characterize_hero(update: Update, context: ContextTypes.DEFAULT_TYPE,
                 "Попробуйте указать имя, фамилию и произведение более точно."
             )
 
-        # Удаляем сообщение о обработке
-        try:
-            await processing_msg.delete()
-        except Exception as e:
-            logger.warning(f"Не удалось удалить сообщение об обработке для пользователя {user_id}: {e}")
-
         # Проверяем длину ответа
         max_length = 4000
         if len(response) > max_length:
             logger.warning(f"Характеристика героя для пользователя {user_id} слишком длинная, обрезаем до {max_length} символов")
             response = response[:max_length-100] + "\n\n... [Характеристика обрезана из-за ограничений Telegram]"
 
+        # Заменяем сообщение "бот думает" готовым ответом
         logger.info(f"Отправляем характеристику героя пользователю {user_id}")
-        await update.message.reply_text(
+        await finish_message(
+            processing_msg,
+            update.message,
             response,
-            reply_markup=get_response_actions_keyboard()
+            reply_markup=get_response_actions_keyboard(),
+            complete=complete
         )
 
         logger.info(f"Успешно выполнена характеристика героя '{character_info}' для пользователя {user_id}")
@@ -2,14 +2,63 @@
 from telegram import Update
 from telegram.ext import ContextTypes
 import logging
-from database import get_user_dictionary, clear_user_dictionary
+from database import get_user_dictionary, get_user_dictionary_page, get_user_stats, clear_user_dictionary
 from keyboards import get_dictionary_actions_keyboard
+from config import DICTIONARY_PAGE_SIZE
 
 logger = logging.getLogger(__name__)
 
+def format_dictionary_page(words: list, unique_words: int) -> str:
+    """
+    Сформировать текст страницы словаря
+
+    Args:
+        words (list): Слова страницы
+        unique_words (int): Всего уникальных слов у пользователя
+
+    Returns:
+        str: Текст сообщения
+    """
+    response_lines = ["📚 Вот слова, которые вы недавно спрашивали:"]
+
+    for word_data in words:
+        word = word_data['word']
+        count = word_data['lookup_count']
+        last_lookup = word_data['last_lookup'][:10]  # Только дата
+
+        # Создаем краткое описание (первые 50 символов объяснения)
+        short_explanation = word_data['explanation'][:50]
+        if len(word_data['explanation']) > 50:
+            short_explanation += "..."
+
+        response_lines.append(
+            f"• {word} ({count} просмотров, {last_lookup})\n"
+            f"   └ {short_explanation}"
+        )
+
+    response = "\n".join(response_lines)
+    response += f"\n\n📊 Всего уникальных слов: {unique_words}"
+    return response
+
+def page_keyboard(page: dict):
+    """Клавиатура действий с кнопками соседних страниц"""
+    words = page['words']
+    prev_cursor = encode_cursor(words[0]) if page['has_prev'] else None
+    next_cursor = encode_cursor(words[-1]) if page['has_next'] else None
+    return get_dictionary_actions_keyboard(prev_cursor, next_cursor)
+
+def encode_cursor(word_data: dict) -> str:
+    """Позиция слова в словаре для callback_data кнопки страницы"""
+    return f"{word_data['last_lookup']}|{word_data['id']}"
+
+def decode_cursor(cursor: str) -> tuple:
+    """Разобрать позицию из callback_data: (last_lookup, id)"""
+    last_lookup, word_id = cursor.rsplit("|", 1)
+    return last_lookup, int(word_id)
+
 async def show_dictionary(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
-    Показать личный словарь пользователя
+    Показать личный словарь пользователя (первую страницу)
 
     Args:
         update: Объект обновления Telegram
@@ -18,10 +67,10 @@ async def show_dictionary(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     user_id = update.effective_user.id
 
     try:
-        # Получаем словарь пользователя
-        words = get_user_dictionary(user_id, limit=20)  # Показываем последние 20 слов
+        # Получаем последние слова пользователя
+        page = await get_user_dictionary_page(user_id, DICTIONARY_PAGE_SIZE)
 
-        if not words:
+        if not page['words']:
             response = (
                 "📚 Ваш словарь пока пуст!\n\n"
                 "Начните изучать литературу:\n"
@@ -31,45 +80,80 @@ async def show_dictionary(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             await update.message.reply_text(response)
             return
 
-        # Формируем ответ со списком слов
-        response_lines = ["📚 Вот слова, которые вы недавно спрашивали:"]
+        stats = await get_user_stats(user_id)
+        unique_words = stats['unique_words'] if stats else len(page['words'])
 
-        for i, word_data in enumerate(words, 1):
-            word = word_data['word']
-            count = word_data['lookup_count']
-            last_lookup = word_data['last_lookup'][:10]  # Только дата
+        # Отправляем клавиатуру с действиями и кнопками страниц
+        await update.message.reply_text(
+            format_dictionary_page(page['words'], unique_words),
+            reply_markup=page_keyboard(page)
+        )
+
+    except Exception as e:
+        logger.error(f"Ошибка при показе словаря пользователя {user_id}: {e}")
+        await update.message.reply_text(
+            "❌ Не удалось загрузить словарь. Попробуйте позже."
+        )
 
-            # Создаем краткое описание (первые 50 символов объяснения)
-            short_explanation = word_data['explanation'][:50]
-            if len(word_data['explanation']) > 50:
-                short_explanation += "..."
+async def show_dictionary_page(update: Update, context: ContextTypes.DEFAULT_TYPE, direction: str, cursor: str) -> None:
+    """
+    Показать соседнюю страницу словаря, отредактировав сообщение
 
-            response_lines.append(
-                f"{i}. {word} ({count} просмотров, {last_lookup})\n"
-                f"   └ {short_explanation}"
-            )
+    Args:
+        update: Объект обновления Telegram
+        context: Контекст обработчика
+        direction (str): 'next' - более старые слова, 'prev' - более новые
+        cursor (str): Позиция из callback_data кнопки
+    """
+    user_id = update.effective_user.id
+    query = update.callback_query
 
-        response = "\n".join(response_lines)
+    try:
+        page = await get_user_dictionary_page(user_id, DICTIONARY_PAGE_SIZE, decode_cursor(cursor), direction)
 
-        # Добавляем информацию о действиях
-        total_words = len(words)
-        response += f"\n\n📊 Всего уникальных слов: {total_words}"
+        if not page['words']:
+            # Слова с этой позиции удалены или переместились - начинаем с первой страницы
+            page = await get_user_dictionary_page(user_id, DICTIONARY_PAGE_SIZE)
+            if not page['words']:
+                await query.edit_message_text("📭 Ваш словарь пуст.")
+                return
 
-        if total_words > 20:
-            response += f"\n⚠️ Показано 20 последних слов из {total_words}"
+        stats = await get_user_stats(user_id)
+        unique_words = stats['unique_words'] if stats else len(page['words'])
 
-        # Отправляем клавиатуру с действиями
-        await update.message.reply_text(
-            response,
-            reply_markup=get_dictionary_actions_keyboard()
+        await query.edit_message_text(
+            format_dictionary_page(page['words'], unique_words),
+            reply_markup=page_keyboard(page)
         )
 
     except Exception as e:
-        logger.error(f"Ошибка при показе словаря пользователя {user_id}: {e}")
-        await update.message.reply_text(
+        logger.error(f"Ошибка при перелистывании словаря пользователя {user_id}: {e}")
+        await query.message.reply_text(
             "❌ Не удалось загрузить словарь. Попробуйте позже."
         )
 
+async def handle_dictionary_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Обработать нажатие кнопки под словарём (callback_data начинается с dict_)
+
+    Args:
+        update: Объект обновления Telegram
+        context: Контекст обработчика
+    """
+    callback_data = update.callback_query.data
+
+    if callback_data.startswith(("dict_next|", "dict_prev|")):
+        action, cursor = callback_data.split("|", 1)
+        await show_dictionary_page(update, context, action[len("dict_"):], cursor)
+    elif callback_data == "dict_export_pdf":
+        await export_dictionary_pdf(update, context)
+    elif callback_data == "dict_export_csv":
+        await export_dictionary_csv(update, context)
+    elif callback_data == "dict_clear":
+        await clear_user_dict(update, context)
+    else:
+        logger.warning(f"Неизвестная кнопка словаря: {callback_data}")
+
 async def export_dictionary_pdf(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     Экспортировать словарь в PDF
@@ -80,14 +164,17 @@ async def export_dictionary_pdf(update: Update, context: ContextTypes.DEFAULT_TY
     """
     user_id = update.effective_user.id
 
-    try:
-        import reportlab.pdfgen.canvas as canvas
-        from reportlab.pdfbase import pdfmetrics
-        from reportlab.pdfbase.ttfonts import TTFont
-        import io
+    from pdf_export import pdf_exporter, PdfExportBusy, REPORTLAB_AVAILABLE
 
+    if not REPORTLAB_AVAILABLE:
+        await update.callback_query.message.reply_text(
+            "❌ Модуль для создания PDF не установлен. Используйте экспорт в CSV."
+        )
+        return
+
+    try:
         # Получаем все слова пользователя
-        words = get_user_dictionary(user_id, limit=1000)
+        words = await get_user_dictionary(user_id, limit=1000)
 
         if not words:
             await update.callback_query.message.reply_text(
@@ -95,67 +182,31 @@ async def export_dictionary_pdf(update: Update, context: ContextTypes.DEFAULT_TY
             )
             return
 
-        # Создаем PDF
-        buffer = io.BytesIO()
-        c = canvas.Canvas(buffer)
+        rows = [(w['word'], w['explanation'], w['lookup_count']) for w in words]
+        status_msg = await update.callback_query.message.reply_text("⏳ Готовлю PDF...")
 
-        # Настройки шрифта (если есть русский шрифт)
         try:
-            c.setFont("Helvetica", 16)
-        except:
-            pass
-
-        # Заголовок
-        c.drawString(50, 800, "Личный литературный словарь")
-        c.drawString(50, 780, f"Пользователь ID: {user_id}")
-        c.drawString(50, 760, f"Всего слов: {len(words)}")
-
-        # Список слов
-        y_position = 720
-        for i, word_data in enumerate(words, 1):
-            if y_position < 50:  # Новая страница
-                c.showPage()
-                c.setFont("Helvetica", 12)
-                y_position = 800
-
-            word_line = f"{i}. {word_data['word']} ({word_data['lookup_count']} просмотров)"
-            c.drawString(50, y_position, word_line)
-
-            # Объяснение с переносом строк
-            explanation = word_data['explanation']
-            words_list = explanation.split()
-            line = ""
-            y_position -= 20
-
-            for w in words_list:
-                if c.stringWidth(line + " " + w, "Helvetica", 10) < 500:
-                    line += " " + w if line else w
-                else:
-                    c.setFont("Helvetica", 10)
-                    c.drawString(70, y_position, line)
-                    line = w
-                    y_position -= 15
-                    if y_position < 50:
-                        break
-
-            if line and y_position >= 50:
-                c.drawString(70, y_position, line)
-                y_position -= 25
-
-        c.save()
-        buffer.seek(0)
+            pdf_bytes = await pdf_exporter.export(user_id, rows)
+        except PdfExportBusy as e:
+            await status_msg.edit_text(
+                "⏳ Ваш PDF уже готовится, подождите немного."
+                if e.user_in_progress else
+                "⏳ Сейчас готовится много PDF. Попробуйте через минуту или используйте экспорт в CSV."
+            )
+            return
 
         # Отправляем PDF
         await update.callback_query.message.reply_document(
-            document=buffer,
+            document=pdf_bytes,
             filename="literary_dictionary.pdf",
             caption="📄 Ваш личный литературный словарь в PDF формате"
         )
 
-    except ImportError:
-        await update.callback_query.message.reply_text(
-            "❌ Модуль для создания PDF не установлен. Используйте экспорт в CSV."
-        )
+        try:
+            await status_msg.delete()
+        except Exception as e:
+            logger.warning(f"Не удалось удалить сообщение о подготовке PDF: {e}")
+
     except Exception as e:
         logger.error(f"Ошибка при экспорте PDF для пользователя {user_id}: {e}")
         await update.callback_query.message.reply_text(
@@ -173,25 +224,22 @@ async def export_dictionary_csv(update: Update, context: ContextTypes.DEFAULT_TY
     user_id = update.effective_user.id
 
     try:
-        from database import DatabaseManager
-        db = DatabaseManager()
-        csv_content = db.export_user_dictionary_csv(user_id)
+        from database import export_user_dictionary_csv
+        csv_file = await export_user_dictionary_csv(user_id)
 
-        if csv_content == "Словарь пуст":
+        if csv_file is None:
             await update.callback_query.message.reply_text(
                 "📭 Ваш словарь пуст. Нечего экспортировать."
             )
             return
 
-        # Создаем файл в памяти
-        import io
-        csv_buffer = io.BytesIO(csv_content.encode('utf-8'))
-
-        await update.callback_query.message.reply_document(
-            document=csv_buffer,
-            filename="literary_dictionary.csv",
-            caption="📊 Ваш личный литературный словарь в формате CSV"
-        )
+        # Отправляем файл как есть, без промежуточной копии в памяти
+        with csv_file:
+            await update.callback_query.message.reply_document(
+                document=csv_file,
+                filename="literary_dictionary.csv",
+                caption="📊 Ваш личный литературный словарь в формате CSV"
+            )
 
     except Exception as e:
         logger.error(f"Ошибка при экспорте CSV для пользователя {user_id}: {e}")
@@ -219,7 +267,7 @@ async def clear_user_dict(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 
         # В реальном приложении здесь должна быть клавиатура подтверждения
         # Но для простоты просто очищаем
-        success = clear_user_dictionary(user_id)
+        success = await clear_user_dictionary(user_id)
 
         if success:
             await update.callback_query.message.reply_text(
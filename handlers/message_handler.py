@@ -2,11 +2,12 @@
 from telegram import Update
 from telegram.ext import ContextTypes
 import logging
+from state_store import create_state_store
 
 logger = logging.getLogger(__name__)
 
-# Состояния пользователей для отслеживания контекста
-USER_STATES = {}
+# Состояния пользователей для отслеживания контекста (только активные пользователи)
+USER_STATES = create_state_store('user_states')
 
 # Константы состояний
 STATE_NONE = 0
@@ -20,8 +21,8 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     user_id = update.effective_user.id
     text = update.message.text.strip()
 
-    # Получаем текущее состояние пользователя
-    current_state = USER_STATES.get(user_id, STATE_NONE)
+    # Получаем текущее состояние пользователя (после перезапуска - из внешнего хранилища)
+    current_state = await USER_STATES.aget(user_id, STATE_NONE)
 
     try:
         if current_state == STATE_NONE:
@@ -69,6 +70,10 @@ async def handle_menu_selection(update: Update, context: ContextTypes.DEFAULT_TY
             "🎭 Введите имя и фамилию героя, а также произведение (например: Обломов, Гончаров \"Обломов\"):"
         )
 
+    elif text == "/словарь":
+        from handlers.dictionary_handler import show_dictionary
+        await show_dictionary(update, context)
+
     else:
         from keyboards import get_main_menu_keyboard
         await update.message.reply_text(
@@ -76,7 +81,8 @@ async def handle_menu_selection(update: Update, context: ContextTypes.DEFAULT_TY
             "/слово - объяснить слово\n"
             "/объясни - разобрать фразу\n"
             "/перескажи - пересказать текст\n"
-            "/характер - характеристика героя",
+            "/характер - характеристика героя\n"
+            "/словарь - мой словарь",
             reply_markup=get_main_menu_keyboard()
         )
 
@@ -89,7 +95,7 @@ async def handle_word_request(update: Update, context: ContextTypes.DEFAULT_TYPE
 
     try:
         from handlers.word_handler import explain_word
-        await explain_word(update, context, word.lower())
+        await explain_word(update, context, word)
     except Exception as e:
         logger.error(f"Ошибка при объяснении слова '{word}': {e}")
         await update.message.reply_text(
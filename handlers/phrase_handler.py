@@ -3,8 +3,9 @@ from telegram import Update
 from telegram.ext import ContextTypes
 import logging
 from literary_data import get_phrase_explanation
-from llm_service import generate_phrase_explanation, initialize_llm_service
+from llm_service import stream_phrase_explanation, initialize_llm_service
 from keyboards import get_response_actions_keyboard
+from handlers.streaming import stream_to_message, finish_message
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +18,8 @@ async def explain_phrase(update: Update, context: ContextTypes.DEFAULT_TYPE, phr
         context: Контекст обработчика
         phrase (str): Фраза для объяснения
     """
+    processing_msg = None
+
     try:
         # Сначала пытаемся найти в предварительной базе
         phrase_data = get_phrase_explanation(phrase)
@@ -28,9 +31,6 @@ async def explain_phrase(update: Update, context: ContextTypes.DEFAULT_TYPE, phr
             # Фраза не найдена, используем LLM API
             logger.info(f"Пытаемся объяснить фразу через LLM API: '{phrase[:50]}...'")
 
-            # Отправляем сообщение "бот думает"
-            processing_msg = await update.message.reply_text("🔄 Обрабатываю текст...")
-
             # Инициализируем LLM сервис
             if not initialize_llm_service():
                 logger.error("Не удалось инициализировать LLM сервис для объяснения фразы")
@@ -39,11 +39,15 @@ async def explain_phrase(update: Update, context: ContextTypes.DEFAULT_TYPE, phr
                 )
                 return
 
-            explanation = generate_phrase_explanation(phrase)
+            # Отправляем сообщение "бот думает" - его будем править по мере генерации
+            processing_msg = await update.message.reply_text("🔄 Обрабатываю текст...")
+
+            header = "📝 Объяснение фразы:\n\n"
+            explanation, complete = await stream_to_message(processing_msg, stream_phrase_explanation(phrase), header)
 
             if explanation:
                 logger.info(f"LLM API успешно объяснил фразу (длина: {len(explanation)} символов)")
-                response = f"📝 Объяснение фразы:\n\n{explanation}"
+                response = f"{header}{explanation}"
             else:
                 logger.warning(f"LLM API не смог объяснить фразу: '{phrase[:50]}...'")
                 response = (
@@ -52,13 +56,6 @@ async def explain_phrase(update: Update, context: ContextTypes.DEFAULT_TYPE, phr
                     "Попробуйте упростить запрос или использовать /слово для отдельных терминов."
                 )
 
-        # Удаляем сообщение "бот думает" если оно было отправлено
-        if 'processing_msg' in locals():
-            try:
-                await processing_msg.delete()
-            except Exception as e:
-                logger.warning(f"Не удалось удалить сообщение 'бот думает': {e}")
-
         # Проверяем длину ответа - Telegram ограничивает 4096 символами
         max_length = 4000  # Даем запас
 
@@ -66,10 +63,20 @@ async def explain_phrase(update: Update, context: ContextTypes.DEFAULT_TYPE, phr
             # Если ответ слишком длинный, обрезаем и добавляем предупреждение
             response = response[:max_length-100] + "\n\n... [Ответ обрезан из-за ограничений Telegram]"
 
-        await update.message.reply_text(
-            response,
-            reply_markup=get_response_actions_keyboard()
-        )
+        if processing_msg is not None:
+            # Заменяем сообщение "бот думает" готовым ответом
+            await finish_message(
+                processing_msg,
+                update.message,
+                response,
+                reply_markup=get_response_actions_keyboard(),
+                complete=complete
+            )
+        else:
+            await update.message.reply_text(
+                response,
+                reply_markup=get_response_actions_keyboard()
+            )
 
     except Exception as e:
         logger.error(f"Ошибка при объяснении фразы '{phrase[:50]}...': {e}")
@@ -6,14 +6,16 @@ import random
 from keyboards import get_quiz_keyboard
 from database import get_user_dictionary
 from llm_service import generate_quiz_questions, initialize_llm_service
-from literary_data import get_literary_terms
+from literary_data import get_quiz_term_pool
+from term_pool import TermPool
+from state_store import create_state_store
 
 logger = logging.getLogger(__name__)
 
 # Хранилище активных викторин (user_id -> правильный ответ)
-active_quizzes = {}
+active_quizzes = create_state_store('active_quizzes')
 
-def generate_personalized_quiz_question(user_id: int):
+async def generate_personalized_quiz_question(user_id: int):
     """
     Генерирует персонализированный вопрос викторины на основе пользовательского словаря
 
@@ -24,14 +26,18 @@ def generate_personalized_quiz_question(user_id: int):
         tuple: (question, options, correct_index) или None если не удалось сгенерировать
     """
     # Получаем слова пользователя из базы данных
-    user_words = get_user_dictionary(user_id, limit=20)
+    user_words = await get_user_dictionary(user_id, limit=20)
 
     if len(user_words) >= 3:
         # Если у пользователя достаточно слов, генерируем вопрос на основе них
         return generate_quiz_from_user_words(user_words)
-    else:
-        # Если мало слов, генерируем вопрос на основе классической литературы
-        return generate_literary_quiz_question()
+    # Готовый вопрос от LLM из фонового запаса - без ожидания модели
+    from quiz_pool import quiz_pool
+    pooled = await quiz_pool.pop()
+    if pooled is not None:
+        return pooled
+    # Запас пуст - вопрос на основе классической литературы
+    return generate_literary_quiz_question()
 
 def generate_quiz_from_user_words(user_words):
     """
@@ -44,29 +50,19 @@ def generate_quiz_from_user_words(user_words):
         tuple: (question, options, correct_index) или None
     """
     try:
-        # Выбираем случайное слово для вопроса
-        random_word = random.choice(user_words)
-        correct_definition = random_word['explanation'][:100]  # Берем первые 100 символов объяснения
-
-        # Создаем варианты неправильных ответов из других слов пользователя
-        other_words = [w for w in user_words if w != random_word]
-        wrong_options = []
-
-        for _ in range(3):
-            if other_words:
-                wrong_word = random.choice(other_words)
-                wrong_options.append(wrong_word['explanation'][:100])
-                other_words.remove(wrong_word)
-            else:
-                # Если не хватает слов, используем общие литературные термины
-                wrong_options.append("Общее понятие из русской литературы")
+        # Случайное слово и до трёх других слов пользователя - выбор индексов, без копий списка
+        pool = TermPool((w['word'], w['explanation']) for w in user_words)
+        word, correct_definition, wrong_options = pool.sample()
+
+        # Если не хватает слов, используем общие литературные термины
+        wrong_options += ["Общее понятие из русской литературы"] * (3 - len(wrong_options))
 
         # Перемешиваем варианты
         all_options = wrong_options + [correct_definition]
         random.shuffle(all_options)
         correct_index = all_options.index(correct_definition)
 
-        question = f"Что означает слово '{random_word['word']}'?"
+        question = f"Что означает слово '{word}'?"
 
         return question, all_options, correct_index
 
@@ -82,35 +78,22 @@ def generate_literary_quiz_question():
         tuple: (question, options, correct_index) или None
     """
     try:
-        # Используем литературные термины из базы данных
-        literary_terms = get_literary_terms()
+        # Набор терминов строится один раз, вопрос - выбор нескольких индексов
+        sample = get_quiz_term_pool().sample()
 
-        if not literary_terms:
+        if sample is None:
             # Fallback на статические вопросы
             return get_fallback_quiz_question()
 
-        # Выбираем случайный термин
-        term = random.choice(literary_terms)
-        correct_definition = term['definition'][:100]
-
-        # Создаем неправильные варианты
-        other_terms = [t for t in literary_terms if t != term]
-        wrong_options = []
-
-        for _ in range(3):
-            if other_terms:
-                wrong_term = random.choice(other_terms)
-                wrong_options.append(wrong_term['definition'][:100])
-                other_terms.remove(wrong_term)
-            else:
-                wrong_options.append("Общее литературное понятие")
+        term, correct_definition, wrong_options = sample
+        wrong_options += ["Общее литературное понятие"] * (3 - len(wrong_options))
 
         # Перемешиваем варианты
         all_options = wrong_options + [correct_definition]
         random.shuffle(all_options)
         correct_index = all_options.index(correct_definition)
 
-        question = f"Что означает термин '{term['term']}' в русской литературе?"
+        question = f"Что означает термин '{term}' в русской литературе?"
 
         return question, all_options, correct_index
 
@@ -155,12 +138,12 @@ async def start_quiz(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None
         logger.info(f"Пользователь {user_id} запустил викторину")
 
         # Получаем слова пользователя для статистики
-        user_words = get_user_dictionary(user_id, limit=20)
+        user_words = await get_user_dictionary(user_id, limit=20)
         logger.info(f"У пользователя {user_id} в словаре {len(user_words)} слов")
 
         # Генерируем персонализированный вопрос
         logger.info(f"Генерируем персонализированный вопрос для пользователя {user_id}")
-        quiz_data = generate_personalized_quiz_question(user_id)
+        quiz_data = await generate_personalized_quiz_question(user_id)
 
         if quiz_data:
             question, options, correct_index = quiz_data
@@ -212,9 +195,8 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         else:
             result_text = f"❌ Неправильно. Правильный ответ: вариант {correct_index + 1}"
 
-        # Очищаем викторину пользователя
-        if user_id in active_quizzes:
-            del active_quizzes[user_id]
+        # Очищаем викторину пользователя (и во внешнем хранилище, если её нет в памяти)
+        active_quizzes.pop(user_id, None)
 
         # Отправляем результат
         await query.edit_message_text(
@@ -2,8 +2,9 @@
 from telegram import Update
 from telegram.ext import ContextTypes
 import logging
-from llm_service import generate_text_retelling, initialize_llm_service
+from llm_service import stream_text_retelling, initialize_llm_service
 from keyboards import get_response_actions_keyboard
+from handlers.streaming import stream_to_message, finish_message
 
 logger = logging.getLogger(__name__)
 
@@ -30,14 +31,6 @@ async def retell_text(update: Update, context: ContextTypes.DEFAULT_TYPE, text:
             )
             return
 
-        # Отправляем сообщение о обработке (для больших текстов)
-        if len(text) > 500:
-            logger.info(f"Текст пользователя {user_id} длинный, показываем сообщение об обработке")
-            processing_msg = await update.message.reply_text("🔄 Обрабатываю текст...")
-
-        # Генерируем пересказ
-        logger.info(f"Отправляем текст пользователя {user_id} в LLM API для пересказывания")
-
         # Инициализируем LLM сервис
         if not initialize_llm_service():
             logger.error("Не удалось инициализировать LLM сервис для пересказывания текста")
@@ -46,10 +39,16 @@ async def retell_text(update: Update, context: ContextTypes.DEFAULT_TYPE, text:
             )
             return
 
-        retelling = generate_text_retelling(text)
+        # Отправляем сообщение о обработке - его будем править по мере генерации
+        processing_msg = await update.message.reply_text("🔄 Обрабатываю текст...")
+
+        # Генерируем пересказ потоком
+        logger.info(f"Отправляем текст пользователя {user_id} в LLM API для пересказывания")
+        header = "📝 Современный пересказ:\n\n"
+        retelling, complete = await stream_to_message(processing_msg, stream_text_retelling(text), header)
 
         if retelling:
-            response = f"📝 Современный пересказ:\n\n{retelling}"
+            response = f"{header}{retelling}"
             logger.info(f"LLM API успешно вернул пересказ для пользователя {user_id} (длина: {len(retelling)} символов)")
 
             # Проверяем длину ответа
@@ -65,18 +64,14 @@ async def retell_text(update: Update, context: ContextTypes.DEFAULT_TYPE, text:
                 "Попробуйте отправить более короткий и понятный отрывок."
             )
 
-        # Удаляем сообщение о обработке, если оно было
-        if len(text) > 500 and 'processing_msg' in locals():
-            try:
-                await processing_msg.delete()
-                logger.info(f"Удалено сообщение об обработке для пользователя {user_id}")
-            except Exception as e:
-                logger.warning(f"Не удалось удалить сообщение об обработке для пользователя {user_id}: {e}")
-
+        # Заменяем сообщение о обработке готовым ответом
         logger.info(f"Отправляем пересказ пользователю {user_id}")
-        await update.message.reply_text(
+        await finish_message(
+            processing_msg,
+            update.message,
             response,
-            reply_markup=get_response_actions_keyboard()
+            reply_markup=get_response_actions_keyboard(),
+            complete=complete
         )
 
         logger.info(f"Успешно выполнен пересказ текста для пользователя {user_id}")
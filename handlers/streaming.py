@@ -0,0 +1,93 @@
+"""Потоковый вывод ответа LLM правкой сообщения-заглушки"""
+import logging
+import time
+from typing import AsyncIterator, Tuple
+from telegram import Message
+from telegram.error import BadRequest
+from config import STREAM_EDIT_INTERVAL
+from llm_service import IncompleteStreamError
+from rate_limiter import outbound_priority, PRIORITY_BULK
+
+logger = logging.getLogger(__name__)
+
+# Запас до лимита Telegram в 4096 символов
+MAX_STREAM_LENGTH = 4000
+
+# Курсор, показывающий что ответ ещё печатается
+TYPING_CURSOR = " ▌"
+
+# Дописывается к ответу, если поток оборвался на середине
+INCOMPLETE_NOTE = "\n\n⚠️ Ответ оборвался из-за сбоя связи с сервисом. Попробуйте запросить его ещё раз."
+
+
+async def stream_to_message(message: Message, chunks: AsyncIterator[str], header: str = "",
+                            min_interval: float = STREAM_EDIT_INTERVAL) -> Tuple[str, bool]:
+    """
+    Показывать ответ по мере генерации, правя сообщение на месте
+
+    Первый фрагмент показывается сразу, следующие правки - не чаще одной в min_interval секунд,
+    чтобы не упираться в лимиты Telegram.
+    Финальную правку (с клавиатурой) делает вызывающий код.
+
+    Args:
+        message: Сообщение-заглушка, которое будем править
+        chunks: Поток фрагментов ответа
+        header (str): Заголовок перед текстом ответа
+        min_interval (float): Минимальный интервал между правками, секунд
+
+    Returns:
+        Tuple[str, bool]: Текст ответа (без заголовка), пустая строка если модель ничего не вернула,
+            и False, если поток оборвался и текст неполный
+    """
+    text = ""
+    # Первый фрагмент показывается сразу, дальше - не чаще min_interval
+    last_edit = -min_interval
+
+    try:
+        async for chunk in chunks:
+            text += chunk
+
+            now = time.monotonic()
+            if now - last_edit < min_interval or not text.strip():
+                continue
+            last_edit = now
+
+            preview = f"{header}{text.strip()}"
+            if len(preview) > MAX_STREAM_LENGTH:
+                preview = preview[:MAX_STREAM_LENGTH]
+
+            try:
+                # Промежуточная правка уступает очередь ответам другим пользователям
+                with outbound_priority(PRIORITY_BULK):
+                    await message.edit_text(preview + TYPING_CURSOR)
+            except BadRequest as e:
+                # "Message is not modified" и подобные - просто ждём следующий фрагмент
+                logger.debug(f"Не удалось обновить сообщение при потоковом ответе: {e}")
+    except IncompleteStreamError as e:
+        logger.warning(f"Потоковый ответ оборвался: {e}")
+        return text.strip(), False
+
+    return text.strip(), True
+
+
+async def finish_message(message: Message, source_message: Message, text: str, reply_markup=None,
+                         complete: bool = True) -> None:
+    """
+    Заменить текст сообщения-заглушки финальным ответом
+
+    Если править сообщение нельзя (например, его удалили), ответ отправляется новым сообщением.
+
+    Args:
+        message: Сообщение-заглушка
+        source_message: Сообщение пользователя, на которое отвечаем
+        text (str): Финальный текст ответа
+        reply_markup: Клавиатура под ответом
+        complete (bool): False - поток оборвался, предупредить что ответ неполный
+    """
+    if not complete:
+        text += INCOMPLETE_NOTE
+    try:
+        await message.edit_text(text, reply_markup=reply_markup)
+    except BadRequest as e:
+        logger.warning(f"Не удалось отредактировать сообщение, отправляем новое: {e}")
+        await source_message.reply_text(text, reply_markup=reply_markup)
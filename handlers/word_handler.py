@@ -2,9 +2,11 @@
 from telegram import Update
 from telegram.ext import ContextTypes
 import logging
-from literary_data import get_word_definition, format_word_response
+from literary_data import find_term, format_word_response, LITERARY_TERMS
 from llm_service import generate_word_explanation, initialize_llm_service
 from keyboards import get_response_actions_keyboard
+from database import save_word
+from morphology import lemmatize
 
 
 logger = logging.getLogger(__name__)
@@ -16,7 +18,8 @@ async def explain_word(update: Update, context: ContextTypes.DEFAULT_TYPE, word:
     Args:
         update: Объект обновления Telegram
         context: Контекст обработчика
-        word (str): Слово для объяснения
+        word (str): Слово в том виде, как его ввёл пользователь: оно попадает в запрос,
+            ответ и личный словарь. Начальная форма нужна только для поиска в базе и ключа кэша
     """
     user_id = update.effective_user.id
 
@@ -37,7 +40,8 @@ async def explain_word(update: Update, context: ContextTypes.DEFAULT_TYPE, word:
         # Отправляем сообщение "бот думает"
         processing_msg = await update.message.reply_text("🔄 Обрабатываю текст...")
 
-        explanation = generate_word_explanation(word)
+        # Все формы слова ("помещику", "помещика") делят одно объяснение в кэше
+        explanation = await generate_word_explanation(word, lemma=lemmatize(word) or word.lower())
 
         if explanation:
             # API успешно вернул объяснение
@@ -46,8 +50,22 @@ async def explain_word(update: Update, context: ContextTypes.DEFAULT_TYPE, word:
         else:
             # API не сработал, пробуем предварительную базу как fallback
             logger.warning(f"LLM API не смог объяснить слово '{word}', пробуем предварительную базу")
-            word_data = get_word_definition(word)
+            term, corrected = find_term(word)
+
+            if corrected:
+                # Похожий термин - только подсказка: в словарь пользователя его не сохраняем
+                logger.info(f"Для слова '{word}' предлагаем похожий термин базы '{term}'")
+                try:
+                    await processing_msg.delete()
+                except Exception as e:
+                    logger.warning(f"Не удалось удалить сообщение 'бот думает': {e}")
+                await update.message.reply_text(
+                    f"🔎 Возможно, вы имели в виду «{term}»\n\n{format_word_response(LITERARY_TERMS[term])}",
+                    reply_markup=get_response_actions_keyboard(term)
+                )
+                return
 
+            word_data = LITERARY_TERMS[term] if term is not None else None
             if word_data:
                 logger.info(f"Слово '{word}' найдено в предварительной базе данных")
                 response = format_word_response(word_data)
@@ -69,6 +87,9 @@ async def explain_word(update: Update, context: ContextTypes.DEFAULT_TYPE, word:
         except Exception as e:
             logger.warning(f"Не удалось удалить сообщение 'бот думает': {e}")
 
+        # Сохраняем слово в личный словарь пользователя
+        await save_word(user_id, word, explanation)
+
         logger.info(f"Отправляем ответ пользователю {user_id} для слова '{word}'")
 
         await update.message.reply_text(
@@ -26,9 +26,19 @@ def get_quiz_keyboard(question: str, options: list, correct_index: int) -> Inlin
 
     return InlineKeyboardMarkup(keyboard)
 
-def get_dictionary_actions_keyboard() -> InlineKeyboardMarkup:
-    """Создает клавиатуру действий со словарем"""
-    keyboard = [
+def get_dictionary_actions_keyboard(prev_cursor: str = None, next_cursor: str = None) -> InlineKeyboardMarkup:
+    """Создает клавиатуру действий со словарем и кнопками соседних страниц"""
+    keyboard = []
+
+    navigation = []
+    if prev_cursor:
+        navigation.append(InlineKeyboardButton("⬅️ Новее", callback_data=f"dict_prev|{prev_cursor}"))
+    if next_cursor:
+        navigation.append(InlineKeyboardButton("Старше ➡️", callback_data=f"dict_next|{next_cursor}"))
+    if navigation:
+        keyboard.append(navigation)
+
+    keyboard += [
         [InlineKeyboardButton("📄 Экспорт в PDF", callback_data="dict_export_pdf")],
         [InlineKeyboardButton("📊 Экспорт в таблицу", callback_data="dict_export_csv")],
         [InlineKeyboardButton("🗑️ Очистить словарь", callback_data="dict_clear")]
@@ -0,0 +1,310 @@
+"""Словарь литературных терминов и фраз в файле SQLite только для чтения
+
+Исходные данные хранятся в JSON (data/literary_terms.json и
+data/literary_phrases.json) и собираются в один файл SQLite:
+
+    python lexicon.py
+
+Файл открывается при первом обращении, а не при импорте, и записи читаются
+по одной - импорт и память процесса не зависят от размера словаря. Если
+исходные JSON новее собранного файла (или файла ещё нет), он пересобирается
+автоматически. Начальные формы ключей (для поиска по любой форме слова)
+вычисляются при сборке.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Callable, Dict, Iterator, Optional, Tuple
+from config import LEXICON_PATH, LEXICON_SOURCE_DIR, LEXICON_CACHE_SIZE
+
+logger = logging.getLogger(__name__)
+
+TERMS_SOURCE = "literary_terms.json"
+PHRASES_SOURCE = "literary_phrases.json"
+
+# Версия схемы: при изменении файл пересобирается
+SCHEMA_VERSION = "1"
+
+
+def _source_signature(source_dir: str) -> str:
+    """Подпись исходных файлов (размер и время изменения) для проверки актуальности сборки"""
+    parts = []
+    for name in (TERMS_SOURCE, PHRASES_SOURCE):
+        stat = os.stat(os.path.join(source_dir, name))
+        parts.append(f"{name}:{stat.st_size}:{stat.st_mtime_ns}")
+    return ";".join(parts)
+
+
+def _lemmatizer_name() -> str:
+    """Каким лемматизатором посчитаны начальные формы (без pymorphy3 - только нижний регистр)"""
+    from morphology import lemmatizer
+    return "pymorphy3" if lemmatizer.available else "lower"
+
+
+def build_lexicon(path: str = LEXICON_PATH, source_dir: str = LEXICON_SOURCE_DIR,
+                  lemmatize_func: Optional[Callable[[str], str]] = None) -> Tuple[int, int]:
+    """
+    Собрать файл словаря из исходных JSON
+
+    Файл пишется во временный и подменяется атомарно: процессы, которые уже
+    читают старый файл, продолжают работать.
+
+    Args:
+        path (str): Куда записать файл SQLite
+        source_dir (str): Каталог с исходными JSON
+        lemmatize_func: Функция приведения к начальной форме; по умолчанию morphology.lemmatize
+
+    Returns:
+        Tuple[int, int]: Число терминов и число фраз
+    """
+    from phrase_matcher import normalize_phrase
+
+    lemmatizer_name = "custom"
+    if lemmatize_func is None:
+        from morphology import lemmatize as lemmatize_func
+        lemmatizer_name = _lemmatizer_name()
+
+    with open(os.path.join(source_dir, TERMS_SOURCE), encoding="utf-8") as f:
+        terms = json.load(f)
+    with open(os.path.join(source_dir, PHRASES_SOURCE), encoding="utf-8") as f:
+        phrases = json.load(f)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+
+    conn = sqlite3.connect(temp_path)
+    try:
+        conn.executescript('''
+            CREATE TABLE meta (name TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE terms (
+                id INTEGER PRIMARY KEY,
+                key TEXT NOT NULL UNIQUE,
+                lemma TEXT NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE TABLE phrases (
+                id INTEGER PRIMARY KEY,
+                key TEXT NOT NULL UNIQUE,
+                normalized TEXT NOT NULL,
+                lemma TEXT NOT NULL,
+                data TEXT NOT NULL
+            );
+        ''')
+        conn.executemany(
+            "INSERT INTO terms (key, lemma, data) VALUES (?, ?, ?)",
+            ((key.lower(), lemmatize_func(key), json.dumps(data, ensure_ascii=False))
+             for key, data in terms.items())
+        )
+        conn.executemany(
+            "INSERT INTO phrases (key, normalized, lemma, data) VALUES (?, ?, ?, ?)",
+            ((key, normalize_phrase(key), lemmatize_func(normalize_phrase(key)), json.dumps(data, ensure_ascii=False))
+             for key, data in phrases.items())
+        )
+        # Индексы после вставки строятся быстрее, чем поддерживаются при каждой вставке
+        conn.executescript('''
+            CREATE INDEX idx_terms_lemma ON terms (lemma);
+            CREATE INDEX idx_phrases_normalized ON phrases (normalized);
+        ''')
+        conn.executemany("INSERT INTO meta (name, value) VALUES (?, ?)", [
+            ("schema_version", SCHEMA_VERSION),
+            ("source_signature", _source_signature(source_dir)),
+            ("lemmatizer", lemmatizer_name),
+            ("built_at", str(int(time.time()))),
+        ])
+        conn.commit()
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+    os.replace(temp_path, path)
+    logger.info(f"Словарь собран: {len(terms)} терминов, {len(phrases)} фраз -> {path}")
+    return len(terms), len(phrases)
+
+
+class LexiconTable(Mapping):
+    """Таблица словаря как словарь Python: записи читаются из файла по мере обращения"""
+
+    def __init__(self, lexicon: "Lexicon", table: str, cache_size: int = LEXICON_CACHE_SIZE):
+        """
+        Args:
+            lexicon (Lexicon): Словарь, которому принадлежит таблица
+            table (str): Имя таблицы (terms или phrases)
+            cache_size (int): Сколько разобранных записей держать в памяти
+        """
+        self._lexicon = lexicon
+        self._table = table
+        self._size: Optional[int] = None
+        # Частые слова не разбираются из JSON при каждом запросе
+        self._load = lru_cache(maxsize=cache_size)(self._read)
+
+    def _read(self, key: str) -> Optional[dict]:
+        """Прочитать и разобрать одну запись"""
+        row = self._lexicon.fetchone(f"SELECT data FROM {self._table} WHERE key = ?", (key,))
+        return json.loads(row[0]) if row else None
+
+    def __getitem__(self, key: str) -> dict:
+        value = self._load(key) if isinstance(key, str) else None
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        for (key,) in self._lexicon.fetchall(f"SELECT key FROM {self._table} ORDER BY id"):
+            yield key
+
+    def __len__(self) -> int:
+        # Файл только для чтения - размер достаточно посчитать один раз
+        if self._size is None:
+            self._size = self._lexicon.fetchone(f"SELECT COUNT(*) FROM {self._table}")[0]
+        return self._size
+
+    def iter_items(self) -> Iterator[Tuple[str, dict]]:
+        """Все записи одним запросом (items() читает каждую запись отдельным запросом)"""
+        for key, data in self._lexicon.fetchall(f"SELECT key, data FROM {self._table} ORDER BY id"):
+            yield key, json.loads(data)
+
+    def clear_cache(self) -> None:
+        """Забыть прочитанные записи (после пересборки файла)"""
+        self._load.cache_clear()
+        self._size = None
+
+
+class Lexicon:
+    """Файл словаря: ленивое подключение, автоматическая пересборка и поиск по начальной форме"""
+
+    def __init__(self, path: str = LEXICON_PATH, source_dir: Optional[str] = LEXICON_SOURCE_DIR,
+                 cache_size: int = LEXICON_CACHE_SIZE):
+        """
+        Args:
+            path (str): Путь к собранному файлу SQLite
+            source_dir (Optional[str]): Каталог с исходными JSON; None - не проверять актуальность файла
+            cache_size (int): Сколько разобранных записей каждой таблицы держать в памяти
+        """
+        self.path = path
+        self.source_dir = source_dir
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+        self.terms = LexiconTable(self, "terms", cache_size)
+        self.phrases = LexiconTable(self, "phrases", cache_size)
+
+    def _is_stale(self) -> bool:
+        """Нужно ли пересобрать файл: его нет, исходники изменились или сменился лемматизатор"""
+        if not os.path.exists(self.path):
+            return True
+        if self.source_dir is None or not os.path.exists(os.path.join(self.source_dir, TERMS_SOURCE)):
+            # Исходников нет (например, в образ положили только собранный файл) - верим файлу
+            return False
+
+        try:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            try:
+                meta = dict(conn.execute("SELECT name, value FROM meta"))
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return True
+
+        return (meta.get("schema_version") != SCHEMA_VERSION
+                or meta.get("source_signature") != _source_signature(self.source_dir)
+                or meta.get("lemmatizer") not in ("custom", _lemmatizer_name()))
+
+    def _connect(self) -> sqlite3.Connection:
+        """Открыть файл при первом обращении (вызывается под блокировкой)"""
+        if self._conn is None:
+            if self._is_stale():
+                logger.info(f"Файл словаря {self.path} отсутствует или устарел, собираем из {self.source_dir}")
+                build_lexicon(self.path, self.source_dir)
+            # immutable: файл не меняется на месте (пересборка подменяет его целиком),
+            # поэтому SQLite не нужны блокировки и проверки изменений
+            self._conn = sqlite3.connect(f"file:{self.path}?mode=ro&immutable=1", uri=True,
+                                         check_same_thread=False)
+        return self._conn
+
+    def fetchone(self, sql: str, params: tuple = ()) -> Optional[tuple]:
+        """Выполнить запрос и вернуть первую строку"""
+        with self._lock:
+            return self._connect().execute(sql, params).fetchone()
+
+    def fetchall(self, sql: str, params: tuple = ()) -> list:
+        """Выполнить запрос и вернуть все строки"""
+        with self._lock:
+            return self._connect().execute(sql, params).fetchall()
+
+    def term_by_lemma(self, lemma: str) -> Optional[str]:
+        """
+        Найти термин по начальной форме
+
+        Args:
+            lemma (str): Начальная форма слова или фразы
+
+        Returns:
+            Optional[str]: Ключ термина или None
+        """
+        row = self.fetchone("SELECT key FROM terms WHERE lemma = ? ORDER BY id LIMIT 1", (lemma,))
+        return row[0] if row else None
+
+    def terms_containing(self, text: str, limit: int) -> list:
+        """
+        Найти термины, которые содержат текст или сами в нём содержатся
+
+        Args:
+            text (str): Текст в нижнем регистре
+            limit (int): Максимальное количество результатов
+
+        Returns:
+            list: Ключи терминов в порядке исходного файла
+        """
+        rows = self.fetchall(
+            "SELECT key FROM terms WHERE instr(key, ?) > 0 OR instr(?, key) > 0 ORDER BY id LIMIT ?",
+            (text, text, limit)
+        )
+        return [key for (key,) in rows]
+
+    def phrase_by_normalized(self, normalized: str) -> Optional[str]:
+        """
+        Найти фразу по нормализованному тексту
+
+        Args:
+            normalized (str): Текст после phrase_matcher.normalize_phrase
+
+        Returns:
+            Optional[str]: Ключ фразы или None
+        """
+        row = self.fetchone("SELECT key FROM phrases WHERE normalized = ? ORDER BY id LIMIT 1", (normalized,))
+        return row[0] if row else None
+
+    def phrase_lemmas(self) -> Dict[str, str]:
+        """Начальные формы всех фраз -> ключи фраз (для автомата поиска по начальным формам)"""
+        lemmas: Dict[str, str] = {}
+        for lemma, key in self.fetchall("SELECT lemma, key FROM phrases ORDER BY id"):
+            lemmas.setdefault(lemma, key)
+        return lemmas
+
+    def close(self) -> None:
+        """Закрыть файл и забыть прочитанные записи"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+        self.terms.clear_cache()
+        self.phrases.clear_cache()
+
+
+# Глобальный экземпляр словаря
+lexicon = Lexicon()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    terms_count, phrases_count = build_lexicon()
+    print(f"Собрано: {terms_count} терминов, {phrases_count} фраз -> {LEXICON_PATH}")
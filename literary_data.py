@@ -1,161 +1,66 @@
 """Предварительная база литературных терминов и объяснений"""
+from functools import lru_cache
+from typing import Optional, Tuple
+from fuzzy_index import FuzzyIndex
+from lexicon import lexicon
+from morphology import is_known_word, lemmatize
+from phrase_matcher import PhraseMatcher, normalize_phrase
+from term_pool import TermPool
+
+# База литературных терминов и фраз: файл SQLite, собранный из data/*.json.
+# Записи читаются при обращении - импорт не зависит от размера словаря
+LITERARY_TERMS = lexicon.terms
+LITERARY_PHRASES = lexicon.phrases
+
+# Исправление опечаток: одна правка и только в достаточно длинных словах -
+# иначе за опечатку принимаются настоящие слова ("барыня" - "барин")
+TYPO_MAX_DISTANCE = 1
+TYPO_MIN_LENGTH = 5
+
+@lru_cache(maxsize=None)
+def _phrase_matcher():
+    """Автомат для поиска фраз внутри текста (строится при первом обращении)"""
+    return PhraseMatcher(LITERARY_PHRASES.keys())
+
+@lru_cache(maxsize=None)
+def _term_index():
+    """Индекс для поиска терминов с опечатками (строится при первом обращении)"""
+    return FuzzyIndex(LITERARY_TERMS.keys())
+
+@lru_cache(maxsize=None)
+def _lemma_phrase_matcher():
+    """Автомат по фразам в начальной форме и отображение начальной формы на ключ базы"""
+    lemmas = lexicon.phrase_lemmas()
+    return PhraseMatcher(lemmas.keys()), lemmas
+
+def find_term(word: str) -> Tuple[Optional[str], bool]:
+    """
+    Найти термин предварительной базы для слова пользователя
+
+    Args:
+        word (str): Слово в любой форме, возможно с опечаткой
 
-# База литературных терминов для быстрого поиска
-LITERARY_TERMS = {
-    "помещик": {
-        "definition": "Владелец поместья и крепостных крестьян в Российской империи.",
-        "synonym": "дворянин, землевладелец",
-        "examples": ["Помещик управлял имением и крестьянами."],
-        "category": "социальный класс"
-    },
-
-    "буди": {
-        "definition": "Устар. 'Будь' - форма повелительного наклонения глагола 'быть'.",
-        "synonym": "будь",
-        "examples": ["Буди же ты спокоен и тверд."],
-        "category": "устаревшая грамматика"
-    },
-
-    "исправник": {
-        "definition": "Должность в Российской империи. Начальник уездной полиции, что-то вроде шерифа.",
-        "synonym": "начальник полиции",
-        "examples": ["Исправник был строгим, но справедливым."],
-        "category": "историческая должность"
-    },
-
-    "шапочный разбор": {
-        "definition": "Выражение, означающее конец, завершение события. В старину после церковной службы люди надевали шапки - это и был 'шапочный разбор'.",
-        "synonym": "в конце концов",
-        "examples": ["Случилось это к шапочному разбору."],
-        "category": "фразеологизм"
-    },
-
-    "старец": {
-        "definition": "В православной традиции - духовный наставник, человек, к которому приходили за советом. В литературе часто изображается как мудрый старый монах.",
-        "synonym": "духовный наставник",
-        "examples": ["Старец Зосима в 'Братьях Карамазовых' Достоевского."],
-        "category": "религиозный термин"
-    },
-
-    "капельмейстер": {
-        "definition": "Дирижер оркестра. От немецкого 'Kapellmeister' - руководитель капеллы (музыкального ансамбля).",
-        "synonym": "дирижер",
-        "examples": ["Капельмейстер поднял палочку."],
-        "category": "музыкальный термин"
-    },
-
-    "оброк": {
-        "definition": "Вид феодальной повинности. Крестьянин платил помещику денежный оброк вместо барщины.",
-        "synonym": "денежный налог",
-        "examples": ["Крестьяне платили помещику оброк."],
-        "category": "историческая экономика"
-    },
-
-    "барщина": {
-        "definition": "Форма феодальной эксплуатации. Крестьянин работал на помещика определенное количество дней в неделю.",
-        "synonym": "принудительный труд",
-        "examples": ["Крестьяне отрабатывали барщину в поместье."],
-        "category": "историческая экономика"
-    },
-
-    "дворяне": {
-        "definition": "Дворянское сословие. Привилегированный класс в Российской империи.",
-        "synonym": "помещики,贵族",
-        "examples": ["Дворяне владели поместьями и крепостными."],
-        "category": "социальный класс"
-    },
-
-    "крепостной": {
-        "definition": "Крестьянин, прикрепленный к земле помещика. Форма крепостного права в России.",
-        "synonym": "крепостной крестьянин",
-        "examples": ["Крепостные работали на барщине."],
-        "category": "социальный класс"
-    },
-
-    "губерния": {
-        "definition": "Административно-территориальная единица в Российской империи, подобная современной области.",
-        "synonym": "область",
-        "examples": ["Тверская губерния славилась своими поместьями."],
-        "category": "административный термин"
-    },
-
-    "уезд": {
-        "definition": "Административная единица внутри губернии в Российской империи.",
-        "synonym": "район",
-        "examples": ["Исправник управлял уездом."],
-        "category": "административный термин"
-    },
-
-    "имение": {
-        "definition": "Поместье, земельное владение дворянина с усадьбой и хозяйством.",
-        "synonym": "поместье, усадьба",
-        "examples": ["Дворянин управлял большим имением."],
-        "category": "недвижимость"
-    },
-
-    "усадьба": {
-        "definition": "Комплекс построек на территории поместья: господский дом, хозяйственные постройки, парк.",
-        "synonym": "поместье",
-        "examples": ["В усадьбе было большое имение с садом."],
-        "category": "недвижимость"
-    },
-
-    "крепостное право": {
-        "definition": "Система прикрепления крестьян к земле и их зависимости от помещиков в России.",
-        "synonym": "крепостничество",
-        "examples": ["Крепостное право было отменено в 1861 году."],
-        "category": "исторический институт"
-    },
-
-    "крестьянин": {
-        "definition": "Человек, занимающийся сельским хозяйством. В XIX веке часто крепостной.",
-        "synonym": "сельский житель",
-        "examples": ["Крестьяне работали в поле весь день."],
-        "category": "социальный класс"
-    },
-
-    "мужик": {
-        "definition": "В XIX веке - крестьянин, простой человек из народа.",
-        "synonym": "крестьянин, простой человек",
-        "examples": ["Мужик подошел к барину с просьбой."],
-        "category": "социальный класс"
-    },
-
-    "барин": {
-        "definition": "Господин, дворянин, помещик. В обращении к представителям высшего сословия.",
-        "synonym": "господин, помещик",
-        "examples": ["Барин вышел из усадьбы."],
-        "category": "социальный класс"
-    },
-
-    "реванш": {
-        "definition": "В политике и спорте - ответные действия для восстановления утраченных позиций или отыгрыша поражения.",
-        "synonym": "отплата, возмездие",
-        "examples": ["Страна готовилась к реваншу после поражения в войне."],
-        "category": "политический термин"
-    }
-}
-
-# Фразы и цитаты для объяснения
-LITERARY_PHRASES = {
-    "к шапочному разбору": {
-        "explanation": "Выражение означает 'к концу, под самый конец события'. В старину после церковной службы прихожане надевали шапки — это и был 'шапочный разбор'.",
-        "cultural_context": "Выражение из быта XIX века, отражает традицию русской православной церкви.",
-        "modern_paraphrase": "в конце концов, когда всё уже закончилось"
-    },
-
-    "выдать головой": {
-        "explanation": "Выдать человека властям, предать. В старину пленного могли обменять, но могли и 'выдать головой' — то есть предать.",
-        "cultural_context": "Относится к обычному праву славян и нормам гостеприимства.",
-        "modern_paraphrase": "предать кого-то"
-    },
-
-    "братья карамазовы": {
-        "explanation": "Роман Ф.М. Достоевского. История семьи Карамазовых — отца и четырех сыновей, отражающая философские, религиозные и социальные проблемы России XIX века.",
-        "cultural_context": "Один из величайших романов русской литературы, исследующий темы веры, атеизма, совести и преступления.",
-        "modern_paraphrase": "семейная сага о поисках истины и справедливости"
-    }
-}
+    Returns:
+        Tuple[Optional[str], bool]: Ключ термина (None если не найден) и True,
+            если термин найден только как исправление опечатки
+    """
+    if word.lower() in LITERARY_TERMS:
+        return word.lower(), False
+
+    # Слово в другой форме: "помещику", "шапочному разбору"
+    lemma = lemmatize(word)
+    key = lexicon.term_by_lemma(lemma)
+    if key is not None:
+        return key, False
+
+    # Слово с опечаткой: ближайший термин в одной правке. Словарное слово
+    # ("помещица", "крестьянка") - не опечатка, даже если похоже на термин
+    if len(lemma) < TYPO_MIN_LENGTH or is_known_word(word) or is_known_word(lemma):
+        return None, False
+    found = _term_index().search(lemma, limit=1, max_distance=TYPO_MAX_DISTANCE)
+    if not found:
+        return None, False
+    return found[0][0], True
 
 def get_word_definition(word: str):
     """
@@ -167,7 +72,8 @@ def get_word_definition(word: str):
     Returns:
         dict or None: Данные о слове или None если не найдено
     """
-    return LITERARY_TERMS.get(word.lower())
+    key, _ = find_term(word)
+    return LITERARY_TERMS[key] if key is not None else None
 
 def get_phrase_explanation(phrase: str):
     """
@@ -179,16 +85,24 @@ def get_phrase_explanation(phrase: str):
     Returns:
         dict or None: Данные о фразе или None если не найдено
     """
-    phrase_lower = phrase.lower().strip()
-
     # Точное совпадение
-    if phrase_lower in LITERARY_PHRASES:
-        return LITERARY_PHRASES[phrase_lower]
-
-    # Частичное совпадение в ключах
-    for key, value in LITERARY_PHRASES.items():
-        if key in phrase_lower:
-            return value
+    normalized = normalize_phrase(phrase)
+    key = lexicon.phrase_by_normalized(normalized)
+    if key is not None:
+        return LITERARY_PHRASES[key]
+
+    # Самая длинная известная фраза внутри текста - за один проход автомата
+    key = _phrase_matcher().longest_match(normalized)
+    if key is not None:
+        return LITERARY_PHRASES[key]
+
+    # Фраза в другой форме: сравниваем начальные формы слов
+    lemmas = lemmatize(normalized)
+    if lemmas != normalized:
+        matcher, keys = _lemma_phrase_matcher()
+        lemma_key = matcher.longest_match(lemmas)
+        if lemma_key is not None:
+            return LITERARY_PHRASES[keys[lemma_key]]
 
     return None
 
@@ -205,13 +119,12 @@ def search_similar_words(query: str, limit: int = 5):
         limit (int): Максимальное количество результатов
 
     Returns:
-        list: Список похожих слов
+        list: Список похожих слов: сначала содержащие запрос, затем близкие по написанию
     """
-    query_lower = query.lower()
-    results = []
+    results = lexicon.terms_containing(query.lower(), limit)
 
-    for word in LITERARY_TERMS.keys():
-        if query_lower in word or word in query_lower:
+    for word, _ in _term_index().search(query, limit=limit):
+        if word not in results:
             results.append(word)
 
     return results[:limit]
@@ -246,9 +159,19 @@ def get_literary_terms():
         list: Список терминов с определениями
     """
     terms = []
-    for term, data in LITERARY_TERMS.items():
+    for term, data in LITERARY_TERMS.iter_items():
         terms.append({
             'term': term,
             'definition': data['definition']
         })
     return terms
+
+@lru_cache(maxsize=None)
+def get_quiz_term_pool():
+    """
+    Получить набор терминов для викторины (строится один раз)
+
+    Returns:
+        TermPool: Термины с определениями
+    """
+    return TermPool((term['term'], term['definition']) for term in get_literary_terms())
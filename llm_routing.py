@@ -0,0 +1,296 @@
+"""Маршрутизация запросов к LLM по операциям
+
+У каждой операции бота свой маршрут: модель, бюджет токенов, таймаут и цепочка
+запасных моделей. Короткие объяснения слов и фраз обслуживает быстрая дешёвая
+модель (LLM_FAST_MODEL), пересказы, характеристики героев и вопросы викторины -
+более сильная (LLM_LARGE_MODEL). Если модель не ответила (выключатель разомкнут,
+таймаут, ошибка API), запрос уходит следующей модели цепочки.
+
+Маршруты меняются на ходу, без перезапуска; запросы, которые уже выполняются,
+доработают со старыми параметрами:
+
+    llm_service.routes.configure('retell_text', model='...', timeout=90)
+
+По каждому маршруту считаются запросы к API, ошибки, ответы запасных моделей,
+задержка (p50/p95), токены и стоимость.
+"""
+import json
+import logging
+from collections import Counter, deque
+from typing import Deque, Dict, Iterable, Mapping, Optional, Tuple, Union
+from config import LLM_FAST_MODEL, LLM_LARGE_MODEL, LLM_TIMEOUT, LLM_ROUTES, LLM_MODEL_PRICES
+
+logger = logging.getLogger(__name__)
+
+# Маршрут для запросов без операции (generate_explanation с произвольным промптом)
+DEFAULT_ROUTE = "default"
+QUIZ_ROUTE = "quiz_questions"
+
+ROUTE_FIELDS = ("model", "max_tokens", "timeout", "fallbacks", "temperature")
+
+# Цены OpenRouter, USD за 1M токенов: (входные, выходные). Используются, если API не вернул стоимость
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "google/gemini-2.0-flash-lite-001": (0.075, 0.30),
+    "google/gemini-2.0-flash-001": (0.10, 0.40),
+}
+
+# Сколько последних задержек маршрута хранить для p50/p95
+LATENCY_SAMPLES = 500
+
+
+class Route:
+    """Параметры вызова модели для одной операции (не меняется после создания)"""
+
+    __slots__ = ROUTE_FIELDS
+
+    def __init__(self, model: str, max_tokens: int = 500, timeout: float = LLM_TIMEOUT,
+                 fallbacks: Iterable[str] = (), temperature: float = 0.7):
+        """
+        Args:
+            model (str): Основная модель
+            max_tokens (int): Максимальное количество токенов ответа
+            timeout (float): Таймаут одной попытки запроса, секунд
+            fallbacks: Запасные модели по порядку
+            temperature (float): Температура генерации
+
+        Raises:
+            ValueError: Если параметры некорректны
+        """
+        if not model or not isinstance(model, str):
+            raise ValueError("Модель маршрута не задана")
+        if isinstance(fallbacks, str) or not all(isinstance(name, str) and name for name in fallbacks):
+            raise ValueError("fallbacks должен быть списком названий моделей")
+        if int(max_tokens) <= 0:
+            raise ValueError(f"max_tokens должен быть больше нуля: {max_tokens}")
+        if float(timeout) <= 0:
+            raise ValueError(f"timeout должен быть больше нуля: {timeout}")
+
+        self.model = model
+        self.max_tokens = int(max_tokens)
+        self.timeout = float(timeout)
+        # Основная модель и повторы в цепочке не нужны
+        self.fallbacks = tuple(dict.fromkeys(name for name in fallbacks if name != model))
+        self.temperature = float(temperature)
+
+    @property
+    def models(self) -> Tuple[str, ...]:
+        """Основная модель и запасные в порядке обращения"""
+        return (self.model,) + self.fallbacks
+
+    def replace(self, **changes) -> "Route":
+        """
+        Новый маршрут с изменёнными параметрами
+
+        Raises:
+            ValueError: Если передан неизвестный параметр или значение некорректно
+        """
+        unknown = set(changes) - set(ROUTE_FIELDS)
+        if unknown:
+            raise ValueError(f"Неизвестные параметры маршрута: {', '.join(sorted(unknown))}")
+        fields = {name: getattr(self, name) for name in ROUTE_FIELDS}
+        fields.update(changes)
+        return Route(**fields)
+
+    def to_dict(self) -> dict:
+        return {name: list(self.fallbacks) if name == "fallbacks" else getattr(self, name) for name in ROUTE_FIELDS}
+
+    def __repr__(self) -> str:
+        return f"Route({', '.join(f'{name}={getattr(self, name)!r}' for name in ROUTE_FIELDS)})"
+
+
+def default_routes() -> Dict[str, Route]:
+    """Маршруты по умолчанию из LLM_FAST_MODEL и LLM_LARGE_MODEL"""
+    return {
+        # Произвольный промпт: как до маршрутизации - одна модель, без запасных
+        DEFAULT_ROUTE: Route(LLM_FAST_MODEL, max_tokens=500, timeout=LLM_TIMEOUT),
+        "explain_word": Route(LLM_FAST_MODEL, max_tokens=300, timeout=15, fallbacks=[LLM_LARGE_MODEL]),
+        "explain_phrase": Route(LLM_FAST_MODEL, max_tokens=300, timeout=15, fallbacks=[LLM_LARGE_MODEL]),
+        "characterize_hero": Route(LLM_LARGE_MODEL, max_tokens=400, timeout=30, fallbacks=[LLM_FAST_MODEL]),
+        # Текст до 5000 символов: пересказ длиннее и дольше генерируется
+        "retell_text": Route(LLM_LARGE_MODEL, max_tokens=1200, timeout=60, fallbacks=[LLM_FAST_MODEL]),
+        QUIZ_ROUTE: Route(LLM_LARGE_MODEL, max_tokens=1500, timeout=45, fallbacks=[LLM_FAST_MODEL]),
+    }
+
+
+def parse_prices(raw: Union[str, Mapping, None]) -> Dict[str, Tuple[float, float]]:
+    """
+    Разобрать цены моделей из JSON вида {"модель": [вход, выход]}
+
+    Raises:
+        ValueError: Если JSON или цены некорректны
+    """
+    if not raw:
+        return {}
+    data = json.loads(raw) if isinstance(raw, str) else raw
+    if not isinstance(data, Mapping):
+        raise ValueError("Цены моделей должны быть объектом JSON")
+    prices = {}
+    for model, price in data.items():
+        prompt_price, completion_price = price
+        prices[model] = (float(prompt_price), float(completion_price))
+    return prices
+
+
+class RouteStats:
+    """Счётчики одного маршрута"""
+
+    def __init__(self, samples: int = LATENCY_SAMPLES):
+        self.requests = 0
+        self.failures = 0
+        # Ответила запасная модель
+        self.fallbacks = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+        self.answered_by: Counter = Counter()
+        self._latencies: Deque[float] = deque(maxlen=samples)
+
+    def record(self, latency: float, model: Optional[str], fallback: bool = False) -> None:
+        """Учесть запрос: model - модель, которая ответила, None если не ответила ни одна"""
+        self.requests += 1
+        self._latencies.append(latency)
+        if model is None:
+            self.failures += 1
+            return
+        self.answered_by[model] += 1
+        if fallback:
+            self.fallbacks += 1
+
+    def record_usage(self, prompt_tokens: int, completion_tokens: int, cost: float) -> None:
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.cost += cost
+
+    def stats(self) -> dict:
+        ordered = sorted(self._latencies)
+
+        def percentile(fraction: float) -> Optional[float]:
+            if not ordered:
+                return None
+            return round(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000, 1)
+
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "fallbacks": self.fallbacks,
+            "answered_by": dict(self.answered_by),
+            "latency_p50_ms": percentile(0.5),
+            "latency_p95_ms": percentile(0.95),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cost_usd": round(self.cost, 6),
+        }
+
+
+class RoutingTable:
+    """Маршруты операций и их счётчики"""
+
+    def __init__(self, routes: Optional[Mapping[str, Route]] = None,
+                 prices: Optional[Mapping[str, Tuple[float, float]]] = None):
+        """
+        Args:
+            routes: Маршруты по операциям (по умолчанию default_routes())
+            prices: Цены моделей, USD за 1M токенов (по умолчанию MODEL_PRICES)
+
+        Raises:
+            ValueError: Если нет маршрута DEFAULT_ROUTE
+        """
+        self._routes: Dict[str, Route] = dict(default_routes() if routes is None else routes)
+        if DEFAULT_ROUTE not in self._routes:
+            raise ValueError(f"Нужен маршрут '{DEFAULT_ROUTE}'")
+        self.prices: Dict[str, Tuple[float, float]] = dict(MODEL_PRICES if prices is None else prices)
+        self._stats: Dict[str, RouteStats] = {}
+
+    @classmethod
+    def from_config(cls) -> "RoutingTable":
+        """Маршруты по умолчанию с изменениями из LLM_ROUTES и ценами из LLM_MODEL_PRICES"""
+        table = cls()
+        # Ошибка в переменной окружения не должна отключать LLM: работаем с настройками по умолчанию
+        try:
+            table.prices.update(parse_prices(LLM_MODEL_PRICES))
+        except (TypeError, ValueError) as e:
+            logger.error(f"Некорректный LLM_MODEL_PRICES, используем цены по умолчанию: {e}")
+        try:
+            table.load(LLM_ROUTES)
+        except (TypeError, ValueError) as e:
+            logger.error(f"Некорректный LLM_ROUTES, используем маршруты по умолчанию: {e}")
+        return table
+
+    def get(self, operation: str) -> Route:
+        """Маршрут операции; для неизвестной операции - маршрут по умолчанию"""
+        return self._routes.get(operation) or self._routes[DEFAULT_ROUTE]
+
+    def configure(self, operation: str, **changes) -> Route:
+        """
+        Изменить маршрут операции (или создать его на основе маршрута по умолчанию)
+
+        Args:
+            operation (str): Операция
+            **changes: model, max_tokens, timeout, fallbacks, temperature
+
+        Returns:
+            Route: Новый маршрут
+
+        Raises:
+            ValueError: Если параметры некорректны (маршрут при этом не меняется)
+        """
+        route = self.get(operation).replace(**changes)
+        self._routes[operation] = route
+        logger.info(f"Маршрут LLM '{operation}': {', '.join(route.models)}, "
+                    f"до {route.max_tokens} токенов, таймаут {route.timeout:.0f} с")
+        return route
+
+    def load(self, overrides: Union[str, Mapping, None]) -> None:
+        """
+        Применить изменения нескольких маршрутов: {"операция": {"параметр": значение}}
+
+        Изменения проверяются целиком до применения: при ошибке не меняется ни один маршрут.
+
+        Raises:
+            ValueError: Если JSON или параметры некорректны
+        """
+        if not overrides:
+            return
+        data = json.loads(overrides) if isinstance(overrides, str) else overrides
+        if not isinstance(data, Mapping) or not all(isinstance(changes, Mapping) for changes in data.values()):
+            raise ValueError("Маршруты должны быть объектом JSON вида {\"операция\": {\"параметр\": значение}}")
+        for operation, changes in data.items():
+            self.get(operation).replace(**changes)
+        for operation, changes in data.items():
+            self.configure(operation, **changes)
+
+    def cost(self, model: str, usage: Mapping) -> float:
+        """Стоимость запроса: из ответа API, если он её вернул, иначе по таблице цен"""
+        if usage.get("cost") is not None:
+            return float(usage["cost"])
+        prompt_price, completion_price = self.prices.get(model, (0.0, 0.0))
+        return (usage.get("prompt_tokens", 0) * prompt_price
+                + usage.get("completion_tokens", 0) * completion_price) / 1_000_000
+
+    def _stats_for(self, operation: str) -> RouteStats:
+        stats = self._stats.get(operation)
+        if stats is None:
+            stats = self._stats[operation] = RouteStats()
+        return stats
+
+    def record(self, operation: str, latency: float, model: Optional[str], fallback: bool = False) -> None:
+        """Учесть запрос операции к API (с учётом запасных моделей)"""
+        self._stats_for(operation).record(latency, model, fallback)
+
+    def record_usage(self, operation: str, model: str, usage: Mapping) -> None:
+        """Учесть токены и стоимость одного ответа модели"""
+        try:
+            self._stats_for(operation).record_usage(
+                int(usage.get("prompt_tokens") or 0), int(usage.get("completion_tokens") or 0),
+                self.cost(model, usage)
+            )
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Не удалось учесть использование токенов: {e}")
+
+    def stats(self) -> Dict[str, dict]:
+        """Маршруты и их счётчики для проверки здоровья и логов"""
+        operations = list(self._routes) + [operation for operation in self._stats if operation not in self._routes]
+        return {
+            operation: {**self.get(operation).to_dict(), **self._stats_for(operation).stats()}
+            for operation in operations
+        }
@@ -1,21 +1,121 @@
 """Интеграция с DeepSeek через Open Router API для генерации объяснений"""
+import asyncio
+import json
 import logging
-import requests
-from typing import Optional, Dict, Any
-from config import OPENROUTER_API_KEY
+import time
+import httpx
+from typing import Optional, Dict, Any, Awaitable, Callable, AsyncIterator, List, Tuple
+from config import (
+    OPENROUTER_API_KEY, LLM_POOL_SIZE, LLM_POOL_KEEPALIVE,
+    LLM_POOL_IDLE_TIMEOUT, LLM_HTTP2, LLM_CACHE_ENABLED, LLM_TIMEOUT, LLM_CONNECT_TIMEOUT
+)
+from explanation_cache import ExplanationCache
+from llm_routing import DEFAULT_ROUTE, QUIZ_ROUTE, Route, RoutingTable
+from resilience import CircuitBreakers, RetryPolicy, parse_retry_after
 
 logger = logging.getLogger(__name__)
 
+# Версия промптов: увеличить при изменении текста промптов, чтобы не отдавать из кэша старые ответы
+PROMPT_VERSION = 1
+
+try:
+    import h2  # noqa: F401 - нужен httpx для HTTP/2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+class IncompleteStreamError(Exception):
+    """Поток ответа оборвался после первых фрагментов: текст неполный"""
+
+# Метка конца потока в очередях подписчиков
+_STREAM_END = object()
+
+class _SharedStream:
+    """
+    Один поток ответа модели на всех одновременных читателей с тем же ключом
+
+    Поток читает отдельная задача: если первый пользователь ушёл, остальные
+    дочитают ответ, а полный ответ всё равно попадёт в кэш. Подписчик,
+    пришедший позже, сначала получает уже пришедшие фрагменты.
+    """
+
+    def __init__(self, source: AsyncIterator[str]):
+        """
+        Args:
+            source: Генератор фрагментов ответа модели
+        """
+        self.chunks: List[str] = []
+        self._queues: List[asyncio.Queue] = []
+        self._error: Optional[BaseException] = None
+        self._done = False
+        self.task = asyncio.ensure_future(self._pump(source))
+
+    async def _pump(self, source: AsyncIterator[str]) -> None:
+        """Читать поток модели и раздавать фрагменты подписчикам"""
+        try:
+            async for chunk in source:
+                self.chunks.append(chunk)
+                for queue in self._queues:
+                    queue.put_nowait(chunk)
+        except asyncio.CancelledError:
+            self._error = IncompleteStreamError("Поток отменён")
+            raise
+        except Exception as e:
+            self._error = e
+        finally:
+            self._done = True
+            for queue in self._queues:
+                queue.put_nowait(_STREAM_END)
+
+    async def subscribe(self) -> AsyncIterator[str]:
+        """
+        Читать поток с начала
+
+        Yields:
+            str: Очередной фрагмент ответа
+
+        Raises:
+            IncompleteStreamError: Если поток оборвался (та же ошибка у всех подписчиков)
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        for chunk in self.chunks:
+            queue.put_nowait(chunk)
+        if self._done:
+            queue.put_nowait(_STREAM_END)
+        else:
+            self._queues.append(queue)
+        try:
+            while True:
+                chunk = await queue.get()
+                if chunk is _STREAM_END:
+                    if self._error is not None:
+                        raise self._error
+                    return
+                yield chunk
+        finally:
+            if queue in self._queues:
+                self._queues.remove(queue)
+
 class LLMService:
     """Класс для работы с DeepSeek через Open Router API"""
 
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, pool_size: int = LLM_POOL_SIZE,
+                 keepalive: int = LLM_POOL_KEEPALIVE,
+                 idle_timeout: float = LLM_POOL_IDLE_TIMEOUT,
+                 http2: bool = LLM_HTTP2,
+                 base_url: str = "https://openrouter.ai/api/v1",
+                 cache: Optional[ExplanationCache] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 breakers: Optional[CircuitBreakers] = None,
+                 routes: Optional[RoutingTable] = None):
         if not api_key:
             raise ValueError("OPENROUTER_API_KEY не установлен")
 
         self.api_key = api_key
-        self.base_url = "https://openrouter.ai/api/v1"
-        self.model = "google/gemini-2.0-flash-lite-001"
+        self.base_url = base_url
+        self.cache = cache
+        # Модель, бюджет токенов, таймаут и запасные модели для каждой операции
+        self.routes = routes or RoutingTable.from_config()
         self.headers = {
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json",
@@ -23,60 +123,363 @@ class LLMService:
             "X-Title": "Literary Assistant Bot"
         }
 
-        logger.info(f"LLM API инициализирован с моделью: {self.model}")
+        # Запросы, которые сейчас выполняются: ключ -> общая задача (single-flight)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # Потоковые ответы, которые сейчас читаются: ключ -> общий поток
+        self._inflight_streams: Dict[str, _SharedStream] = {}
+        self.coalesced_requests = 0
+
+        # Повторы после временных ошибок и выключатели по моделям
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.breakers = breakers or CircuitBreakers()
+
+        if http2 and not HTTP2_AVAILABLE:
+            logger.warning("Пакет h2 не установлен, используем HTTP/1.1 (pip install httpx[http2])")
+            http2 = False
+        self.http2 = http2
+
+        # Общий асинхронный HTTP клиент: соединения переиспользуются (keep-alive)
+        # между запросами всех пользователей и не блокируют event loop
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=self.headers,
+            # Недоступный сервер обнаруживается за LLM_CONNECT_TIMEOUT, а не за полный таймаут
+            timeout=httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=keepalive,
+                keepalive_expiry=idle_timeout
+            )
+        )
+
+        logger.info(
+            f"LLM API инициализирован с моделью: {self.model} "
+            f"(пул: {pool_size} соединений, HTTP/2: {'да' if http2 else 'нет'})"
+        )
+
+    @property
+    def model(self) -> str:
+        """Модель маршрута по умолчанию"""
+        return self.routes.get(DEFAULT_ROUTE).model
+
+    @staticmethod
+    def _timeout(timeout: Optional[float]) -> Any:
+        """Таймаут одного запроса; None - таймаут клиента"""
+        if timeout is None:
+            return httpx.USE_CLIENT_DEFAULT
+        return httpx.Timeout(timeout, connect=min(timeout, LLM_CONNECT_TIMEOUT))
+
+    async def warmup(self) -> bool:
+        """
+        Прогреть пул: заранее открыть TCP+TLS соединение с OpenRouter,
+        чтобы первый пользовательский запрос не платил за рукопожатие
 
-    def _make_request(self, messages: list, max_tokens: int = 500, temperature: float = 0.7) -> Optional[str]:
+        Returns:
+            bool: True если соединение установлено
+        """
+        try:
+            # Статус ответа не важен - нужно только открыть соединение
+            await self.client.request("HEAD", "/models")
+            logger.info("Соединение с OpenRouter прогрето")
+            return True
+        except httpx.HTTPError as e:
+            logger.warning(f"Не удалось прогреть соединение с OpenRouter: {e}")
+            return False
+
+    async def close(self) -> None:
+        """Закрыть HTTP клиент и освободить соединения"""
+        await self.client.aclose()
+
+    async def _make_request(self, messages: list, max_tokens: int = 500, temperature: float = 0.7,
+                            model: Optional[str] = None, timeout: Optional[float] = None,
+                            operation: Optional[str] = None) -> Optional[str]:
         """
         Выполнить запрос к Open Router API
 
+        429, 5xx и сетевые ошибки повторяются с экспоненциальной задержкой. Если выключатель
+        модели разомкнут, запрос не отправляется - обработчик сразу переходит к базе терминов.
+
         Args:
             messages: Список сообщений в формате OpenAI
             max_tokens: Максимальное количество токенов
             temperature: Температура генерации
+            model: Модель (по умолчанию - модель маршрута по умолчанию)
+            timeout: Таймаут одной попытки, секунд (по умолчанию LLM_TIMEOUT)
+            operation: Операция, на счётчики которой записать токены и стоимость
 
         Returns:
             Optional[str]: Ответ модели или None при ошибке
         """
+        model = model or self.model
         payload = {
-            "model": self.model,
+            "model": model,
             "messages": messages,
             "max_tokens": max_tokens,
             "temperature": temperature,
+            # OpenRouter вернёт в usage стоимость запроса
+            "usage": {"include": True},
         }
+        breaker = self.breakers.get(model)
 
-        try:
-            response = requests.post(
-                f"{self.base_url}/chat/completions",
-                headers=self.headers,
-                json=payload,
-                timeout=30
-            )
+        for attempt in range(self.retry_policy.attempts):
+            if not breaker.allow():
+                logger.info(f"Модель {model} временно отключена после серии ошибок, запрос не отправлен")
+                return None
 
-            if response.status_code == 200:
-                data = response.json()
-                if data.get('choices') and len(data['choices']) > 0:
-                    return data['choices'][0]['message']['content'].strip()
-                else:
+            retry_after = None
+            try:
+                response = await self.client.post("/chat/completions", json=payload, timeout=self._timeout(timeout))
+            except asyncio.CancelledError:
+                # Пользователь ушёл или бот останавливается - о модели это ничего не говорит
+                breaker.record_cancelled()
+                raise
+            except httpx.HTTPError as e:
+                breaker.record_failure()
+                logger.error(f"Ошибка сети при вызове API: {e}")
+            except Exception as e:
+                breaker.record_failure()
+                logger.error(f"Неожиданная ошибка при вызове API: {e}")
+                return None
+            else:
+                if response.status_code == 200:
+                    breaker.record_success()
+                    try:
+                        data = response.json()
+                        if operation and isinstance(data.get('usage'), dict):
+                            self.routes.record_usage(operation, model, data['usage'])
+                        if data.get('choices') and len(data['choices']) > 0:
+                            return data['choices'][0]['message']['content'].strip()
+                    except Exception as e:
+                        logger.error(f"Не удалось разобрать ответ API: {e}")
+                        return None
                     logger.warning("API вернул пустой ответ")
                     return None
-            else:
+
                 logger.error(f"API ошибка: {response.status_code} - {response.text}")
+                if not self.retry_policy.is_retryable(response.status_code):
+                    # Сервер отвечает, ошибка в самом запросе - повтор не поможет
+                    breaker.record_success()
+                    return None
+                breaker.record_failure()
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+
+            delay = self.retry_policy.backoff(attempt, retry_after)
+            if delay is None:
                 return None
+            logger.info(f"Повтор запроса к API через {delay:.2f} с (попытка {attempt + 2})")
+            await asyncio.sleep(delay)
 
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Ошибка сети при вызове API: {e}")
-            return None
-        except Exception as e:
-            logger.error(f"Неожиданная ошибка при вызове API: {e}")
-            return None
+        return None
 
-    def generate_explanation(self, prompt: str, max_tokens: int = 500) -> Optional[str]:
+    async def _stream_request(self, messages: list, max_tokens: int = 500,
+                              temperature: float = 0.7, model: Optional[str] = None,
+                              timeout: Optional[float] = None,
+                              operation: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Выполнить потоковый запрос к Open Router API (SSE)
+
+        Ответ считается полным только после [DONE] или фрагмента с finish_reason.
+
+        Args:
+            messages: Список сообщений в формате OpenAI
+            max_tokens: Максимальное количество токенов
+            temperature: Температура генерации
+            model: Модель (по умолчанию - модель маршрута по умолчанию)
+            timeout: Таймаут одной попытки, секунд (по умолчанию LLM_TIMEOUT)
+            operation: Операция, на счётчики которой записать токены и стоимость
+
+        Yields:
+            str: Очередной фрагмент ответа модели
+
+        Raises:
+            IncompleteStreamError: Если поток оборвался после первых фрагментов
+        """
+        model = model or self.model
+        payload = {
+            "model": model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stream": True,
+            "usage": {"include": True},
+        }
+
+        breaker = self.breakers.get(model)
+
+        for attempt in range(self.retry_policy.attempts):
+            if not breaker.allow():
+                logger.info(f"Модель {model} временно отключена после серии ошибок, поток не запрошен")
+                return
+
+            retry_after = None
+            received = False
+            finished = False
+            try:
+                async with self.client.stream("POST", "/chat/completions", json=payload,
+                                              timeout=self._timeout(timeout)) as response:
+                    if response.status_code != 200:
+                        body = await response.aread()
+                        logger.error(f"API ошибка (stream): {response.status_code} - {body.decode('utf-8', 'replace')}")
+                        if not self.retry_policy.is_retryable(response.status_code):
+                            breaker.record_success()
+                            return
+                        breaker.record_failure()
+                        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    else:
+                        async for line in response.aiter_lines():
+                            # Строки-комментарии (": OPENROUTER PROCESSING") и пустые строки пропускаем
+                            if not line.startswith("data:"):
+                                continue
+                            data = line[5:].strip()
+                            if data == "[DONE]":
+                                finished = True
+                                break
+
+                            try:
+                                chunk = json.loads(data)
+                            except ValueError:
+                                logger.warning(f"Не удалось разобрать фрагмент потока: {data[:100]}")
+                                continue
+
+                            # Последний фрагмент потока содержит usage с токенами и стоимостью
+                            if operation and isinstance(chunk.get('usage'), dict):
+                                self.routes.record_usage(operation, model, chunk['usage'])
+
+                            choices = chunk.get('choices') or []
+                            if choices:
+                                if choices[0].get('finish_reason'):
+                                    # После него может прийти только фрагмент с usage
+                                    finished = True
+                                content = (choices[0].get('delta') or {}).get('content')
+                                if content:
+                                    if not received:
+                                        # Модель отвечает; фиксируем сразу - потребитель может не дочитать поток
+                                        received = True
+                                        breaker.record_success()
+                                    yield content
+                        if not received:
+                            breaker.record_success()
+                        elif not finished:
+                            logger.error("Поток ответа API закрыт до конца ответа")
+                            raise IncompleteStreamError("Поток закрыт до [DONE]")
+                        return
+
+            except asyncio.CancelledError:
+                if not received:
+                    breaker.record_cancelled()
+                raise
+            except httpx.HTTPError as e:
+                if finished:
+                    # Ответ уже пришёл целиком, оборвалось только завершение потока
+                    return
+                breaker.record_failure()
+                logger.error(f"Ошибка сети при потоковом вызове API: {e}")
+                if received:
+                    # Часть ответа уже показана пользователю - повтор начал бы текст заново
+                    raise IncompleteStreamError(str(e)) from e
+
+            delay = self.retry_policy.backoff(attempt, retry_after)
+            if delay is None:
+                return
+            logger.info(f"Повтор потокового запроса к API через {delay:.2f} с (попытка {attempt + 2})")
+            await asyncio.sleep(delay)
+
+    async def _stream_generate(self, operation: str, cache_input: str, prompt: str,
+                               max_tokens: Optional[int] = None) -> AsyncIterator[str]:
+        """
+        Сгенерировать ответ потоком: из кэша отдаётся сразу целиком,
+        полный ответ модели после окончания потока сохраняется в кэш
+
+        Одинаковые одновременные запросы читают один поток модели: второй и
+        следующие подписываются на уже идущий ответ, а не запрашивают свой.
+
+        Запасная модель маршрута запрашивается, только если предыдущая не прислала
+        ни одного фрагмента - начатый ответ не показывается пользователю заново.
+        Оборванный ответ (IncompleteStreamError) в кэш не попадает.
+
+        Args:
+            operation (str): Название операции (маршрут и часть ключа кэша)
+            cache_input (str): Пользовательский ввод, по которому ищем в кэше
+            prompt (str): Промпт для генерации при промахе
+            max_tokens (Optional[int]): Максимальное количество токенов (по умолчанию - из маршрута)
+
+        Yields:
+            str: Очередной фрагмент ответа
+
+        Raises:
+            IncompleteStreamError: Если поток оборвался после первых фрагментов
+        """
+        route = self.routes.get(operation)
+        key = ExplanationCache.make_key(operation, cache_input, route.model, PROMPT_VERSION)
+
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                logger.info(f"Ответ для '{operation}' взят из кэша")
+                yield cached
+                return
+
+        shared = self._inflight_streams.get(key)
+        # Законченный поток ещё может лежать в словаре до колбэка: оборванный ответ
+        # не должен достаться новому запросу, поэтому такой поток не переиспользуем
+        if shared is not None and not shared.task.done():
+            self.coalesced_requests += 1
+            logger.info(f"Поток присоединён к уже выполняющемуся ({key[:24]}...)")
+        else:
+            shared = self._inflight_streams[key] = _SharedStream(
+                self._stream_and_store(key, route, operation, prompt, max_tokens)
+            )
+            shared.task.add_done_callback(lambda _, shared=shared: self._forget_stream(key, shared))
+
+        async for chunk in shared.subscribe():
+            yield chunk
+
+    def _forget_stream(self, key: str, shared: _SharedStream) -> None:
+        """Убрать законченный поток из выполняющихся (если его ещё не заменил новый)"""
+        if self._inflight_streams.get(key) is shared:
+            del self._inflight_streams[key]
+
+    async def _stream_and_store(self, key: str, route: Route, operation: str, prompt: str,
+                                max_tokens: Optional[int]) -> AsyncIterator[str]:
+        """Прочитать поток по маршруту (с запасными моделями) и сохранить полный ответ в кэш"""
+        parts = []
+        answered_by = None
+        start = time.perf_counter()
+        try:
+            for index, model in enumerate(route.models):
+                if index:
+                    logger.warning(f"Маршрут '{operation}': {route.models[index - 1]} не ответил, пробуем {model}")
+                async for chunk in self._stream_request(
+                    [{"role": "user", "content": prompt}], max_tokens or route.max_tokens, route.temperature,
+                    model=model, timeout=route.timeout, operation=operation
+                ):
+                    if answered_by is None:
+                        answered_by = index
+                    parts.append(chunk)
+                    yield chunk
+                if parts:
+                    break
+        finally:
+            # Счётчики обновляются и тогда, когда потребитель не дочитал поток
+            self.routes.record(operation, time.perf_counter() - start,
+                               None if answered_by is None else route.models[answered_by],
+                               fallback=bool(answered_by))
+
+        result = "".join(parts).strip()
+        # Ключ построен по основной модели: ответ запасной под ним не сохраняем
+        if result and answered_by == 0 and self.cache is not None:
+            self.cache.set(key, result)
+
+    async def generate_explanation(self, prompt: str, max_tokens: Optional[int] = None,
+                                   operation: str = DEFAULT_ROUTE) -> Optional[str]:
         """
         Сгенерировать объяснение с помощью DeepSeek
 
         Args:
             prompt (str): Запрос для генерации
-            max_tokens (int): Максимальное количество токенов
+            max_tokens (Optional[int]): Максимальное количество токенов (по умолчанию - из маршрута)
+            operation (str): Операция, по маршруту которой выбираются модель, таймаут и запасные модели
 
         Returns:
             Optional[str]: Сгенерированное объяснение или None при ошибке
@@ -88,15 +491,110 @@ class LLMService:
             }
         ]
 
-        return self._make_request(messages, max_tokens)
+        result, _ = await self._routed_request(operation, messages, max_tokens)
+        return result
+
+    async def _routed_request(self, operation: str, messages: list,
+                              max_tokens: Optional[int] = None) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Выполнить запрос по маршруту операции: основная модель, затем запасные по порядку
+
+        Args:
+            operation (str): Операция
+            messages: Список сообщений в формате OpenAI
+            max_tokens (Optional[int]): Максимальное количество токенов (по умолчанию - из маршрута)
+
+        Returns:
+            Tuple[Optional[str], Optional[str]]: (ответ первой ответившей модели, эта модель) или (None, None)
+        """
+        # Снимок маршрута: изменение во время запроса на него не влияет
+        route = self.routes.get(operation)
+        start = time.perf_counter()
+        for index, model in enumerate(route.models):
+            if index:
+                logger.warning(f"Маршрут '{operation}': {route.models[index - 1]} не ответил, пробуем {model}")
+            result = await self._make_request(messages, max_tokens or route.max_tokens, route.temperature,
+                                              model=model, timeout=route.timeout, operation=operation)
+            if result:
+                self.routes.record(operation, time.perf_counter() - start, model, fallback=index > 0)
+                return result, model
+
+        self.routes.record(operation, time.perf_counter() - start, None)
+        return None, None
+
+    async def _cached_generate(self, operation: str, cache_input: str, prompt: str,
+                               max_tokens: Optional[int] = None) -> Optional[str]:
+        """
+        Сгенерировать ответ через кэш: повторные запросы не расходуют токены API,
+        а одинаковые одновременные запросы объединяются в один вызов API
+
+        Args:
+            operation (str): Название операции (маршрут и часть ключа кэша)
+            cache_input (str): Пользовательский ввод, по которому ищем в кэше
+            prompt (str): Промпт для генерации при промахе
+            max_tokens (Optional[int]): Максимальное количество токенов (по умолчанию - из маршрута)
 
-    def explain_word(self, word: str, context: str = "") -> Optional[str]:
+        Returns:
+            Optional[str]: Ответ из кэша или от модели
+        """
+        # Смена модели маршрута не отдаёт из кэша ответы прежней модели
+        model = self.routes.get(operation).model
+        key = ExplanationCache.make_key(operation, cache_input, model, PROMPT_VERSION)
+
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                logger.info(f"Ответ для '{operation}' взят из кэша")
+                return cached
+
+        return await self._single_flight(
+            key, lambda: self._generate_and_store(key, model, operation, prompt, max_tokens)
+        )
+
+    async def _generate_and_store(self, key: str, model: str, operation: str, prompt: str,
+                                  max_tokens: Optional[int]) -> Optional[str]:
+        """Сгенерировать ответ и сохранить его в кэш, если ответила модель из ключа"""
+        result, answered_by = await self._routed_request(
+            operation, [{"role": "user", "content": prompt}], max_tokens
+        )
+        # Ответ запасной модели под ключом основной отдавался бы и после её восстановления
+        if result and answered_by == model and self.cache is not None:
+            self.cache.set(key, result)
+        return result
+
+    async def _single_flight(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Выполнить запрос один раз для всех одновременных вызовов с тем же ключом
+
+        Первый вызов запускает задачу, остальные ждут её же результата (или ту же ошибку).
+        Задача защищена от отмены: если первый пользователь ушёл, остальные всё равно получат ответ.
+
+        Args:
+            key (str): Ключ запроса
+            factory: Функция, создающая корутину запроса
+
+        Returns:
+            Any: Результат общей задачи
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced_requests += 1
+            logger.info(f"Запрос присоединён к уже выполняющемуся ({key[:24]}...)")
+        else:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        return await asyncio.shield(task)
+
+    async def explain_word(self, word: str, context: str = "", lemma: Optional[str] = None) -> Optional[str]:
         """
         Объяснить литературное слово
 
         Args:
-            word (str): Слово для объяснения
+            word (str): Слово для объяснения (в промпт попадает именно оно)
             context (str): Дополнительный контекст из литературы
+            lemma (Optional[str]): Начальная форма слова для ключа кэша
 
         Returns:
             Optional[str]: Объяснение слова
@@ -115,18 +613,10 @@ class LLMService:
         if context:
             prompt += f"\n\nКонтекст: {context}"
 
-        return self.generate_explanation(prompt, max_tokens=300)
-
-    def explain_phrase(self, phrase: str) -> Optional[str]:
-        """
-        Объяснить литературную фразу или цитату
+        return await self._cached_generate('explain_word', f"{lemma or word}\n{context}", prompt)
 
-        Args:
-            phrase (str): Фраза для объяснения
-
-        Returns:
-            Optional[str]: Объяснение фразы
-        """
+    def _phrase_prompt(self, phrase: str) -> str:
+        """Промпт для объяснения фразы"""
         prompt = f'''
         Объясни значение литературной фразы или выражения "{phrase}" простым языком.
         Будь краток: 2-3 предложения максимум.
@@ -140,20 +630,22 @@ class LLMService:
 
         Не используй Markdown, звездочки или другие специальные символы. Пиши обычным текстом.
         '''
+        return prompt
 
-        return self.generate_explanation(prompt, max_tokens=300)
-
-    def retell_text(self, text: str, target_audience: str = "современный читатель") -> Optional[str]:
+    async def explain_phrase(self, phrase: str) -> Optional[str]:
         """
-        Пересказать текст современным языком
+        Объяснить литературную фразу или цитату
 
         Args:
-            text (str): Исходный текст
-            target_audience (str): Целевая аудитория
+            phrase (str): Фраза для объяснения
 
         Returns:
-            Optional[str]: Пересказ текста
+            Optional[str]: Объяснение фразы
         """
+        return await self._cached_generate('explain_phrase', phrase, self._phrase_prompt(phrase))
+
+    def _retell_prompt(self, text: str, target_audience: str) -> str:
+        """Промпт для пересказа текста"""
         prompt = f"""
         Перескажи этот текст простым современным языком для {target_audience}.
 
@@ -169,10 +661,24 @@ class LLMService:
 
         Современный пересказ:
         """
+        return prompt
+
+    async def retell_text(self, text: str, target_audience: str = "современный читатель") -> Optional[str]:
+        """
+        Пересказать текст современным языком
 
-        return self.generate_explanation(prompt)
+        Args:
+            text (str): Исходный текст
+            target_audience (str): Целевая аудитория
+
+        Returns:
+            Optional[str]: Пересказ текста
+        """
+        return await self._cached_generate(
+            'retell_text', f"{target_audience}\n{text}", self._retell_prompt(text, target_audience)
+        )
 
-    def generate_quiz_questions(self, topic: str, count: int = 3) -> Optional[list]:
+    async def generate_quiz_questions(self, topic: str, count: int = 3) -> Optional[list]:
         """
         Сгенерировать вопросы для викторины
 
@@ -202,7 +708,7 @@ class LLMService:
 
         '''
 
-        response = self.generate_explanation(prompt, max_tokens=1000)
+        response = await self.generate_explanation(prompt, operation=QUIZ_ROUTE)
 
         if response:
             return self._parse_quiz_questions(response)
@@ -257,16 +763,8 @@ class LLMService:
 
         return questions
 
-    def characterize_hero(self, character_info: str) -> Optional[str]:
-        """
-        Даёт характеристику героя по имени/фамилии/произведению
-
-        Args:
-            character_info (str): Информация о герое
-
-        Returns:
-            Optional[str]: Характеристика героя
-        """
+    def _character_prompt(self, character_info: str) -> str:
+        """Промпт для характеристики героя"""
         prompt = f'''
         Дай краткую характеристику литературного героя на основе предоставленной информации: "{character_info}".
 
@@ -281,8 +779,37 @@ class LLMService:
         Будь точен и основывайся только на проверенных знаниях русской литературы.
         Используй обычный текст без Markdown. Максимум 3-4 предложения.
         '''
+        return prompt
 
-        return self.generate_explanation(prompt, max_tokens=300)
+    async def characterize_hero(self, character_info: str) -> Optional[str]:
+        """
+        Даёт характеристику героя по имени/фамилии/произведению
+
+        Args:
+            character_info (str): Информация о герое
+
+        Returns:
+            Optional[str]: Характеристика героя
+        """
+        return await self._cached_generate(
+            'characterize_hero', character_info, self._character_prompt(character_info)
+        )
+
+    def stream_phrase_explanation(self, phrase: str) -> AsyncIterator[str]:
+        """Объяснить фразу потоком фрагментов"""
+        return self._stream_generate('explain_phrase', phrase, self._phrase_prompt(phrase))
+
+    def stream_retelling(self, text: str, target_audience: str = "современный читатель") -> AsyncIterator[str]:
+        """Пересказать текст потоком фрагментов"""
+        return self._stream_generate(
+            'retell_text', f"{target_audience}\n{text}", self._retell_prompt(text, target_audience)
+        )
+
+    def stream_character_description(self, character_info: str) -> AsyncIterator[str]:
+        """Дать характеристику героя потоком фрагментов"""
+        return self._stream_generate(
+            'characterize_hero', character_info, self._character_prompt(character_info)
+        )
 
 # Глобальный экземпляр сервиса (инициализируется только при необходимости)
 llm_service = None
@@ -293,7 +820,8 @@ def initialize_llm_service():
     if llm_service is None:
         logger.info("Начинаем инициализацию LLM API...")
         try:
-            llm_service = LLMService(OPENROUTER_API_KEY)
+            cache = ExplanationCache() if LLM_CACHE_ENABLED else None
+            llm_service = LLMService(OPENROUTER_API_KEY, cache=cache)
             logger.info("LLM API успешно инициализирован глобально")
             return True
         except ValueError as e:
@@ -308,26 +836,67 @@ def initialize_llm_service():
             return False
     return True
 
-def generate_word_explanation(word: str, context: str = "") -> Optional[str]:
+async def start_llm_service() -> bool:
+    """Создать LLM сервис и прогреть пул соединений (вызывается при старте бота)"""
+    if not initialize_llm_service():
+        return False
+    await llm_service.warmup()
+    return True
+
+async def shutdown_llm_service() -> None:
+    """Закрыть пул соединений LLM сервиса (вызывается при остановке бота)"""
+    global llm_service
+    if llm_service is not None:
+        await llm_service.close()
+        if llm_service.cache is not None:
+            llm_service.cache.close()
+        llm_service = None
+        logger.info("LLM API: пул соединений закрыт")
+
+async def generate_word_explanation(word: str, context: str = "", lemma: Optional[str] = None) -> Optional[str]:
     """Глобальная функция для объяснения слова"""
     if llm_service:
-        return llm_service.explain_word(word, context)
+        return await llm_service.explain_word(word, context, lemma)
     return None
 
-def generate_phrase_explanation(phrase: str) -> Optional[str]:
+async def generate_phrase_explanation(phrase: str) -> Optional[str]:
     """Глобальная функция для объяснения фразы"""
     if llm_service:
-        return llm_service.explain_phrase(phrase)
+        return await llm_service.explain_phrase(phrase)
     return None
 
-def generate_text_retelling(text: str) -> Optional[str]:
+async def generate_text_retelling(text: str) -> Optional[str]:
     """Глобальная функция для пересказывания текста"""
     if llm_service:
-        return llm_service.retell_text(text)
+        return await llm_service.retell_text(text)
     return None
 
-def generate_character_description(character_info: str) -> Optional[str]:
+async def generate_character_description(character_info: str) -> Optional[str]:
     """Глобальная функция для характеристики героя"""
     if llm_service:
-        return llm_service.characterize_hero(character_info)
+        return await llm_service.characterize_hero(character_info)
     return None
+
+async def generate_quiz_questions(topic: str, count: int = 3) -> Optional[list]:
+    """Глобальная функция для генерации вопросов викторины"""
+    if llm_service:
+        return await llm_service.generate_quiz_questions(topic, count)
+    return None
+
+async def stream_phrase_explanation(phrase: str) -> AsyncIterator[str]:
+    """Глобальная функция для потокового объяснения фразы"""
+    if llm_service:
+        async for chunk in llm_service.stream_phrase_explanation(phrase):
+            yield chunk
+
+async def stream_text_retelling(text: str) -> AsyncIterator[str]:
+    """Глобальная функция для потокового пересказа текста"""
+    if llm_service:
+        async for chunk in llm_service.stream_retelling(text):
+            yield chunk
+
+async def stream_character_description(character_info: str) -> AsyncIterator[str]:
+    """Глобальная функция для потоковой характеристики героя"""
+    if llm_service:
+        async for chunk in llm_service.stream_character_description(character_info):
+            yield chunk
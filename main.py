@@ -1,8 +1,13 @@
 """Главный файл Telegram-бота Литературный Помощник"""
+import asyncio
 import logging
 from telegram import Update
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, CallbackQueryHandler
-from config import TELEGRAM_BOT_TOKEN, validate_config
+from config import (
+    TELEGRAM_BOT_TOKEN, BOT_MODE, BOT_WORKERS, ASYNCIO_DEBUG, SLOW_CALLBACK_DURATION, QUIZ_POOL_ENABLED,
+    TELEGRAM_RATE_LIMIT_ENABLED, validate_config
+)
+from update_processor import PerUserUpdateProcessor
 
 # Настройка логирования
 logging.basicConfig(
@@ -29,6 +34,55 @@ def setup_handlers(application: Application) -> None:
     from handlers.message_handler import handle_message
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
 
+async def on_startup(application: Application) -> None:
+    """Создать и прогреть пул соединений к LLM до приёма первых сообщений"""
+    if ASYNCIO_DEBUG:
+        # Медленные колбэки (блокирующие вызовы в event loop) попадут в лог asyncio
+        loop = asyncio.get_running_loop()
+        loop.set_debug(True)
+        loop.slow_callback_duration = SLOW_CALLBACK_DURATION
+        logger.info(f"Отладка event loop включена, порог медленного колбэка {SLOW_CALLBACK_DURATION} с")
+
+    from llm_service import start_llm_service
+    await start_llm_service()
+    from database import start_database
+    start_database()
+    if QUIZ_POOL_ENABLED:
+        from quiz_pool import quiz_pool
+        quiz_pool.start()
+
+async def on_shutdown(application: Application) -> None:
+    """Корректно закрыть соединения при остановке бота"""
+    if QUIZ_POOL_ENABLED:
+        from quiz_pool import quiz_pool
+        await quiz_pool.close()
+    from llm_service import shutdown_llm_service
+    await shutdown_llm_service()
+    from database import close_database
+    await close_database()
+    from pdf_export import pdf_exporter
+    pdf_exporter.shutdown()
+
+def build_application() -> Application:
+    """Создать приложение с обработчиками (в многопроцессном режиме - в каждом процессе-обработчике)"""
+    builder = (
+        Application.builder()
+        .token(TELEGRAM_BOT_TOKEN)
+        .concurrent_updates(PerUserUpdateProcessor())
+        .post_init(on_startup)
+        .post_shutdown(on_shutdown)
+    )
+    if TELEGRAM_RATE_LIMIT_ENABLED:
+        # Все запросы к Telegram проходят через общую очередь с лимитами и приоритетами
+        # (в многопроцессном режиме каждый процесс получает 1/BOT_WORKERS лимитов)
+        from rate_limiter import PriorityRateLimiter
+        builder = builder.rate_limiter(PriorityRateLimiter())
+    application = builder.build()
+
+    # Настройка обработчиков
+    setup_handlers(application)
+    return application
+
 def main() -> None:
     """Главная функция запуска бота"""
 
@@ -40,15 +94,24 @@ def main() -> None:
         logger.error(f"Ошибка конфигурации: {e}")
         return
 
-    # Создание приложения
-    application = Application.builder().token(TELEGRAM_BOT_TOKEN).build()
+    if BOT_MODE == 'webhook' and BOT_WORKERS > 1:
+        # Этот процесс только принимает webhook и раздаёт обновления процессам-обработчикам
+        from dispatcher import run_dispatcher
+        logger.info(f"Бот запущен в режиме webhook с {BOT_WORKERS} процессами-обработчиками...")
+        asyncio.run(run_dispatcher())
+        return
 
-    # Настройка обработчиков
-    setup_handlers(application)
+    # Создание приложения
+    application = build_application()
 
     # Запуск бота
-    logger.info("Бот запущен и ожидает сообщений...")
-    application.run_polling(allowed_updates=Update.ALL_TYPES)
+    if BOT_MODE == 'webhook':
+        from webhook_server import run_webhook
+        logger.info("Бот запущен в режиме webhook...")
+        asyncio.run(run_webhook(application))
+    else:
+        logger.info("Бот запущен и ожидает сообщений...")
+        application.run_polling(allowed_updates=Update.ALL_TYPES)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,131 @@
+"""Приведение русских слов к начальной форме (лемматизация)
+
+Пользователи присылают слова так, как они стоят в тексте: "помещику",
+"исправника", "шапочному разбору". Лемматизатор сводит все формы к одной
+("помещик", "исправник", "шапочный разбор"), чтобы база терминов и кэш
+объяснений находили их по одному ключу.
+
+Используется словарный морфологический анализатор pymorphy3. Если пакет не
+установлен, слова только приводятся к нижнему регистру - поведение как без
+лемматизации.
+"""
+import importlib.util
+import logging
+import threading
+from functools import lru_cache
+from typing import Any, Optional
+from config import MORPH_CACHE_SIZE
+
+logger = logging.getLogger(__name__)
+
+MORPH_AVAILABLE = importlib.util.find_spec("pymorphy3") is not None
+
+# Знаки, которые пользователи оставляют вокруг скопированного слова
+_STRIP_CHARS = " \t\n.,;:!?«»\"'()[]—–…"
+
+
+class Lemmatizer:
+    """Лемматизатор с кэшем уже разобранных слов"""
+
+    def __init__(self, cache_size: int = MORPH_CACHE_SIZE, analyzer: Optional[Any] = None):
+        """
+        Args:
+            cache_size (int): Сколько разобранных слов помнить
+            analyzer: Морфологический анализатор с методом parse; по умолчанию pymorphy3,
+                который загружается при первом разборе
+        """
+        self._analyzer = analyzer
+        self._loaded = analyzer is not None
+        self._lock = threading.Lock()
+
+        # Словари pymorphy3 разбирают слово за десятки микросекунд, но слов в
+        # запросах немного и они повторяются - кэш снимает почти всю работу
+        self.lemmatize_word = lru_cache(maxsize=cache_size)(self._lemmatize_word)
+
+    @property
+    def available(self) -> bool:
+        """Есть ли морфологический анализатор"""
+        return self._get_analyzer() is not None
+
+    def _get_analyzer(self) -> Optional[Any]:
+        """Загрузить анализатор при первом обращении (словари занимают десятки мегабайт)"""
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    if MORPH_AVAILABLE:
+                        try:
+                            import pymorphy3
+                            self._analyzer = pymorphy3.MorphAnalyzer(lang='ru')
+                            logger.info("Морфологический анализатор pymorphy3 загружен")
+                        except Exception as e:
+                            logger.error(f"Не удалось загрузить pymorphy3, лемматизация отключена: {e}")
+                    else:
+                        logger.warning("pymorphy3 не установлен, слова не приводятся к начальной форме")
+                    self._loaded = True
+        return self._analyzer
+
+    def _lemmatize_word(self, word: str) -> str:
+        """
+        Привести одно слово к начальной форме
+
+        Args:
+            word (str): Слово в любой форме
+
+        Returns:
+            str: Начальная форма в нижнем регистре (или само слово, если разобрать не удалось)
+        """
+        word = word.strip(_STRIP_CHARS).lower()
+        analyzer = self._get_analyzer()
+        if not word or analyzer is None:
+            return word
+
+        parses = analyzer.parse(word)
+        return parses[0].normal_form if parses else word
+
+    def is_known(self, word: str) -> bool:
+        """
+        Есть ли слово в словаре анализатора
+
+        Args:
+            word (str): Слово в любой форме
+
+        Returns:
+            bool: True для словарного слова; False для незнакомого слова или без анализатора
+        """
+        word = word.strip(_STRIP_CHARS).lower()
+        analyzer = self._get_analyzer()
+        if not word or analyzer is None or not hasattr(analyzer, 'word_is_known'):
+            return False
+        return analyzer.word_is_known(word)
+
+    def lemmatize(self, text: str) -> str:
+        """
+        Привести к начальной форме каждое слово текста
+
+        Args:
+            text (str): Слово или короткая фраза
+
+        Returns:
+            str: Начальные формы слов через пробел
+        """
+        lemmas = (self.lemmatize_word(token) for token in text.split())
+        return " ".join(lemma for lemma in lemmas if lemma)
+
+
+# Глобальный экземпляр лемматизатора
+lemmatizer = Lemmatizer()
+
+
+def lemmatize_word(word: str) -> str:
+    """Глобальная функция для приведения слова к начальной форме"""
+    return lemmatizer.lemmatize_word(word)
+
+
+def lemmatize(text: str) -> str:
+    """Глобальная функция для приведения к начальной форме всех слов текста"""
+    return lemmatizer.lemmatize(text)
+
+
+def is_known_word(word: str) -> bool:
+    """Глобальная функция проверки, что слово есть в словаре анализатора"""
+    return lemmatizer.is_known(word)
@@ -0,0 +1,170 @@
+"""Экспорт личного словаря в PDF в отдельных процессах
+
+Вёрстка reportlab занимает секунды на больших словарях, поэтому выполняется
+в пуле процессов и не блокирует event loop. Шрифт с кириллицей регистрируется
+один раз при старте каждого процесса пула.
+"""
+import asyncio
+import importlib.util
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Set, Tuple
+from config import PDF_FONT_PATH, PDF_EXPORT_WORKERS, PDF_EXPORT_MAX_QUEUE
+
+logger = logging.getLogger(__name__)
+
+REPORTLAB_AVAILABLE = importlib.util.find_spec("reportlab") is not None
+
+# Строка словаря для PDF: (слово, объяснение, число просмотров)
+PdfRow = Tuple[str, str, int]
+
+# Шрифт, зарегистрированный в процессе пула
+_font_name = "Helvetica"
+
+PAGE_TOP = 800
+PAGE_BOTTOM = 50
+LEFT_MARGIN = 50
+TEXT_WIDTH = 500
+
+
+class PdfExportBusy(Exception):
+    """Экспорт сейчас невозможен: очередь заполнена или PDF пользователя уже готовится"""
+
+    def __init__(self, user_in_progress: bool):
+        self.user_in_progress = user_in_progress
+        super().__init__("PDF пользователя уже готовится" if user_in_progress else "Очередь экспорта PDF заполнена")
+
+
+def _init_worker(font_path: str) -> None:
+    """Подготовить процесс пула: импортировать reportlab и зарегистрировать шрифт"""
+    global _font_name
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    if font_path and os.path.exists(font_path):
+        pdfmetrics.registerFont(TTFont("DictionaryFont", font_path))
+        _font_name = "DictionaryFont"
+    else:
+        # Встроенные шрифты reportlab не содержат кириллицы
+        logger.warning(f"Шрифт {font_path} не найден, кириллица в PDF отображаться не будет")
+
+
+def render_dictionary_pdf(rows: List[PdfRow], user_id: int) -> bytes:
+    """
+    Сверстать PDF со словарём (выполняется в процессе пула)
+
+    Args:
+        rows (List[PdfRow]): Слова пользователя
+        user_id (int): ID пользователя
+
+    Returns:
+        bytes: Содержимое PDF
+    """
+    import io
+    from reportlab.lib.utils import simpleSplit
+    from reportlab.pdfgen import canvas
+
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer)
+    y_position = PAGE_TOP
+
+    def draw_lines(lines: List[str], x: float, size: int, step: float) -> None:
+        """Вывести строки, перенося их на новую страницу при необходимости"""
+        nonlocal y_position
+        c.setFont(_font_name, size)
+        for line in lines:
+            if y_position < PAGE_BOTTOM:
+                c.showPage()
+                c.setFont(_font_name, size)
+                y_position = PAGE_TOP
+            c.drawString(x, y_position, line)
+            y_position -= step
+
+    # Заголовок
+    draw_lines(["Личный литературный словарь"], LEFT_MARGIN, 16, 20)
+    draw_lines([f"Пользователь ID: {user_id}", f"Всего слов: {len(rows)}"], LEFT_MARGIN, 12, 20)
+    y_position -= 20
+
+    # Список слов: длинные строки переносятся целиком, ничего не обрезается
+    for i, (word, explanation, lookup_count) in enumerate(rows, 1):
+        title = f"{i}. {word} ({lookup_count} просмотров)"
+        draw_lines(simpleSplit(title, _font_name, 12, TEXT_WIDTH), LEFT_MARGIN, 12, 20)
+        draw_lines(simpleSplit(explanation, _font_name, 10, TEXT_WIDTH - 20), LEFT_MARGIN + 20, 10, 15)
+        y_position -= 10
+
+    c.save()
+    return buffer.getvalue()
+
+
+class PdfExporter:
+    """Ограниченная очередь экспорта PDF поверх пула процессов"""
+
+    def __init__(self, workers: int = PDF_EXPORT_WORKERS, max_queue: int = PDF_EXPORT_MAX_QUEUE,
+                 font_path: str = PDF_FONT_PATH):
+        """
+        Args:
+            workers (int): Процессов в пуле
+            max_queue (int): Сколько экспортов может выполняться и ждать одновременно
+            font_path (str): Путь к TTF шрифту с кириллицей
+        """
+        self.workers = workers
+        self.max_queue = max_queue
+        self.font_path = font_path
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._users: Set[int] = set()
+
+    @property
+    def in_progress(self) -> int:
+        """Сколько экспортов выполняется или ждёт процесса"""
+        return len(self._users)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Создать пул процессов при первом экспорте"""
+        if self._executor is None:
+            # spawn: процессы не наследуют соединения с БД и потоки бота
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.font_path,)
+            )
+        return self._executor
+
+    async def export(self, user_id: int, rows: List[PdfRow]) -> bytes:
+        """
+        Сверстать PDF в пуле процессов
+
+        Args:
+            user_id (int): ID пользователя
+            rows (List[PdfRow]): Слова пользователя
+
+        Returns:
+            bytes: Содержимое PDF
+
+        Raises:
+            PdfExportBusy: Если PDF пользователя уже готовится или очередь заполнена
+        """
+        if user_id in self._users:
+            raise PdfExportBusy(user_in_progress=True)
+        if len(self._users) >= self.max_queue:
+            raise PdfExportBusy(user_in_progress=False)
+
+        self._users.add(user_id)
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), render_dictionary_pdf, rows, user_id)
+        finally:
+            self._users.discard(user_id)
+
+    def shutdown(self) -> None:
+        """Остановить пул процессов"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Глобальный экземпляр экспортёра
+pdf_exporter = PdfExporter()
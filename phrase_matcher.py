@@ -0,0 +1,129 @@
+"""Поиск известных фраз в тексте автоматом Ахо-Корасик
+
+Автомат строится один раз по нормализованным ключам и находит все вхождения
+всех фраз за один проход по тексту - время поиска не зависит от числа фраз.
+"""
+import re
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize_phrase(text: str) -> str:
+    """
+    Нормализовать фразу для поиска
+
+    Args:
+        text (str): Исходный текст
+
+    Returns:
+        str: Текст в нижнем регистре, с ё -> е, знаки препинания заменены пробелами
+    """
+    return " ".join(_NON_WORD.sub(" ", text.lower().replace('ё', 'е')).split())
+
+
+class PhraseMatcher:
+    """Автомат Ахо-Корасик над набором фраз"""
+
+    def __init__(self, phrases: Iterable[str]):
+        """
+        Args:
+            phrases: Фразы (ключи базы); нормализуются при построении
+        """
+        # Узел 0 - корень. Для каждого узла: переходы, суффиксная ссылка,
+        # фраза, которая в нём заканчивается, и ближайший по суффиксным ссылкам узел с фразой
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._phrase: List[Optional[str]] = [None]
+        self._output_link: List[int] = [0]
+
+        # нормализованная фраза -> исходный ключ
+        self.keys: Dict[str, str] = {}
+
+        for phrase in phrases:
+            normalized = normalize_phrase(phrase)
+            if normalized:
+                self.keys.setdefault(normalized, phrase)
+                self._add(f" {normalized} ")
+
+        self._build_links()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _add(self, pattern: str) -> None:
+        """Добавить фразу в бор"""
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._phrase.append(None)
+                self._output_link.append(0)
+                self._goto[node][char] = next_node
+            node = next_node
+        self._phrase[node] = pattern[1:-1]
+
+    def _build_links(self) -> None:
+        """Построить суффиксные ссылки обходом в ширину"""
+        # Суффиксные ссылки узлов первого уровня ведут в корень (уже заполнены нулями)
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+                self._fail[child] = fail
+                self._output_link[child] = fail if self._phrase[fail] is not None else self._output_link[fail]
+
+    def _matches(self, text: str) -> Iterator[Tuple[int, str]]:
+        """Пройти автоматом по тексту: (позиция конца, нормализованная фраза)"""
+        padded = f" {normalize_phrase(text)} "
+        goto, fail, phrase, output_link = self._goto, self._fail, self._phrase, self._output_link
+
+        node = 0
+        for position, char in enumerate(padded):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+
+            match = node if phrase[node] is not None else output_link[node]
+            while match:
+                yield position, phrase[match]
+                match = output_link[match]
+
+    def find_all(self, text: str) -> Iterator[Tuple[int, str]]:
+        """
+        Найти все вхождения фраз целыми словами
+
+        Args:
+            text (str): Текст пользователя
+
+        Yields:
+            Tuple[int, str]: Позиция конца вхождения в нормализованном тексте и исходный ключ фразы
+        """
+        for position, normalized in self._matches(text):
+            yield position, self.keys[normalized]
+
+    def longest_match(self, text: str) -> Optional[str]:
+        """
+        Найти самую длинную (самую конкретную) фразу в тексте
+
+        Args:
+            text (str): Текст пользователя
+
+        Returns:
+            Optional[str]: Исходный ключ фразы или None; при равной длине - первая по тексту
+        """
+        best = None
+        for _, normalized in self._matches(text):
+            if best is None or len(normalized) > len(best):
+                best = normalized
+        return self.keys[best] if best is not None else None
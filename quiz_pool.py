@@ -0,0 +1,388 @@
+"""Запас готовых вопросов викторины, сгенерированных LLM
+
+Фоновая задача держит для каждой темы от QUIZ_POOL_MIN_SIZE до
+QUIZ_POOL_MAX_SIZE проверенных вопросов в таблице SQLite. start_quiz
+забирает готовый вопрос одним запросом DELETE ... RETURNING, без ожидания
+LLM.
+
+Таблица - единственный общий запас для всех процессов-обработчиков
+(BOT_WORKERS): вопрос выдаётся ровно одному процессу, а пополняет запас
+только процесс, который держит аренду в таблице quiz_pool_lease. Аренда
+продлевается на каждом проходе; если её владелец упал, через lease_seconds
+пополнение подхватит другой процесс.
+"""
+import asyncio
+import json
+import logging
+import random
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, FrozenSet, List, Optional, Tuple
+from config import (
+    DATABASE_PATH, DB_BUSY_TIMEOUT, QUIZ_POOL_TOPICS, QUIZ_POOL_MIN_SIZE, QUIZ_POOL_MAX_SIZE,
+    QUIZ_POOL_BATCH_SIZE, QUIZ_POOL_REFILL_INTERVAL, QUIZ_POOL_SIMILARITY
+)
+from term_pool import OPTION_MAX_LENGTH
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"\w+")
+
+# Сколько раз подряд пробовать дозаполнить тему за один проход
+MAX_ATTEMPTS_PER_TOPIC = 3
+
+# Аренда пополнения по умолчанию - столько проверок запаса (генерация может идти несколько минут)
+LEASE_INTERVALS = 5
+
+
+def question_tokens(text: str) -> FrozenSet[str]:
+    """Множество слов вопроса без регистра и знаков препинания - для сравнения вопросов"""
+    return frozenset(_WORD.findall(text.lower().replace('ё', 'е')))
+
+
+def similarity(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """Коэффициент Жаккара двух множеств слов"""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def validate_question(item: dict) -> Optional[Tuple[str, List[str], int, str]]:
+    """
+    Проверить вопрос, разобранный из ответа LLM
+
+    Args:
+        item (dict): Вопрос из LLMService._parse_quiz_questions
+
+    Returns:
+        Optional[Tuple[str, List[str], int, str]]: (вопрос, варианты, индекс правильного, объяснение)
+            или None, если вопрос нельзя показывать
+    """
+    question = str(item.get('question', '')).strip()
+    options = [str(option).strip() for option in item.get('options', [])]
+    correct_index = item.get('correct_index')
+
+    if not question or len(options) != 4 or not isinstance(correct_index, int):
+        return None
+    if not 0 <= correct_index < len(options):
+        return None
+    # Варианты - кнопки клавиатуры: непустые, короткие и различимые
+    if any(not option or len(option) > OPTION_MAX_LENGTH for option in options):
+        return None
+    if len({option.lower() for option in options}) != len(options):
+        return None
+
+    return question, options, correct_index, str(item.get('explanation', '')).strip()
+
+
+class QuizQuestionPool:
+    """Запас вопросов викторины по темам с фоновым пополнением"""
+
+    def __init__(self, generate_func: Callable[[str, int], Awaitable[Optional[list]]],
+                 db_path: str = DATABASE_PATH, topics: Optional[List[str]] = None,
+                 min_size: int = QUIZ_POOL_MIN_SIZE, max_size: int = QUIZ_POOL_MAX_SIZE,
+                 batch_size: int = QUIZ_POOL_BATCH_SIZE, interval: float = QUIZ_POOL_REFILL_INTERVAL,
+                 max_similarity: float = QUIZ_POOL_SIMILARITY, lease_seconds: Optional[float] = None):
+        """
+        Args:
+            generate_func: Корутина (тема, количество) -> разобранные вопросы LLM или None
+            db_path (str): Путь к базе SQLite
+            topics: Темы викторины
+            min_size (int): Порог: тема с меньшим числом вопросов пополняется
+            max_size (int): Сколько вопросов темы хранить не больше
+            batch_size (int): Сколько вопросов просить у LLM за один запрос
+            interval (float): Как часто проверять запас, секунд
+            max_similarity (float): Вопросы с долей общих слов выше порога считаются повтором
+            lease_seconds (Optional[float]): Срок аренды пополнения; по умолчанию LEASE_INTERVALS * interval
+        """
+        self.generate_func = generate_func
+        self.db_path = db_path
+        self.topics = list(topics if topics is not None else QUIZ_POOL_TOPICS)
+        self.min_size = min_size
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_similarity = max_similarity
+        self.lease_seconds = lease_seconds if lease_seconds is not None else LEASE_INTERVALS * interval
+        # Владелец аренды пополнения - этот экземпляр в этом процессе
+        self.owner = uuid.uuid4().hex
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+
+        self.generated = 0
+        self.rejected = 0
+        self.duplicates = 0
+        self.served = 0
+
+    async def size(self, topic: str) -> int:
+        """Сколько готовых вопросов темы в общей таблице"""
+        return await asyncio.to_thread(self._count, topic)
+
+    async def pop(self, topic: Optional[str] = None) -> Optional[Tuple[str, List[str], int]]:
+        """
+        Забрать готовый вопрос (без обращения к LLM)
+
+        Вопрос удаляется из таблицы тем же запросом, которым читается, поэтому
+        два процесса не получат один и тот же вопрос.
+
+        Args:
+            topic (Optional[str]): Тема; по умолчанию - случайная из тех, где есть вопросы
+
+        Returns:
+            Optional[Tuple[str, List[str], int]]: (вопрос, перемешанные варианты, индекс правильного)
+                или None, если запас пуст
+        """
+        row = await asyncio.to_thread(self._claim, topic)
+        if row is None:
+            return None
+
+        question, options, correct_index = row
+        self.served += 1
+
+        # LLM часто ставит правильный ответ первым - перемешиваем при выдаче
+        correct = options[correct_index]
+        options = list(options)
+        random.shuffle(options)
+        return question, options, options.index(correct)
+
+    # --- Работа с базой (выполняется в потоке, не в event loop) ---
+
+    def _connect(self) -> sqlite3.Connection:
+        """Открыть соединение и создать таблицу"""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, timeout=DB_BUSY_TIMEOUT / 1000, check_same_thread=False)
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS quiz_questions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    topic TEXT NOT NULL,
+                    question TEXT NOT NULL,
+                    options TEXT NOT NULL,
+                    correct_index INTEGER NOT NULL,
+                    explanation TEXT NOT NULL DEFAULT '',
+                    fingerprint TEXT NOT NULL UNIQUE,
+                    created_at REAL NOT NULL
+                )
+            ''')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_quiz_questions_topic ON quiz_questions(topic, id)')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS quiz_pool_lease (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    owner TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            ''')
+            self._conn.commit()
+        return self._conn
+
+    def _count(self, topic: str) -> int:
+        """Число вопросов темы в таблице"""
+        with self._lock:
+            conn = self._connect()
+            return conn.execute('SELECT COUNT(*) FROM quiz_questions WHERE topic = ?', (topic,)).fetchone()[0]
+
+    def _load_tokens(self, topic: str) -> Dict[int, FrozenSet[str]]:
+        """Множества слов вопросов темы, которые сейчас в запасе (для поиска повторов)"""
+        with self._lock:
+            conn = self._connect()
+            rows = conn.execute('SELECT id, question FROM quiz_questions WHERE topic = ?', (topic,)).fetchall()
+            return {row[0]: question_tokens(row[1]) for row in rows}
+
+    def _claim(self, topic: Optional[str]) -> Optional[Tuple[str, List[str], int]]:
+        """Удалить из таблицы и вернуть самый старый вопрос темы (или случайной темы с вопросами)"""
+        topics = [topic] if topic is not None else self.topics
+        if not topics:
+            return None
+        placeholders = ','.join('?' * len(topics))
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                'DELETE FROM quiz_questions WHERE id = ('
+                '  SELECT id FROM quiz_questions WHERE topic = ('
+                f'    SELECT topic FROM quiz_questions WHERE topic IN ({placeholders})'
+                '    GROUP BY topic ORDER BY RANDOM() LIMIT 1'
+                '  ) ORDER BY id LIMIT 1'
+                ') RETURNING question, options, correct_index', topics
+            ).fetchone()
+            conn.commit()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1]), row[2]
+
+    def _acquire_lease(self) -> bool:
+        """Взять или продлить аренду пополнения; False, если её держит другой живой процесс"""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            cursor = conn.execute(
+                'INSERT INTO quiz_pool_lease (id, owner, expires_at) VALUES (1, ?, ?) '
+                'ON CONFLICT(id) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at '
+                'WHERE quiz_pool_lease.owner = excluded.owner OR quiz_pool_lease.expires_at < ?',
+                (self.owner, now + self.lease_seconds, now)
+            )
+            conn.commit()
+            return cursor.rowcount > 0
+
+    def _release_lease(self) -> None:
+        """Отдать аренду, чтобы пополнение сразу подхватил другой процесс"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute('DELETE FROM quiz_pool_lease WHERE owner = ?', (self.owner,))
+            conn.commit()
+
+    def _insert(self, topic: str, question: str, options: List[str], correct_index: int,
+                explanation: str, fingerprint: str) -> Optional[int]:
+        """Сохранить вопрос; None если такой вопрос уже есть в таблице"""
+        with self._lock:
+            conn = self._connect()
+            cursor = conn.execute(
+                'INSERT OR IGNORE INTO quiz_questions '
+                '(topic, question, options, correct_index, explanation, fingerprint, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (topic, question, json.dumps(options, ensure_ascii=False), correct_index,
+                 explanation, fingerprint, time.time())
+            )
+            conn.commit()
+            return cursor.lastrowid if cursor.rowcount else None
+
+    # --- Пополнение ---
+
+    def _is_duplicate(self, known: Dict[int, FrozenSet[str]], tokens: FrozenSet[str]) -> bool:
+        """Есть ли в запасе темы почти такой же вопрос"""
+        return any(similarity(tokens, other) >= self.max_similarity for other in known.values())
+
+    async def _add_generated(self, topic: str, items: list) -> int:
+        """Проверить, отсеять повторы и сохранить сгенерированные вопросы; возвращает число добавленных"""
+        known = await asyncio.to_thread(self._load_tokens, topic)
+        added = 0
+        for item in items:
+            if len(known) >= self.max_size:
+                break
+
+            validated = validate_question(item)
+            if validated is None:
+                self.rejected += 1
+                continue
+
+            question, options, correct_index, explanation = validated
+            tokens = question_tokens(question)
+            if self._is_duplicate(known, tokens):
+                self.duplicates += 1
+                continue
+
+            # Отпечаток ловит точные повторы, добавленные между чтением запаса и вставкой
+            fingerprint = f"{topic}\n{' '.join(sorted(tokens))}"
+            question_id = await asyncio.to_thread(
+                self._insert, topic, question, options, correct_index, explanation, fingerprint
+            )
+            if question_id is None:
+                self.duplicates += 1
+                continue
+
+            known[question_id] = tokens
+            added += 1
+
+        self.generated += added
+        return added
+
+    async def refill_topic(self, topic: str) -> int:
+        """
+        Дополнить тему до max_size, если вопросов меньше min_size
+
+        Args:
+            topic (str): Тема
+
+        Returns:
+            int: Сколько вопросов добавлено
+        """
+        if await self.size(topic) >= self.min_size:
+            return 0
+
+        added = 0
+        for _ in range(MAX_ATTEMPTS_PER_TOPIC):
+            if await self.size(topic) >= self.max_size:
+                break
+            try:
+                items = await self.generate_func(topic, self.batch_size)
+            except Exception as e:
+                logger.error(f"Ошибка генерации вопросов викторины по теме '{topic}': {e}")
+                break
+            if not items:
+                # LLM недоступен - попробуем при следующем проходе
+                break
+            added += await self._add_generated(topic, items)
+
+        if added:
+            logger.info(f"Запас викторины '{topic}': +{added}, всего {await self.size(topic)}")
+        return added
+
+    async def refill(self) -> bool:
+        """
+        Пополнить темы с малым запасом, если аренда пополнения у этого процесса
+
+        Returns:
+            bool: True, если пополнял этот процесс
+        """
+        for topic in self.topics:
+            # Аренда продлевается перед каждой темой: генерация темы может идти долго
+            if not await asyncio.to_thread(self._acquire_lease):
+                return False
+            await self.refill_topic(topic)
+        return True
+
+    async def _run(self) -> None:
+        """Фоновое пополнение запаса"""
+        while not self._stopping.is_set():
+            try:
+                await self.refill()
+            except Exception as e:
+                logger.error(f"Ошибка пополнения запаса викторины: {e}")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        """Запустить фоновое пополнение (нужен работающий event loop)"""
+        if self._task is None or self._task.done():
+            self._stopping = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self) -> None:
+        """Остановить пополнение, отдать аренду и закрыть соединение"""
+        if self._task is not None:
+            self._stopping.set()
+            # Генерация может идти долго - её не ждём
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        # Запас, который не открывал базу, не создаёт её при остановке
+        if self._conn is not None:
+            try:
+                await asyncio.to_thread(self._release_lease)
+            except Exception as e:
+                logger.error(f"Не удалось отдать аренду пополнения викторины: {e}")
+
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+async def _generate_with_llm(topic: str, count: int) -> Optional[list]:
+    """Сгенерировать вопросы через глобальный LLM сервис"""
+    from llm_service import generate_quiz_questions
+    return await generate_quiz_questions(topic, count)
+
+
+# Глобальный запас вопросов
+quiz_pool = QuizQuestionPool(_generate_with_llm)
@@ -0,0 +1,276 @@
+"""Ограничение исходящих запросов к Telegram
+
+PriorityRateLimiter подключается к приложению через Application.builder().rate_limiter()
+и пропускает через себя все запросы бота (reply_text, edit_message_text, delete...):
+  - общий токен-бакет на все запросы с chat_id: TELEGRAM_GLOBAL_RATE в секунду;
+  - свой бакет на каждую группу или канал: TELEGRAM_GROUP_RATE за TELEGRAM_GROUP_PERIOD секунд;
+  - при RetryAfter (429) общий бакет закрывается на retry_after секунд, запрос повторяется
+    до TELEGRAM_MAX_RETRIES раз;
+  - когда токенов нет, ожидающие получают их по приоритету: ответы пользователю
+    (PRIORITY_INTERACTIVE) раньше массовых и промежуточных запросов (PRIORITY_BULK).
+
+В многопроцессном режиме (BOT_WORKERS > 1) у каждого процесса-обработчика свой
+ограничитель, а лимиты Telegram общие на токен бота. Поэтому скорость и запас обоих
+бакетов делятся на число процессов: вместе они не превышают лимит Telegram. Общие
+бакеты в Redis/SQLite стоили бы лишнего запроса к хранилищу на каждое сообщение.
+Обновления раздаются процессам по user_id, так что в одну группу пишут все процессы -
+её лимит тоже делится. Цена решения: простаивающий процесс не отдаёт свою долю
+загруженному.
+
+Приоритет задаётся контекстом, без изменения вызовов:
+
+    with outbound_priority(PRIORITY_BULK):
+        await message.edit_text(preview)
+"""
+import asyncio
+import contextlib
+import heapq
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+from datetime import timedelta
+from typing import Any, Callable, Coroutine, Dict, Iterator, List, Optional, Union
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+from config import (
+    TELEGRAM_GLOBAL_RATE, TELEGRAM_GROUP_RATE, TELEGRAM_GROUP_PERIOD, TELEGRAM_MAX_RETRIES, BOT_WORKERS
+)
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 10
+
+# Сколько бакетов групп держать, прежде чем удалять неиспользуемые
+MAX_IDLE_GROUPS = 512
+
+_priority: ContextVar[int] = ContextVar("outbound_priority", default=PRIORITY_INTERACTIVE)
+
+
+@contextlib.contextmanager
+def outbound_priority(priority: int) -> Iterator[None]:
+    """Задать приоритет запросов к Telegram внутри блока (меньше - важнее)"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class TokenBucket:
+    """Токен-бакет: rate токенов в секунду, не больше capacity про запас"""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated", "closed_until")
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+        self.closed_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Через сколько секунд можно будет взять токен (0 - сразу)"""
+        self._refill(now)
+        wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+        return max(wait, self.closed_until - now)
+
+    def take(self, now: float) -> None:
+        """Взять токен (вызывать, когда wait_time вернул 0)"""
+        self._refill(now)
+        self.tokens -= 1
+
+    def close_for(self, seconds: float, now: float) -> None:
+        """Не выдавать токены seconds секунд (Telegram вернул RetryAfter)"""
+        self.closed_until = max(self.closed_until, now + seconds)
+
+    def is_idle(self, now: float) -> bool:
+        """Бакет полон - его можно удалить без потери ограничения"""
+        self._refill(now)
+        return self.tokens >= self.capacity and self.closed_until <= now
+
+
+class PriorityBucket:
+    """Токен-бакет с очередью ожидающих по приоритету (при равном приоритете - по порядку)"""
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.bucket = TokenBucket(rate, capacity, clock())
+        # (приоритет, номер, future)
+        self._waiters: List[tuple] = []
+        self._counter = 0
+        self._task: Optional[asyncio.Task] = None
+
+        self.delayed = 0
+
+    @property
+    def pending(self) -> int:
+        """Сколько запросов ждут токена"""
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    def pending_by_priority(self) -> Dict[int, int]:
+        """Сколько запросов ждут токена, по приоритетам"""
+        return dict(Counter(priority for priority, _, future in self._waiters if not future.done()))
+
+    def is_idle(self) -> bool:
+        return not self._waiters and self.bucket.is_idle(self.clock())
+
+    def close_for(self, seconds: float) -> None:
+        self.bucket.close_for(seconds, self.clock())
+
+    async def acquire(self, priority: int = PRIORITY_INTERACTIVE) -> None:
+        """Дождаться токена"""
+        now = self.clock()
+        if not self._waiters and self.bucket.wait_time(now) <= 0:
+            self.bucket.take(now)
+            return
+
+        self.delayed += 1
+        future = asyncio.get_running_loop().create_future()
+        self._counter += 1
+        heapq.heappush(self._waiters, (priority, self._counter, future))
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._grant())
+        # Отменённый ожидающий просто пропускается при выдаче
+        await future
+
+    async def _grant(self) -> None:
+        """Выдавать токены ожидающим по мере пополнения бакета"""
+        while self._waiters:
+            now = self.clock()
+            wait = self.bucket.wait_time(now)
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self.bucket.take(now)
+            future.set_result(None)
+
+
+def _retry_after_seconds(error: RetryAfter) -> float:
+    """retry_after бывает числом или timedelta в зависимости от версии библиотеки"""
+    value = error.retry_after
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    return float(value)
+
+
+class PriorityRateLimiter(BaseRateLimiter[Dict[str, Any]]):
+    """
+    Ограничитель исходящих запросов бота с приоритетами
+
+    rate_limit_args методов ExtBot (если их передают явно) - словарь с ключами
+    priority и max_retries.
+    """
+
+    def __init__(self, global_rate: float = TELEGRAM_GLOBAL_RATE, group_rate: float = TELEGRAM_GROUP_RATE,
+                 group_period: float = TELEGRAM_GROUP_PERIOD, max_retries: int = TELEGRAM_MAX_RETRIES,
+                 workers: int = BOT_WORKERS, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            global_rate (float): Запросов в секунду на весь бот
+            group_rate (float): Сообщений в одну группу за group_period
+            group_period (float): Окно ограничения для групп, секунд
+            max_retries (int): Сколько раз повторять запрос после RetryAfter
+            workers (int): Сколько процессов отправляют запросы с этим токеном; каждому - своя доля лимитов
+            clock: Источник времени (для тестов)
+        """
+        if workers < 1:
+            raise ValueError("Нужен хотя бы один процесс")
+        self.clock = clock
+        self.max_retries = max_retries
+        self.workers = workers
+        global_rate /= workers
+        group_rate /= workers
+        # Запас бакета - хотя бы один запрос, иначе при малой доле токен никогда не выдаётся
+        self._global = PriorityBucket(global_rate, max(1.0, global_rate), clock)
+        self._group_rate = group_rate / group_period
+        self._group_capacity = max(1.0, group_rate)
+        self._groups: Dict[Union[int, str], PriorityBucket] = {}
+
+        self.retry_after_hits = 0
+
+    async def initialize(self) -> None:
+        """Ничего не делает: бакеты создаются в конструкторе"""
+
+    async def shutdown(self) -> None:
+        """Залогировать запросы, которые так и не дождались отправки"""
+        if self._global.pending:
+            logger.info(f"Остановка: {self._global.pending} запросов к Telegram ждут очереди")
+
+    def _group_bucket(self, group: Union[int, str]) -> PriorityBucket:
+        """Бакет группы; полные бакеты других групп удаляются, когда их становится много"""
+        bucket = self._groups.get(group)
+        if bucket is None:
+            if len(self._groups) > MAX_IDLE_GROUPS:
+                for key in [key for key, other in self._groups.items() if other.is_idle()]:
+                    del self._groups[key]
+            bucket = self._groups[group] = PriorityBucket(self._group_rate, self._group_capacity, self.clock)
+        return bucket
+
+    def stats(self) -> dict:
+        """Метрики очереди для проверки здоровья и логов"""
+        return {
+            "pending": self._global.pending,
+            "pending_by_priority": {str(priority): count
+                                    for priority, count in self._global.pending_by_priority().items()},
+            "pending_in_groups": sum(bucket.pending for bucket in self._groups.values()),
+            "groups": len(self._groups),
+            "delayed": self._global.delayed + sum(bucket.delayed for bucket in self._groups.values()),
+            "retry_after_hits": self.retry_after_hits,
+            "workers": self.workers,
+        }
+
+    async def process_request(
+        self,
+        callback: Callable[..., Coroutine[Any, Any, Union[bool, Dict[str, Any], List[Dict[str, Any]]]]],
+        args: Any,
+        kwargs: Dict[str, Any],
+        endpoint: str,
+        data: Dict[str, Any],
+        rate_limit_args: Optional[Dict[str, Any]],
+    ) -> Union[bool, Dict[str, Any], List[Dict[str, Any]]]:
+        """Дождаться очереди и выполнить запрос, повторяя его после RetryAfter"""
+        rate_limit_args = rate_limit_args or {}
+        priority = rate_limit_args.get("priority", _priority.get())
+        max_retries = rate_limit_args.get("max_retries", self.max_retries)
+
+        chat_id = data.get("chat_id")
+        with contextlib.suppress(ValueError, TypeError):
+            chat_id = int(chat_id)
+        # Отрицательные ID и @username - группы и каналы, у них свой лимит
+        group = chat_id if (isinstance(chat_id, int) and chat_id < 0) or isinstance(chat_id, str) else None
+        group_bucket = self._group_bucket(group) if group is not None else None
+
+        attempt = 0
+        while True:
+            if group_bucket is not None:
+                await group_bucket.acquire(priority)
+            if chat_id is not None:
+                await self._global.acquire(priority)
+
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                self.retry_after_hits += 1
+                delay = _retry_after_seconds(e) + 0.1
+                if attempt >= max_retries:
+                    logger.error(f"Telegram: {endpoint} отклонён по лимиту после {max_retries} повторов")
+                    raise
+                attempt += 1
+                logger.warning(f"Telegram: лимит запросов, {endpoint} повторим через {delay:.1f} с")
+                if chat_id is None:
+                    await asyncio.sleep(delay)
+                else:
+                    # Пауза для всех запросов - иначе очередь продолжит упираться в лимит
+                    self._global.close_for(delay)
+                    if group_bucket is not None:
+                        group_bucket.close_for(delay)
@@ -0,0 +1,237 @@
+"""Повторы с экспоненциальной задержкой и автоматический выключатель для вызовов LLM
+
+RetryPolicy решает, повторять ли запрос и сколько ждать: 429 и 5xx и сетевые
+ошибки повторяются с задержкой base * 2^попытка со случайным разбросом (full
+jitter), а Retry-After от сервера соблюдается. Если сервер просит ждать дольше
+max_delay, запрос не повторяется - пользователь получит ответ из базы сразу.
+
+CircuitBreaker считает ошибки модели в скользящем окне. Когда их доля превышает
+порог, выключатель размыкается и запросы к модели сразу возвращают None (без
+30-секундного ожидания таймаута). Через open_seconds выключатель пропускает
+пробный запрос (полуоткрытое состояние): успех замыкает его, ошибка снова размыкает.
+Пробный запрос, отменённый до ответа, освобождает место для следующего, а
+зависший дольше open_seconds считается ошибкой - иначе выключатель остался бы
+полуоткрытым навсегда.
+"""
+import logging
+import random
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Callable, Deque, Dict, Optional, Tuple
+from config import (
+    LLM_RETRY_ATTEMPTS, LLM_RETRY_BASE_DELAY, LLM_RETRY_MAX_DELAY, LLM_BREAKER_FAILURE_RATE,
+    LLM_BREAKER_MIN_REQUESTS, LLM_BREAKER_WINDOW, LLM_BREAKER_OPEN_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+# Коды ответа, после которых запрос имеет смысл повторить
+RETRYABLE_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """
+    Разобрать заголовок Retry-After
+
+    Args:
+        value (Optional[str]): Число секунд или HTTP-дата
+        now (Optional[float]): Текущее время Unix (для тестов)
+
+    Returns:
+        Optional[float]: Сколько секунд ждать; None если заголовка нет или он некорректен
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if moment is None:
+        return None
+    return max(0.0, moment.timestamp() - (time.time() if now is None else now))
+
+
+class RetryPolicy:
+    """Какие ошибки повторять и сколько ждать перед повтором"""
+
+    def __init__(self, attempts: int = LLM_RETRY_ATTEMPTS, base_delay: float = LLM_RETRY_BASE_DELAY,
+                 max_delay: float = LLM_RETRY_MAX_DELAY, rng: random.Random = random):
+        """
+        Args:
+            attempts (int): Всего попыток, включая первую
+            base_delay (float): Задержка перед первым повтором (верхняя граница разброса), секунд
+            max_delay (float): Больше стольких секунд между попытками не ждать
+            rng: Генератор случайных чисел
+        """
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rng = rng
+
+    @staticmethod
+    def is_retryable(status_code: int) -> bool:
+        """Стоит ли повторять запрос с таким кодом ответа"""
+        return status_code in RETRYABLE_STATUSES
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> Optional[float]:
+        """
+        Задержка перед следующей попыткой
+
+        Args:
+            attempt (int): Номер неудачной попытки, с нуля
+            retry_after (Optional[float]): Сколько просил подождать сервер
+
+        Returns:
+            Optional[float]: Секунд до повтора; None если повторять не нужно
+        """
+        if attempt + 1 >= self.attempts:
+            return None
+        if retry_after is not None:
+            # Долгое ожидание хуже быстрого ответа из базы
+            return retry_after if retry_after <= self.max_delay else None
+        return self.rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """Автоматический выключатель для одной модели"""
+
+    def __init__(self, name: str, failure_rate: float = LLM_BREAKER_FAILURE_RATE,
+                 min_requests: int = LLM_BREAKER_MIN_REQUESTS, window: float = LLM_BREAKER_WINDOW,
+                 open_seconds: float = LLM_BREAKER_OPEN_SECONDS, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            name (str): Имя (модель) для логов
+            failure_rate (float): Доля ошибок в окне, при которой выключатель размыкается
+            min_requests (int): Меньше стольких запросов в окне - не размыкать
+            window (float): Длина скользящего окна, секунд
+            open_seconds (float): Сколько секунд не пускать запросы после размыкания
+            clock: Источник времени (для тестов)
+        """
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_requests = min_requests
+        self.window = window
+        self.open_seconds = open_seconds
+        self.clock = clock
+
+        self.state = STATE_CLOSED
+        # (время, успех) запросов в окне
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+
+        self.rejected = 0
+        self.opened = 0
+
+    def _trim(self, now: float) -> None:
+        """Убрать из окна старые результаты"""
+        outcomes = self._outcomes
+        while outcomes and outcomes[0][0] <= now - self.window:
+            _, ok = outcomes.popleft()
+            if not ok:
+                self._failures -= 1
+
+    def allow(self) -> bool:
+        """Можно ли сейчас отправить запрос"""
+        if self.state == STATE_CLOSED:
+            return True
+
+        now = self.clock()
+        if self.state == STATE_OPEN and now - self._opened_at >= self.open_seconds:
+            self.state = STATE_HALF_OPEN
+            self._probe_in_flight = False
+            logger.info(f"Выключатель {self.name}: пробный запрос")
+
+        if self.state == STATE_HALF_OPEN and self._probe_in_flight and now - self._probe_started >= self.open_seconds:
+            logger.warning(f"Выключатель {self.name}: пробный запрос не завершился за {self.open_seconds:.0f} с")
+            self._open(now)
+            self.rejected += 1
+            return False
+
+        if self.state == STATE_HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            self._probe_started = now
+            return True
+
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        """Запрос прошёл (или сервер ответил, но повторять запрос бессмысленно)"""
+        if self.state != STATE_CLOSED:
+            logger.info(f"Выключатель {self.name}: модель снова отвечает, замыкаем")
+            self.state = STATE_CLOSED
+            self._outcomes.clear()
+            self._failures = 0
+            return
+        now = self.clock()
+        self._trim(now)
+        self._outcomes.append((now, True))
+
+    def record_failure(self) -> None:
+        """Запрос не прошёл: сетевая ошибка, таймаут, 429 или 5xx"""
+        now = self.clock()
+        if self.state == STATE_HALF_OPEN:
+            self._open(now)
+            return
+        if self.state == STATE_OPEN:
+            return
+
+        self._trim(now)
+        self._outcomes.append((now, False))
+        self._failures += 1
+        total = len(self._outcomes)
+        if total >= self.min_requests and self._failures / total >= self.failure_rate:
+            self._open(now)
+
+    def record_cancelled(self) -> None:
+        """Запрос отменён до ответа модели: результат неизвестен, пробный запрос можно повторить"""
+        if self.state == STATE_HALF_OPEN:
+            self._probe_in_flight = False
+
+    def _open(self, now: float) -> None:
+        self.state = STATE_OPEN
+        self._opened_at = now
+        self._probe_in_flight = False
+        self.opened += 1
+        logger.warning(f"Выключатель {self.name}: слишком много ошибок, запросы не отправляем {self.open_seconds:.0f} с")
+
+    def stats(self) -> dict:
+        """Состояние выключателя для логов и метрик"""
+        self._trim(self.clock())
+        return {
+            "state": self.state,
+            "requests": len(self._outcomes),
+            "failures": self._failures,
+            "rejected": self.rejected,
+            "opened": self.opened,
+        }
+
+
+class CircuitBreakers:
+    """Выключатели по моделям (создаются при первом обращении)"""
+
+    def __init__(self, factory: Callable[[str], CircuitBreaker] = CircuitBreaker):
+        self._factory = factory
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, model: str) -> CircuitBreaker:
+        breaker = self._breakers.get(model)
+        if breaker is None:
+            breaker = self._breakers[model] = self._factory(model)
+        return breaker
+
+    def stats(self) -> Dict[str, dict]:
+        return {model: breaker.stats() for model, breaker in self._breakers.items()}
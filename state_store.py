@@ -0,0 +1,407 @@
+"""Хранилище состояний диалога с пользователями
+
+StateStore ведёт себя как dict (user_id -> состояние), но хранит только
+активных пользователей:
+  - запись, к которой не обращались STATE_TTL секунд, удаляется;
+  - при превышении STATE_MAX_ENTRIES вытесняется давно не использованная запись.
+
+Записи лежат в OrderedDict в порядке последнего обращения. TTL у всех
+записей набора один, поэтому этот порядок совпадает с порядком истечения
+сроков: устаревшие записи всегда в начале и удаляются за O(1) каждая,
+без отдельной кучи сроков. Память - O(активных пользователей).
+
+Внешнее хранилище (StateBackend) необязательно. Если оно задано, состояние
+переживает перезапуск бота и доступно нескольким процессам, если один
+пользователь обслуживается одним процессом (см. dispatcher.py). Вытеснение
+из памяти при этом состояние не теряет.
+
+Обращения к словарю работают только с памятью и не ждут хранилища: запись,
+продление и удаление уходят в отдельный поток хранилища и выполняются там по
+порядку, так что медленный Redis или занятая база не останавливают event
+loop. Запись, которой нет в памяти (после перезапуска или вытеснения),
+читает aget - в том же потоке, после всех ранее отправленных записей.
+len() и перебор ключей видят только записи в памяти процесса.
+
+Хранилища: memory (только память), sqlite (таблица в DATABASE_PATH - общая
+для процессов одного сервера), redis (общее для нескольких серверов; нужен
+пакет redis).
+"""
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Hashable, Iterator, Optional, Tuple
+from config import (
+    DATABASE_PATH, DB_BUSY_TIMEOUT, REDIS_URL, STATE_BACKEND, STATE_KEY_PREFIX, STATE_MAX_ENTRIES, STATE_TTL
+)
+
+logger = logging.getLogger(__name__)
+
+
+class StateBackend:
+    """Внешнее хранилище состояний. Значения должны сериализоваться в JSON"""
+
+    def load(self, namespace: str, key: Hashable, now: float) -> Optional[Tuple[Any, float]]:
+        """Прочитать (значение, срок) или None, если записи нет или она устарела"""
+        raise NotImplementedError
+
+    def save(self, namespace: str, key: Hashable, value: Any, expires_at: float) -> None:
+        """Записать значение со сроком хранения"""
+        raise NotImplementedError
+
+    def touch(self, namespace: str, key: Hashable, expires_at: float) -> None:
+        """Продлить срок записи"""
+        raise NotImplementedError
+
+    def delete(self, namespace: str, key: Hashable) -> None:
+        """Удалить запись"""
+        raise NotImplementedError
+
+    def clear(self, namespace: str) -> None:
+        """Удалить все записи пространства имён"""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Закрыть соединение"""
+
+
+class SQLiteStateBackend(StateBackend):
+    """Состояния в таблице SQLite - переживают перезапуск бота"""
+
+    # Как часто (в записях) удалять устаревшие строки
+    PURGE_INTERVAL = 1000
+
+    def __init__(self, db_path: str = DATABASE_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._writes_since_purge = 0
+
+        self._conn = sqlite3.connect(db_path, timeout=DB_BUSY_TIMEOUT / 1000, check_same_thread=False)
+        with self._lock:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            # Состояние диалога не стоит fsync на каждое нажатие кнопки
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS conversation_state (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                ) WITHOUT ROWID
+            ''')
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_conversation_state_expires ON conversation_state(expires_at)'
+            )
+            self._conn.commit()
+
+    def load(self, namespace, key, now):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, expires_at FROM conversation_state WHERE namespace = ? AND key = ? AND expires_at > ?',
+                (namespace, str(key), now)
+            ).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def save(self, namespace, key, value, expires_at):
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO conversation_state (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)',
+                (namespace, str(key), json.dumps(value, ensure_ascii=False), expires_at)
+            )
+            self._writes_since_purge += 1
+            if self._writes_since_purge >= self.PURGE_INTERVAL:
+                self._writes_since_purge = 0
+                self._conn.execute('DELETE FROM conversation_state WHERE expires_at <= ?', (time.time(),))
+            self._conn.commit()
+
+    def touch(self, namespace, key, expires_at):
+        with self._lock:
+            self._conn.execute(
+                'UPDATE conversation_state SET expires_at = ? WHERE namespace = ? AND key = ?',
+                (expires_at, namespace, str(key))
+            )
+            self._conn.commit()
+
+    def delete(self, namespace, key):
+        with self._lock:
+            self._conn.execute('DELETE FROM conversation_state WHERE namespace = ? AND key = ?', (namespace, str(key)))
+            self._conn.commit()
+
+    def clear(self, namespace):
+        with self._lock:
+            self._conn.execute('DELETE FROM conversation_state WHERE namespace = ?', (namespace,))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class RedisStateBackend(StateBackend):
+    """Состояния в Redis - общие для процессов на разных серверах; сроки хранения ведёт сам Redis"""
+
+    # Сколько ключей удалять одной командой при очистке
+    DELETE_BATCH = 500
+
+    def __init__(self, client, prefix: str = STATE_KEY_PREFIX):
+        """
+        Args:
+            client: Клиент redis.Redis (или совместимый: get, set, pttl, pexpireat, delete, scan_iter)
+            prefix (str): Префикс ключей
+        """
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, namespace: str, key: Hashable) -> str:
+        return f"{self.prefix}{namespace}:{key}"
+
+    def load(self, namespace, key, now):
+        name = self._key(namespace, key)
+        raw = self.client.get(name)
+        if raw is None:
+            return None
+        ttl_ms = self.client.pttl(name)
+        if ttl_ms is None or ttl_ms <= 0:
+            return None
+        return json.loads(raw), now + ttl_ms / 1000
+
+    def save(self, namespace, key, value, expires_at):
+        self.client.set(self._key(namespace, key), json.dumps(value, ensure_ascii=False),
+                        pxat=int(expires_at * 1000))
+
+    def touch(self, namespace, key, expires_at):
+        self.client.pexpireat(self._key(namespace, key), int(expires_at * 1000))
+
+    def delete(self, namespace, key):
+        self.client.delete(self._key(namespace, key))
+
+    def clear(self, namespace):
+        batch = []
+        for name in self.client.scan_iter(match=f"{self.prefix}{namespace}:*"):
+            batch.append(name)
+            if len(batch) >= self.DELETE_BATCH:
+                self.client.delete(*batch)
+                batch = []
+        if batch:
+            self.client.delete(*batch)
+
+    def close(self):
+        self.client.close()
+
+
+class StateStore(MutableMapping):
+    """Словарь состояний с удалением неактивных записей и ограничением размера"""
+
+    def __init__(self, namespace: str, ttl: float = STATE_TTL, max_entries: int = STATE_MAX_ENTRIES,
+                 backend: Optional[StateBackend] = None, clock: Callable[[], float] = time.time):
+        """
+        Args:
+            namespace (str): Имя набора состояний во внешнем хранилище
+            ttl (float): Через сколько секунд без обращений запись удаляется
+            max_entries (int): Сколько записей держать в памяти
+            backend (Optional[StateBackend]): Внешнее хранилище; None - только память процесса
+            clock: Источник времени (для тестов)
+        """
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.backend = backend
+        self.clock = clock
+
+        # key -> (value, expires_at, срок во внешнем хранилище); порядок - от давно использованных к недавним.
+        # TTL у всех записей один, поэтому этот же порядок - порядок истечения сроков
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float, float]]" = OrderedDict()
+
+        # Один поток на набор: операции с хранилищем выполняются в порядке вызова
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if backend is not None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"state-{namespace}")
+
+        self.expired = 0
+        self.evicted = 0
+        self.backend_errors = 0
+
+    def _submit(self, func: Callable, *args: Any) -> None:
+        """Отправить операцию с внешним хранилищем в поток хранилища, не дожидаясь её"""
+        self._executor.submit(func, *args).add_done_callback(self._log_failure)
+
+    def _log_failure(self, future: Future) -> None:
+        error = future.exception()
+        if error is not None:
+            self.backend_errors += 1
+            logger.error(f"Хранилище состояний '{self.namespace}': операция не выполнена: {error}")
+
+    def flush(self) -> None:
+        """Дождаться выполнения всех отправленных в хранилище операций"""
+        if self._executor is not None:
+            self._executor.submit(lambda: None).result()
+
+    def _expire(self, now: float) -> None:
+        """Удалить записи с истёкшим сроком - они всегда в начале очереди"""
+        entries = self._entries
+        while entries:
+            key, entry = next(iter(entries.items()))
+            if entry[1] > now:
+                break
+            del entries[key]
+            self.expired += 1
+
+    def _store(self, key: Hashable, value: Any, expires_at: float) -> None:
+        """Положить запись в конец очереди, вытеснив лишние"""
+        self._entries[key] = (value, expires_at, expires_at)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evicted += 1
+
+    def _lookup(self, key: Hashable) -> Optional[Tuple[Any, float]]:
+        """Найти живую запись в памяти и продлить её срок"""
+        now = self.clock()
+        self._expire(now)
+        expires_at = now + self.ttl
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            saved_until = entry[2]
+            # Срок во внешнем хранилище продлеваем, только когда прошла половина TTL, -
+            # иначе каждое чтение стало бы записью
+            if self.backend is not None and expires_at - saved_until > self.ttl / 2:
+                self._submit(self.backend.touch, self.namespace, key, expires_at)
+                saved_until = expires_at
+            self._entries[key] = (entry[0], expires_at, saved_until)
+            self._entries.move_to_end(key)
+            return entry
+        return None
+
+    async def aget(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Получить состояние, при промахе в памяти - из внешнего хранилища
+
+        Args:
+            key (Hashable): Ключ (user_id)
+            default (Any): Значение, если записи нет
+
+        Returns:
+            Any: Состояние или default
+        """
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry[0]
+        if self.backend is None:
+            return default
+
+        loaded = await asyncio.get_running_loop().run_in_executor(
+            self._executor, self.backend.load, self.namespace, key, self.clock()
+        )
+        if loaded is None:
+            return default
+        # Пока читали, запись могла появиться в памяти - она новее
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry[0]
+
+        expires_at = self.clock() + self.ttl
+        self._store(key, loaded[0], expires_at)
+        self._submit(self.backend.touch, self.namespace, key, expires_at)
+        return loaded[0]
+
+    def __getitem__(self, key: Hashable) -> Any:
+        entry = self._lookup(key)
+        if entry is None:
+            raise KeyError(key)
+        return entry[0]
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._lookup(key)
+        return default if entry is None else entry[0]
+
+    def __contains__(self, key: object) -> bool:
+        return self._lookup(key) is not None
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        now = self.clock()
+        self._expire(now)
+        expires_at = now + self.ttl
+        self._store(key, value, expires_at)
+        if self.backend is not None:
+            self._submit(self.backend.save, self.namespace, key, value, expires_at)
+
+    def __delitem__(self, key: Hashable) -> None:
+        in_memory = self._entries.pop(key, None) is not None
+        if self.backend is not None:
+            self._submit(self.backend.delete, self.namespace, key)
+        elif not in_memory:
+            raise KeyError(key)
+
+    def pop(self, key: Hashable, *default: Any) -> Any:
+        entry = self._lookup(key)
+        if entry is None:
+            # Записи нет в памяти, но она может остаться во внешнем хранилище
+            if self.backend is not None:
+                self._submit(self.backend.delete, self.namespace, key)
+            if default:
+                return default[0]
+            raise KeyError(key)
+        del self[key]
+        return entry[0]
+
+    def __iter__(self) -> Iterator[Hashable]:
+        self._expire(self.clock())
+        return iter(list(self._entries))
+
+    def __len__(self) -> int:
+        self._expire(self.clock())
+        return len(self._entries)
+
+    def clear(self) -> None:
+        """Удалить все записи, в том числе во внешнем хранилище"""
+        self._entries.clear()
+        if self.backend is not None:
+            self._submit(self.backend.clear, self.namespace)
+
+
+def create_backend(name: str = STATE_BACKEND) -> Optional[StateBackend]:
+    """
+    Создать внешнее хранилище состояний по имени из конфигурации
+
+    Args:
+        name (str): memory - только память процесса, sqlite - таблица в DATABASE_PATH,
+            redis - сервер REDIS_URL
+
+    Returns:
+        Optional[StateBackend]: Хранилище или None для memory
+    """
+    if name == 'memory':
+        return None
+    if name == 'sqlite':
+        return SQLiteStateBackend()
+    if name == 'redis':
+        import redis
+        return RedisStateBackend(redis.Redis.from_url(REDIS_URL))
+    raise ValueError(f"Неизвестное хранилище состояний: {name}")
+
+
+_backend: Optional[StateBackend] = None
+_backend_created = False
+
+
+def get_state_backend() -> Optional[StateBackend]:
+    """Общее для всех наборов состояний внешнее хранилище (создаётся при первом обращении)"""
+    global _backend, _backend_created
+    if not _backend_created:
+        _backend = create_backend()
+        _backend_created = True
+        logger.info(f"Хранилище состояний диалога: {STATE_BACKEND}")
+    return _backend
+
+
+def create_state_store(namespace: str, ttl: float = STATE_TTL) -> StateStore:
+    """Набор состояний с хранилищем из конфигурации"""
+    return StateStore(namespace, ttl=ttl, backend=get_state_backend())
@@ -0,0 +1,51 @@
+"""Набор терминов для вопросов викторины
+
+Термины и определения хранятся в кортежах, а вопрос собирается выбором
+случайных индексов: random.sample по range выбирает k индексов за O(k),
+поэтому стоимость вопроса не зависит от размера набора.
+"""
+import random
+from typing import Iterable, List, Optional, Tuple
+
+# Сколько символов определения показывать в варианте ответа
+OPTION_MAX_LENGTH = 100
+
+
+class TermPool:
+    """Неизменяемый набор пар (термин, определение)"""
+
+    __slots__ = ("terms", "definitions")
+
+    def __init__(self, pairs: Iterable[Tuple[str, str]]):
+        """
+        Args:
+            pairs: Пары (термин, определение)
+        """
+        terms, definitions = [], []
+        for term, definition in pairs:
+            terms.append(term)
+            definitions.append(definition[:OPTION_MAX_LENGTH])
+        self.terms: Tuple[str, ...] = tuple(terms)
+        self.definitions: Tuple[str, ...] = tuple(definitions)
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def sample(self, distractors: int = 3, rng: random.Random = random) -> Optional[Tuple[str, str, List[str]]]:
+        """
+        Выбрать термин для вопроса и неправильные варианты ответа
+
+        Args:
+            distractors (int): Сколько неправильных вариантов нужно
+            rng: Генератор случайных чисел
+
+        Returns:
+            Optional[Tuple[str, str, List[str]]]: Термин, его определение и определения других
+                терминов (меньше distractors, если набор маленький); None для пустого набора
+        """
+        if not self.terms:
+            return None
+
+        picked = rng.sample(range(len(self.terms)), min(distractors + 1, len(self.terms)))
+        answer = picked[0]
+        return self.terms[answer], self.definitions[answer], [self.definitions[i] for i in picked[1:]]
@@ -0,0 +1,255 @@
+"""Тесты базы данных пользовательских словарей"""
+import threading
+import pytest
+
+
+@pytest.mark.unit
+class TestDatabaseManager:
+    """Тесты database.py"""
+
+    def test_save_and_read_words(self, tmp_path):
+        """Тест сохранения слова, счётчиков и статистики"""
+        from database import DatabaseManager
+
+        db = DatabaseManager(str(tmp_path / "bot.db"))
+        assert db.save_word(1, "Помещик", "Владелец поместья")
+        assert db.save_word(1, "помещик", "Владелец поместья")
+        assert db.save_word(1, "исправник", "Начальник уездной полиции")
+
+        words = db.get_user_dictionary(1)
+        assert {w['word'] for w in words} == {"помещик", "исправник"}
+        assert next(w for w in words if w['word'] == "помещик")['lookup_count'] == 2
+
+        stats = db.get_user_stats(1)
+        assert stats['total_lookups'] == 3
+        assert stats['unique_words'] == 2
+
+        assert db.clear_user_dictionary(1)
+        assert db.get_user_dictionary(1) == []
+        assert db.get_user_stats(1)['unique_words'] == 0
+        db.close()
+
+    def test_pool_uses_wal(self, tmp_path):
+        """Тест что соединения пула работают в режиме WAL"""
+        from database import DatabaseManager
+
+        db = DatabaseManager(str(tmp_path / "bot.db"))
+        with db.pool.reader() as conn:
+            assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        db.close()
+
+    def test_concurrent_writes_from_threads(self, tmp_path):
+        """Тест что одновременные записи из разных потоков не теряются"""
+        from database import DatabaseManager
+
+        db = DatabaseManager(str(tmp_path / "bot.db"))
+
+        def worker(user_id):
+            for i in range(20):
+                assert db.save_word(user_id, f"слово{i}", "объяснение")
+                db.get_user_dictionary(user_id)
+
+        threads = [threading.Thread(target=worker, args=(uid,)) for uid in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for uid in range(5):
+            assert db.get_user_stats(uid)['unique_words'] == 20
+        db.close()
+
+    def test_in_memory_database(self):
+        """Тест работы пула с базой в памяти"""
+        from database import DatabaseManager
+
+        db = DatabaseManager(":memory:")
+        assert db.save_word(1, "буди", "Будь")
+        assert db.get_user_dictionary(1)[0]['word'] == "буди"
+        db.close()
+
+
+@pytest.mark.unit
+class TestAsyncDatabase:
+    """Тесты асинхронного фасада над базой данных"""
+
+    @pytest.mark.asyncio
+    async def test_queries_run_off_event_loop(self, tmp_path):
+        """Тест что запросы выполняются не в потоке event loop"""
+        from database import AsyncDatabase, DatabaseManager
+
+        db = AsyncDatabase(DatabaseManager(str(tmp_path / "bot.db")))
+        threads = []
+        original = db.manager.get_user_dictionary
+
+        def spy(*args):
+            threads.append(threading.current_thread())
+            return original(*args)
+
+        db.manager.get_user_dictionary = spy
+
+        assert await db.save_word(1, "помещик", "Владелец поместья")
+        words = await db.get_user_dictionary(1)
+
+        assert words[0]['word'] == "помещик"
+        assert threads[0] is not threading.main_thread()
+        assert threads[0].name.startswith("db")
+        db.close()
+
+    @pytest.mark.asyncio
+    async def test_debug_mode_flags_blocking_calls(self, tmp_path, caplog):
+        """Тест что в режиме отладки запрос из event loop попадает в лог"""
+        from unittest.mock import patch
+        from database import AsyncDatabase, DatabaseManager
+
+        with patch('database.ASYNCIO_DEBUG', True):
+            db = AsyncDatabase(DatabaseManager(str(tmp_path / "bot.db")))
+            caplog.clear()
+
+            await db.get_user_dictionary(1)
+            assert "потоке event loop" not in caplog.text
+
+            db.manager.get_user_dictionary(1)
+            assert "потоке event loop" in caplog.text
+            db.close()
+
+
+@pytest.mark.unit
+class TestUniqueWordsCounter:
+    """Тесты инкрементального счётчика уникальных слов"""
+
+    def test_counter_maintained_by_triggers(self, tmp_path):
+        """Тест что счётчик меняется только при добавлении нового слова и удалении"""
+        from database import DatabaseManager
+
+        db = DatabaseManager(str(tmp_path / "bot.db"))
+        db.save_words_batch([(1, "помещик", "Владелец поместья", 2), (1, "исправник", "Начальник полиции", 1)])
+        db.save_word(1, "помещик", "Владелец поместья")
+        assert db.get_user_stats(1)['unique_words'] == 2
+
+        with db.pool.writer() as conn:
+            conn.execute("DELETE FROM user_dictionaries WHERE user_id = 1 AND word = 'исправник'")
+        assert db.get_user_stats(1)['unique_words'] == 1
+        db.close()
+
+    def test_lookup_does_not_count_dictionary(self, tmp_path):
+        """Тест что при сохранении слова словарь пользователя не пересчитывается"""
+        from database import DatabaseManager
+
+        db = DatabaseManager(str(tmp_path / "bot.db"))
+        db.save_words_batch([(1, f"слово{i}", "объяснение", 1) for i in range(50)])
+
+        statements = []
+        with db.pool.writer() as conn:
+            conn.set_trace_callback(statements.append)
+        db.save_word(1, "слово0", "объяснение")
+        with db.pool.writer() as conn:
+            conn.set_trace_callback(None)
+
+        assert not any("COUNT(" in sql.upper() for sql in statements)
+        db.close()
+
+    def test_repair_fixes_drift(self, tmp_path):
+        """Тест что проверка исправляет расхождения счётчика"""
+        from database import DatabaseManager
+
+        db = DatabaseManager(str(tmp_path / "bot.db"))
+        db.save_words_batch([(1, "помещик", "Владелец поместья", 1), (2, "буди", "Будь", 1)])
+        with db.pool.writer() as conn:
+            conn.execute("UPDATE user_stats SET unique_words = 10 WHERE user_id = 1")
+            conn.execute("DELETE FROM user_stats WHERE user_id = 2")
+
+        assert db.repair_unique_words() == 2
+        assert db.get_user_stats(1)['unique_words'] == 1
+        assert db.get_user_stats(2)['unique_words'] == 1
+        assert db.repair_unique_words() == 0
+        db.close()
+
+
+@pytest.mark.unit
+class TestDictionaryPagination:
+    """Тесты keyset-пагинации личного словаря"""
+
+    def test_pages_cover_dictionary_without_gaps(self, tmp_path):
+        """Тест что страницы вперёд и назад покрывают словарь без пропусков и повторов"""
+        from database import DatabaseManager
+
+        db = DatabaseManager(str(tmp_path / "bot.db"))
+        # Все слова с одинаковым last_lookup - порядок держится на id
+        db.save_words_batch([(1, f"слово{i}", "объяснение", 1) for i in range(25)])
+
+        pages = [db.get_user_dictionary_page(1, 10)]
+        while pages[-1]['has_next']:
+            last = pages[-1]['words'][-1]
+            pages.append(db.get_user_dictionary_page(1, 10, (last['last_lookup'], last['id']), 'next'))
+
+        words = [w['word'] for page in pages for w in page['words']]
+        assert len(words) == 25 and len(set(words)) == 25
+        assert [len(p['words']) for p in pages] == [10, 10, 5]
+        assert not pages[0]['has_prev'] and pages[2]['has_prev']
+
+        first = pages[2]['words'][0]
+        back = db.get_user_dictionary_page(1, 10, (first['last_lookup'], first['id']), 'prev')
+        assert back['words'] == pages[1]['words']
+        assert back['has_prev'] and back['has_next']
+        db.close()
+
+    def test_page_query_uses_index(self, tmp_path):
+        """Тест что страница читается по индексу без сортировки и без просмотра словаря"""
+        from database import DatabaseManager
+
+        db = DatabaseManager(str(tmp_path / "bot.db"))
+        with db.pool.reader() as conn:
+            plan = conn.execute('''
+                EXPLAIN QUERY PLAN
+                SELECT id, word, explanation, lookup_count, first_lookup, last_lookup
+                FROM user_dictionaries
+                WHERE user_id = ? AND (last_lookup, id) < (?, ?)
+                ORDER BY last_lookup DESC, id DESC LIMIT 11
+            ''', (1, '2024-01-01 00:00:00', 1)).fetchall()
+        details = " ".join(row[-1] for row in plan)
+        assert "idx_user_dictionaries_recent" in details
+        assert "TEMP B-TREE" not in details
+        assert "SCAN" not in details
+        db.close()
+
+
+@pytest.mark.unit
+class TestCsvExport:
+    """Тесты потокового экспорта словаря в CSV"""
+
+    def test_export_round_trip(self, tmp_path):
+        """Тест экранирования и чтения экспорта модулем csv"""
+        import csv
+        import io
+        from database import DatabaseManager
+
+        db = DatabaseManager(str(tmp_path / "bot.db"))
+        assert db.export_user_dictionary_csv(1) is None
+
+        tricky = 'Объяснение с "кавычками", запятыми\nи переносом строки'
+        db.save_words_batch([(1, "помещик", tricky, 1), (1, "буди", "Будь", 1)])
+
+        with db.export_user_dictionary_csv(1) as csv_file:
+            rows = list(csv.reader(io.TextIOWrapper(csv_file, encoding='utf-8-sig', newline='')))
+
+        assert rows[0][0] == "Слово"
+        assert len(rows) == 3
+        assert [row for row in rows if row[0] == "помещик"][0][1] == tricky
+        db.close()
+
+    def test_large_export_spills_to_disk(self, tmp_path):
+        """Тест что большой экспорт не ограничен 1000 строк и уходит из памяти на диск"""
+        from unittest.mock import patch
+        from database import DatabaseManager
+
+        db = DatabaseManager(str(tmp_path / "bot.db"))
+        db.save_words_batch([(1, f"слово{i}", "объяснение " * 10, 1) for i in range(1500)])
+
+        with patch('database.CSV_EXPORT_SPOOL_SIZE', 64 * 1024):
+            csv_file = db.export_user_dictionary_csv(1)
+
+        with csv_file:
+            assert csv_file._rolled
+            assert sum(1 for _ in csv_file) == 1501
+        db.close()
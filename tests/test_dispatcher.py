@@ -0,0 +1,99 @@
+"""Тесты многопроцессного режима"""
+import asyncio
+import queue
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+
+def make_update(update_id, user_id, text="слово"):
+    """JSON сообщения пользователя"""
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "Тест"},
+            "text": text,
+        }
+    }
+
+
+@pytest.mark.unit
+class TestDispatcher:
+    """Тесты dispatcher.py"""
+
+    def test_extract_user_key(self):
+        """Тест определения пользователя по JSON так же, как в PerUserUpdateProcessor"""
+        from dispatcher import extract_user_key
+
+        assert extract_user_key(make_update(1, 42)) == 42
+        assert extract_user_key({"update_id": 2, "callback_query": {
+            "id": "1", "from": {"id": 7}, "message": {"chat": {"id": 99}}}}) == 7
+        assert extract_user_key({"update_id": 3, "channel_post": {"chat": {"id": -100}}}) == -100
+        assert extract_user_key({"update_id": 4, "poll": {"id": "p"}}) is None
+
+    @pytest.mark.asyncio
+    async def test_dispatch_keeps_user_order(self):
+        """Тест что обновления пользователя попадают в один процесс в порядке поступления"""
+        import multiprocessing
+        from dispatcher import UpdateDispatcher
+
+        dispatcher = UpdateDispatcher(workers=3, queue_size=100, context=multiprocessing.get_context('fork'))
+        sent = [make_update(i, user_id) for i in range(30) for user_id in (10, 11, 12, -5)]
+        for data in sent:
+            await dispatcher.dispatch(data)
+
+        received = {}
+        for index, updates in enumerate(dispatcher.queues):
+            for _ in range(dispatcher.dispatched[index]):
+                data = updates.get(timeout=5)
+                received.setdefault(data["message"]["from"]["id"], set()).add(index)
+                received.setdefault(("order", data["message"]["from"]["id"]), []).append(data["update_id"])
+
+        for user_id in (10, 11, 12, -5):
+            assert received[user_id] == {user_id % 3}
+            assert received[("order", user_id)] == list(range(30))
+        assert sum(dispatcher.dispatched) == len(sent)
+
+    @pytest.mark.asyncio
+    async def test_full_queue_waits(self):
+        """Тест что при переполненной очереди обновление ждёт места, а не теряется"""
+        import multiprocessing
+        from dispatcher import UpdateDispatcher
+
+        dispatcher = UpdateDispatcher(workers=1, queue_size=1, context=multiprocessing.get_context('fork'))
+        await dispatcher.dispatch(make_update(1, 1))
+
+        pending = asyncio.create_task(dispatcher.dispatch(make_update(2, 1)))
+        await asyncio.sleep(0.05)
+        assert not pending.done()
+
+        assert (await asyncio.to_thread(dispatcher.queues[0].get, True, 5))["update_id"] == 1
+        await asyncio.wait_for(pending, 5)
+        assert dispatcher.queues[0].get(timeout=5)["update_id"] == 2
+        assert dispatcher.waited == 1
+
+    @pytest.mark.asyncio
+    async def test_serve_worker(self):
+        """Тест что процесс-обработчик передаёт обновления приложению и останавливается по сигналу"""
+        from dispatcher import serve_worker
+
+        application = MagicMock()
+        application.bot = MagicMock()
+        application.update_queue = asyncio.Queue()
+        application.start = AsyncMock()
+        application.stop = AsyncMock()
+        application.post_init = AsyncMock()
+        application.post_shutdown = AsyncMock()
+
+        updates = queue.Queue()
+        updates.put(make_update(1, 42, "помещик"))
+        updates.put(None)
+
+        await asyncio.wait_for(serve_worker(application, updates), 5)
+
+        assert application.update_queue.get_nowait().message.text == "помещик"
+        application.post_init.assert_awaited_once()
+        application.stop.assert_awaited_once()
+        application.post_shutdown.assert_awaited_once()
@@ -0,0 +1,112 @@
+"""Тесты для кэша объяснений LLM"""
+import pytest
+from unittest.mock import patch
+
+
+@pytest.mark.unit
+class TestExplanationCache:
+    """Тесты explanation_cache.py"""
+
+    def test_memory_hit_and_counters(self, tmp_path):
+        """Тест попадания в LRU и счётчиков"""
+        from explanation_cache import ExplanationCache
+
+        cache = ExplanationCache(db_path=str(tmp_path / "cache.db"))
+        key = cache.make_key('explain_word', 'помещик', 'model', 1)
+
+        assert cache.get(key) is None
+        cache.set(key, "Владелец поместья")
+        assert cache.get(key) == "Владелец поместья"
+
+        stats = cache.get_stats()
+        assert stats['memory_hits'] == 1
+        assert stats['misses'] == 1
+        cache.close()
+
+    def test_disk_tier_survives_restart(self, tmp_path):
+        """Тест что ответы сохраняются в SQLite между перезапусками"""
+        from explanation_cache import ExplanationCache
+
+        db_path = str(tmp_path / "cache.db")
+        first = ExplanationCache(db_path=db_path)
+        key = first.make_key('explain_word', 'исправник', 'model', 1)
+        first.set(key, "Начальник уездной полиции")
+        first.close()
+
+        second = ExplanationCache(db_path=db_path)
+        assert second.get(key) == "Начальник уездной полиции"
+        assert second.get_stats()['disk_hits'] == 1
+        # Вторая выборка уже из памяти
+        assert second.get(key) == "Начальник уездной полиции"
+        assert second.get_stats()['memory_hits'] == 1
+        second.close()
+
+    def test_key_normalization_and_versioning(self):
+        """Тест нормализации ввода и учёта модели/версии промпта в ключе"""
+        from explanation_cache import ExplanationCache
+
+        key = ExplanationCache.make_key('explain_word', '  Шапочный   Разбор ', 'm', 1)
+        assert key == ExplanationCache.make_key('explain_word', 'шапочный разбор', 'm', 1)
+        assert key != ExplanationCache.make_key('explain_word', 'шапочный разбор', 'm', 2)
+        assert key != ExplanationCache.make_key('explain_word', 'шапочный разбор', 'other', 1)
+        assert key != ExplanationCache.make_key('explain_phrase', 'шапочный разбор', 'm', 1)
+
+    def test_ttl_expiry(self, tmp_path):
+        """Тест что устаревшие записи не отдаются"""
+        from explanation_cache import ExplanationCache
+
+        cache = ExplanationCache(db_path=str(tmp_path / "cache.db"), ttl=60)
+        key = cache.make_key('explain_word', 'буди', 'model', 1)
+
+        with patch('explanation_cache.time.time', return_value=1000.0):
+            cache.set(key, "Будь")
+        with patch('explanation_cache.time.time', return_value=1061.0):
+            assert cache.get(key) is None
+        cache.close()
+
+    def test_lru_and_size_eviction(self, tmp_path):
+        """Тест вытеснения из памяти и ограничения размера таблицы"""
+        from explanation_cache import ExplanationCache
+
+        cache = ExplanationCache(db_path=str(tmp_path / "cache.db"), memory_size=2, max_rows=3)
+        keys = [cache.make_key('explain_word', f'слово{i}', 'model', 1) for i in range(5)]
+        for i, key in enumerate(keys):
+            with patch('explanation_cache.time.time', return_value=1000.0 + i):
+                cache.set(key, f"объяснение {i}")
+
+        assert cache.get_stats()['memory_entries'] == 2
+
+        with patch('explanation_cache.time.time', return_value=1010.0):
+            cache.evict()
+        count = cache._conn.execute('SELECT COUNT(*) FROM llm_cache').fetchone()[0]
+        assert count == 3
+        # Самые старые записи удалены
+        with patch('explanation_cache.time.time', return_value=1010.0):
+            assert cache.get(keys[0]) is None
+            assert cache.get(keys[4]) == "объяснение 4"
+        cache.close()
+
+    @pytest.mark.asyncio
+    async def test_llm_service_answers_repeats_from_cache(self, tmp_path):
+        """Тест что повторный запрос не уходит в API"""
+        import httpx
+        from explanation_cache import ExplanationCache
+        from llm_service import LLMService
+
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(200, json={"choices": [{"message": {"content": "Владелец поместья"}}]})
+
+        cache = ExplanationCache(db_path=str(tmp_path / "cache.db"))
+        service = LLMService("test_key", http2=False, cache=cache)
+        await service.close()
+        service.client = httpx.AsyncClient(base_url=service.base_url, transport=httpx.MockTransport(handler))
+
+        assert await service.explain_word("помещик") == "Владелец поместья"
+        assert await service.explain_word("Помещик") == "Владелец поместья"
+        assert len(calls) == 1
+
+        await service.close()
+        cache.close()
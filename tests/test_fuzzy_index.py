@@ -0,0 +1,146 @@
+"""Тесты нечёткого поиска терминов"""
+import pytest
+
+
+@pytest.mark.unit
+class TestFuzzyIndex:
+    """Тесты fuzzy_index.py"""
+
+    def test_distance_matches_reference(self):
+        """Тест битово-параллельного расстояния на известных парах"""
+        from fuzzy_index import damerau_levenshtein
+
+        assert damerau_levenshtein("исправник", "исправник", 2) == 0
+        assert damerau_levenshtein("исправник", "исправнк", 2) == 1
+        assert damerau_levenshtein("исправник", "испарвник", 2) == 1
+        assert damerau_levenshtein("ca", "abc", 5) == 3
+        assert damerau_levenshtein("", "abc", 5) == 3
+        assert damerau_levenshtein("помещик", "дворянин", 2) == 3
+
+    def test_typos_are_found(self):
+        """Тест поиска с заменой, пропуском, вставкой и перестановкой букв"""
+        from fuzzy_index import FuzzyIndex
+
+        index = FuzzyIndex(["Исправник", "помещик", "метафора", "ямщик"])
+
+        assert index.best_match("исправнек") == "Исправник"
+        assert index.best_match("испрвник") == "Исправник"
+        assert index.best_match("помещики") == "помещик"
+        assert index.best_match("мтеафора") == "метафора"
+        assert index.best_match("ИСПРАВНИК") == "Исправник"
+        assert index.best_match("совсемдругое") is None
+
+    def test_results_are_ranked(self):
+        """Тест что результаты отсортированы по числу правок"""
+        from fuzzy_index import FuzzyIndex
+
+        index = FuzzyIndex(["кот", "кит", "крот", "котел", "кортеж"])
+
+        # При равном числе правок выше термин с большим числом общих n-грамм
+        assert index.search("кот", limit=3) == [("кот", 0), ("крот", 1), ("кит", 1)]
+        assert index.search("котёл", limit=2) == [("котел", 0), ("кортеж", 2)]
+
+    def test_short_words_allow_one_edit(self):
+        """Тест что в коротких словах допускается только одна правка"""
+        from fuzzy_index import FuzzyIndex
+
+        index = FuzzyIndex(["ямщик", "дом"])
+
+        assert index.best_match("дим") == "дом"
+        assert index.best_match("дмы") is None
+        assert index.search("ямшек") == [("ямщик", 2)]
+
+    def test_short_words_with_transpositions(self):
+        """Тест опечаток, после которых у слов не остаётся общих n-грамм"""
+        from fuzzy_index import FuzzyIndex
+
+        index = FuzzyIndex(["дезвг", "аб"])
+
+        assert index.search("едзгв") == [("дезвг", 2)]
+        assert index.search("ба") == [("аб", 1)]
+
+    def test_index_matches_linear_scan(self):
+        """Тест что индекс находит те же термины, что и полный перебор"""
+        import random
+        from fuzzy_index import FuzzyIndex, damerau_levenshtein
+
+        rng = random.Random(7)
+        alphabet = "абвгде"
+
+        def mutate(word):
+            for _ in range(rng.randint(1, 3)):
+                position = rng.randrange(len(word) + 1)
+                edit = rng.choice("isdt")
+                if edit == "i":
+                    word = word[:position] + rng.choice(alphabet) + word[position:]
+                elif edit == "s" and position < len(word):
+                    word = word[:position] + rng.choice(alphabet) + word[position + 1:]
+                elif edit == "d" and position < len(word) and len(word) > 1:
+                    word = word[:position] + word[position + 1:]
+                elif edit == "t" and position + 1 < len(word):
+                    word = word[:position] + word[position + 1] + word[position] + word[position + 2:]
+            return word
+
+        terms = sorted({"".join(rng.choice(alphabet) for _ in range(rng.randint(2, 9))) for _ in range(400)})
+        index = FuzzyIndex(terms)
+        for _ in range(300):
+            query = mutate(rng.choice(terms))
+            limit = index.distance_limit(query)
+            expected = {(term, distance) for term in terms
+                        if (distance := damerau_levenshtein(query, term, limit)) <= limit}
+            assert set(index.search(query, limit=len(terms))) == expected, query
+
+    def test_literary_data_uses_index(self):
+        """Тест поиска термина базы с опечаткой"""
+        from literary_data import get_word_definition, search_similar_words, LITERARY_TERMS
+
+        assert get_word_definition("исправнк") is LITERARY_TERMS["исправник"]
+        assert get_word_definition("несуществующееслово12345") is None
+        assert "помещик" in search_similar_words("помешик")
+
+    def test_real_words_are_not_typos(self):
+        """Тест что женские и производные формы терминов не принимаются за опечатки"""
+        from unittest.mock import patch
+        from literary_data import find_term
+
+        assert find_term("исправник") == ("исправник", False)
+        assert find_term("исправнк") == ("исправник", True)
+        assert find_term("помешик") == ("помещик", True)
+        for word in ("барыня", "помещица", "крестьянка", "исправница"):
+            assert find_term(word) == (None, False)
+        # Короткие слова не исправляются: в них одна правка даёт другое слово
+        assert find_term("барн") == (None, False)
+
+        # Словарное слово в одной правке от термина - тоже не опечатка
+        with patch('literary_data.is_known_word', lambda word: word == "помещиу"):
+            assert find_term("помещиу") == (None, False)
+
+    @pytest.mark.asyncio
+    async def test_word_handler_asks_llm_before_suggesting(self):
+        """Тест что слово сначала объясняет LLM, а похожий термин базы - только подсказка без сохранения"""
+        from unittest.mock import AsyncMock, MagicMock, patch
+        from handlers.word_handler import explain_word
+
+        def make_update():
+            update = MagicMock()
+            update.effective_user.id = 7
+            update.message.reply_text = AsyncMock()
+            return update
+
+        save = AsyncMock()
+        with patch('handlers.word_handler.initialize_llm_service', return_value=True), \
+             patch('handlers.word_handler.generate_word_explanation', AsyncMock(return_value="Жена исправника")), \
+             patch('handlers.word_handler.save_word', save):
+            update = make_update()
+            await explain_word(update, MagicMock(), "исправница")
+        save.assert_awaited_once_with(7, "исправница", "Жена исправника")
+        assert "Возможно" not in update.message.reply_text.await_args[0][0]
+
+        save = AsyncMock()
+        with patch('handlers.word_handler.initialize_llm_service', return_value=True), \
+             patch('handlers.word_handler.generate_word_explanation', AsyncMock(return_value=None)), \
+             patch('handlers.word_handler.save_word', save):
+            update = make_update()
+            await explain_word(update, MagicMock(), "исправнк")
+        save.assert_not_awaited()
+        assert "«исправник»" in update.message.reply_text.await_args[0][0]
@@ -121,6 +121,32 @@ class TestCallbackHandler:
         mock_update.callback_query.answer.assert_called_once()
         mock_update.callback_query.message.reply_text.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_dictionary_page_callback(self, mock_update, mock_context):
+        """Тест перелистывания словаря кнопкой"""
+        from unittest.mock import AsyncMock, patch
+
+        mock_update.callback_query.data = "dict_next|2024-01-01 10:00:00|42"
+        mock_update.callback_query.edit_message_text = AsyncMock()
+        page = {
+            'words': [{'id': 41, 'word': 'помещик', 'explanation': 'Владелец поместья',
+                       'lookup_count': 2, 'last_lookup': '2024-01-01 09:00:00'}],
+            'has_next': False, 'has_prev': True
+        }
+
+        with patch('handlers.dictionary_handler.get_user_dictionary_page', AsyncMock(return_value=page)) as get_page, \
+                patch('handlers.dictionary_handler.get_user_stats', AsyncMock(return_value={'unique_words': 11})):
+            from handlers.callback_handler import handle_callback
+            await handle_callback(mock_update, mock_context)
+
+        get_page.assert_called_once_with(123456789, 10, ('2024-01-01 10:00:00', 42), 'next')
+        text = mock_update.callback_query.edit_message_text.call_args[0][0]
+        assert "помещик" in text and "11" in text
+
+        keyboard = mock_update.callback_query.edit_message_text.call_args[1]['reply_markup']
+        navigation = [button.callback_data for button in keyboard.inline_keyboard[0]]
+        assert navigation == ["dict_prev|2024-01-01 09:00:00|41"]
+
 
 @pytest.mark.unit
 class TestStartHandler:
@@ -168,3 +194,73 @@ class TestStateManagement:
         # Очистим
         USER_STATES.clear()
         assert len(USER_STATES) == 0
+
+
+@pytest.mark.unit
+class TestStreaming:
+    """Тесты потокового вывода ответа (handlers/streaming.py)"""
+
+    @pytest.mark.asyncio
+    async def test_stream_to_message_throttles_edits(self):
+        """Тест что сообщение правится по мере генерации, но не чаще заданного интервала"""
+        from unittest.mock import AsyncMock
+        from handlers.streaming import stream_to_message
+
+        message = MagicMock()
+        message.edit_text = AsyncMock()
+
+        async def chunks():
+            for part in ["Жил-был ", "помещик", ". Конец."]:
+                yield part
+
+        # Без ограничения - правка на каждый фрагмент
+        text, complete = await stream_to_message(message, chunks(), "📝 ", min_interval=0)
+        assert text == "Жил-был помещик. Конец."
+        assert complete
+        assert message.edit_text.await_count == 3
+        assert message.edit_text.await_args_list[0][0][0].startswith("📝 Жил-был")
+
+        # С большим интервалом показывается только первый фрагмент - сразу, без ожидания,
+        # остальное отправит обработчик финальным ответом
+        message.edit_text.reset_mock()
+        text, _ = await stream_to_message(message, chunks(), "📝 ", min_interval=60)
+        assert text == "Жил-был помещик. Конец."
+        message.edit_text.assert_awaited_once()
+        assert message.edit_text.await_args[0][0].startswith("📝 Жил-был")
+
+    @pytest.mark.asyncio
+    async def test_finish_message_falls_back_to_new_message(self):
+        """Тест что при невозможности правки ответ отправляется новым сообщением"""
+        from unittest.mock import AsyncMock
+        from telegram.error import BadRequest
+        from handlers.streaming import finish_message
+
+        placeholder = MagicMock()
+        placeholder.edit_text = AsyncMock(side_effect=BadRequest("Message to edit not found"))
+        source = MagicMock()
+        source.reply_text = AsyncMock()
+
+        await finish_message(placeholder, source, "Готово")
+
+        source.reply_text.assert_awaited_once_with("Готово", reply_markup=None)
+
+    @pytest.mark.asyncio
+    async def test_interrupted_stream_is_marked(self):
+        """Тест что оборванный поток возвращает накопленный текст, а финальный ответ получает пометку"""
+        from unittest.mock import AsyncMock
+        from llm_service import IncompleteStreamError
+        from handlers.streaming import INCOMPLETE_NOTE, finish_message, stream_to_message
+
+        message = MagicMock()
+        message.edit_text = AsyncMock()
+
+        async def chunks():
+            yield "Жил-был "
+            raise IncompleteStreamError("connection reset")
+
+        text, complete = await stream_to_message(message, chunks(), "📝 ", min_interval=60)
+        assert text == "Жил-был"
+        assert not complete
+
+        await finish_message(message, MagicMock(), text, complete=complete)
+        message.edit_text.assert_awaited_with("Жил-был" + INCOMPLETE_NOTE, reply_markup=None)
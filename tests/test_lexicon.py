@@ -0,0 +1,81 @@
+"""Тесты файла словаря терминов и фраз"""
+import json
+import os
+import pytest
+
+
+def write_sources(directory, terms, phrases):
+    """Записать исходные JSON словаря"""
+    with open(os.path.join(directory, "literary_terms.json"), "w", encoding="utf-8") as f:
+        json.dump(terms, f, ensure_ascii=False)
+    with open(os.path.join(directory, "literary_phrases.json"), "w", encoding="utf-8") as f:
+        json.dump(phrases, f, ensure_ascii=False)
+
+
+@pytest.mark.unit
+class TestLexicon:
+    """Тесты lexicon.py"""
+
+    def test_table_reads_lazily(self, tmp_path):
+        """Тест что файл открывается при первом обращении, а записи читаются по ключу"""
+        from lexicon import Lexicon
+
+        write_sources(tmp_path, {"Оброк": {"definition": "Подать"}, "уезд": {"definition": "Округ"}},
+                      {"выдать головой": {"explanation": "Предать"}})
+        lexicon = Lexicon(str(tmp_path / "lexicon.db"), str(tmp_path))
+
+        try:
+            assert lexicon._conn is None
+            assert not os.path.exists(tmp_path / "lexicon.db")
+
+            assert lexicon.terms["оброк"] == {"definition": "Подать"}
+            assert lexicon.terms.get("барщина") is None
+            assert "уезд" in lexicon.terms
+            assert list(lexicon.terms) == ["оброк", "уезд"]
+            assert len(lexicon.terms) == 2
+            assert dict(lexicon.terms.iter_items())["уезд"] == {"definition": "Округ"}
+            assert lexicon.phrase_by_normalized("выдать головой") == "выдать головой"
+            assert lexicon.terms_containing("уездный", 5) == ["уезд"]
+        finally:
+            lexicon.close()
+
+    def test_rebuilds_when_sources_change(self, tmp_path):
+        """Тест пересборки файла после изменения исходных JSON"""
+        from lexicon import Lexicon
+
+        path = str(tmp_path / "lexicon.db")
+        write_sources(tmp_path, {"оброк": {"definition": "Подать"}}, {})
+        first = Lexicon(path, str(tmp_path))
+        assert len(first.terms) == 1
+        first.close()
+
+        write_sources(tmp_path, {"оброк": {"definition": "Подать"}, "барщина": {"definition": "Работа"}}, {})
+        os.utime(tmp_path / "literary_terms.json", ns=(1, 1))
+        second = Lexicon(path, str(tmp_path))
+        try:
+            assert second.terms["барщина"] == {"definition": "Работа"}
+        finally:
+            second.close()
+
+    def test_lemma_lookup(self, tmp_path):
+        """Тест поиска термина по начальной форме, посчитанной при сборке"""
+        from lexicon import Lexicon, build_lexicon
+
+        write_sources(tmp_path, {"дворяне": {"definition": "Сословие"}}, {})
+        path = str(tmp_path / "lexicon.db")
+        build_lexicon(path, str(tmp_path), lemmatize_func=lambda text: "дворянин" if text == "дворяне" else text)
+        lexicon = Lexicon(path, source_dir=None)
+
+        try:
+            assert lexicon.term_by_lemma("дворянин") == "дворяне"
+            assert lexicon.term_by_lemma("помещик") is None
+        finally:
+            lexicon.close()
+
+    def test_literary_data_reads_lexicon(self):
+        """Тест что база бота читается из файла словаря"""
+        from literary_data import LITERARY_TERMS, get_literary_terms, get_phrase_explanation
+
+        assert LITERARY_TERMS["помещик"]["definition"].startswith("Владелец поместья")
+        assert {"term": "уезд", "definition": LITERARY_TERMS["уезд"]["definition"]} in get_literary_terms()
+        assert get_phrase_explanation("Выдать головой!")["modern_paraphrase"] == "предать кого-то"
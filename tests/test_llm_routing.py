@@ -0,0 +1,244 @@
+"""Тесты маршрутизации запросов к LLM по операциям"""
+import json
+import pytest
+
+
+def make_service(handler, **kwargs):
+    """LLMService с подменённым транспортом и маршрутами по умолчанию"""
+    import httpx
+    from llm_service import LLMService
+    from llm_routing import RoutingTable
+    from resilience import RetryPolicy
+
+    kwargs.setdefault("routes", RoutingTable())
+    kwargs.setdefault("retry_policy", RetryPolicy(attempts=1))
+    service = LLMService("test_key", http2=False, **kwargs)
+    service.client = httpx.AsyncClient(base_url=service.base_url, transport=httpx.MockTransport(handler))
+    return service
+
+
+def completion(text, usage=None):
+    import httpx
+    body = {"choices": [{"message": {"content": text}}]}
+    if usage is not None:
+        body["usage"] = usage
+    return httpx.Response(200, json=body)
+
+
+@pytest.mark.unit
+class TestRoutingTable:
+    """Тесты Route и RoutingTable"""
+
+    def test_route_validation(self):
+        """Тест проверки параметров и цепочки моделей"""
+        from llm_routing import Route
+
+        route = Route("fast", max_tokens=300, timeout=15, fallbacks=["large", "fast", "large"])
+        assert route.models == ("fast", "large")
+
+        changed = route.replace(timeout=60)
+        assert changed.timeout == 60 and route.timeout == 15
+
+        for changes in ({"max_tokens": 0}, {"timeout": -1}, {"model": ""}, {"fallbacks": "large"}, {"size": 1}):
+            with pytest.raises(ValueError):
+                route.replace(**changes)
+
+    def test_configure_at_runtime(self):
+        """Тест изменения маршрута на ходу и маршрута по умолчанию для новых операций"""
+        from llm_routing import DEFAULT_ROUTE, Route, RoutingTable
+
+        table = RoutingTable({DEFAULT_ROUTE: Route("fast"), "retell_text": Route("large", max_tokens=1200)})
+        assert table.get("unknown").model == "fast"
+
+        table.configure("retell_text", model="huge", fallbacks=["large"])
+        assert table.get("retell_text").models == ("huge", "large")
+        assert table.get("retell_text").max_tokens == 1200
+
+        table.configure("summary", max_tokens=50)
+        assert table.get("summary").model == "fast"
+
+        with pytest.raises(ValueError):
+            RoutingTable({"retell_text": Route("large")})
+
+    def test_load_is_all_or_nothing(self):
+        """Тест что ошибка в одном маршруте не применяет и остальные"""
+        from llm_routing import RoutingTable
+
+        table = RoutingTable()
+        before = table.get("explain_word").to_dict()
+
+        with pytest.raises(ValueError):
+            table.load({"explain_word": {"timeout": 5}, "retell_text": {"timeout": 0}})
+        assert table.get("explain_word").to_dict() == before
+
+        table.load(json.dumps({"explain_word": {"timeout": 5}}))
+        assert table.get("explain_word").timeout == 5
+
+    def test_cost_and_stats(self):
+        """Тест стоимости по ответу API и по таблице цен, перцентилей задержки"""
+        from llm_routing import RoutingTable, parse_prices
+
+        table = RoutingTable(prices=parse_prices('{"fast": [1, 2]}'))
+        assert table.cost("fast", {"prompt_tokens": 1000, "completion_tokens": 500}) == pytest.approx(0.002)
+        assert table.cost("fast", {"prompt_tokens": 1000, "cost": 0.5}) == 0.5
+        assert table.cost("unknown", {"prompt_tokens": 1000}) == 0
+
+        for latency in range(1, 101):
+            table.record("explain_word", latency / 1000, "fast", fallback=latency > 90)
+        table.record("explain_word", 0.2, None)
+        table.record_usage("explain_word", "fast", {"prompt_tokens": 1000, "completion_tokens": 500})
+
+        stats = table.stats()["explain_word"]
+        assert stats["requests"] == 101
+        assert stats["failures"] == 1
+        assert stats["fallbacks"] == 10
+        assert stats["answered_by"] == {"fast": 100}
+        assert stats["latency_p50_ms"] == 51
+        assert stats["latency_p95_ms"] == 96
+        assert stats["cost_usd"] == pytest.approx(0.002)
+
+
+@pytest.mark.unit
+class TestLLMServiceRouting:
+    """Тесты маршрутизации в LLMService"""
+
+    @pytest.mark.asyncio
+    async def test_operations_use_their_routes(self):
+        """Тест что у слова и пересказа разные модели и бюджеты токенов"""
+        from llm_routing import DEFAULT_ROUTE, Route, RoutingTable
+
+        payloads = []
+
+        def handler(request):
+            payloads.append(json.loads(request.content))
+            return completion("Ответ")
+
+        routes = RoutingTable({
+            DEFAULT_ROUTE: Route("fast"),
+            "explain_word": Route("fast", max_tokens=300),
+            "retell_text": Route("large", max_tokens=1200),
+        })
+        service = make_service(handler, routes=routes)
+
+        await service.explain_word("помещик")
+        await service.retell_text("Длинный текст")
+        assert [(p["model"], p["max_tokens"]) for p in payloads] == [("fast", 300), ("large", 1200)]
+        await service.close()
+
+    @pytest.mark.asyncio
+    async def test_fallback_chain_and_counters(self):
+        """Тест перехода на запасную модель и учёта токенов и стоимости"""
+        import httpx
+        from llm_routing import DEFAULT_ROUTE, Route, RoutingTable
+
+        models = []
+
+        def handler(request):
+            model = json.loads(request.content)["model"]
+            models.append(model)
+            if model == "fast":
+                return httpx.Response(503)
+            return completion("Ответ запасной модели", {"prompt_tokens": 100, "completion_tokens": 50, "cost": 0.001})
+
+        routes = RoutingTable({DEFAULT_ROUTE: Route("fast"),
+                               "explain_phrase": Route("fast", fallbacks=["large"])})
+        service = make_service(handler, routes=routes)
+
+        assert await service.explain_phrase("к шапочному разбору") == "Ответ запасной модели"
+        assert models == ["fast", "large"]
+
+        stats = routes.stats()["explain_phrase"]
+        assert stats["requests"] == 1 and stats["fallbacks"] == 1
+        assert stats["answered_by"] == {"large": 1}
+        assert stats["completion_tokens"] == 50
+        assert stats["cost_usd"] == pytest.approx(0.001)
+        await service.close()
+
+    @pytest.mark.asyncio
+    async def test_route_change_bypasses_old_cache(self):
+        """Тест что после смены модели маршрута ответ прежней модели не берётся из кэша"""
+        from explanation_cache import ExplanationCache
+
+        models = []
+
+        def handler(request):
+            model = json.loads(request.content)["model"]
+            models.append(model)
+            return completion(f"Ответ {model}")
+
+        service = make_service(handler, cache=ExplanationCache(db_path=":memory:"))
+
+        first = await service.characterize_hero("Онегин")
+        assert await service.characterize_hero("Онегин") == first
+        service.routes.configure("characterize_hero", model="other/model", fallbacks=[])
+        assert await service.characterize_hero("Онегин") == "Ответ other/model"
+        assert len(models) == 2
+        service.cache.close()
+        await service.close()
+
+    @pytest.mark.asyncio
+    async def test_fallback_answers_are_not_cached(self):
+        """Тест что ответ запасной модели не сохраняется под ключом основной"""
+        import httpx
+        from explanation_cache import ExplanationCache
+        from llm_routing import DEFAULT_ROUTE, Route, RoutingTable
+
+        sse_body = ('data: {"choices": [{"delta": {"content": "Пересказ"}, "finish_reason": "stop"}]}\n\n'
+                    'data: [DONE]\n\n')
+        models = []
+        primary_up = False
+
+        def handler(request):
+            payload = json.loads(request.content)
+            models.append(payload["model"])
+            if payload["model"] == "fast" and not primary_up:
+                return httpx.Response(503)
+            if payload.get("stream"):
+                return httpx.Response(200, text=sse_body, headers={"Content-Type": "text/event-stream"})
+            return completion(f"Ответ {payload['model']}")
+
+        routes = RoutingTable({DEFAULT_ROUTE: Route("fast", fallbacks=["large"])})
+        service = make_service(handler, routes=routes, cache=ExplanationCache(db_path=":memory:"))
+
+        assert await service.characterize_hero("Онегин") == "Ответ large"
+        assert [chunk async for chunk in service.stream_retelling("Текст")] == ["Пересказ"]
+
+        # Основная модель вернулась - её ответ и попадает в кэш
+        primary_up = True
+        models.clear()
+        assert await service.characterize_hero("Онегин") == "Ответ fast"
+        assert await service.characterize_hero("Онегин") == "Ответ fast"
+        assert [chunk async for chunk in service.stream_retelling("Текст")] == ["Пересказ"]
+        assert models == ["fast", "fast"]
+        service.cache.close()
+        await service.close()
+
+    @pytest.mark.asyncio
+    async def test_stream_falls_back_before_first_chunk(self):
+        """Тест что поток переходит на запасную модель, если основная ничего не прислала"""
+        import httpx
+        from llm_routing import DEFAULT_ROUTE, Route, RoutingTable
+
+        sse_body = ('data: {"choices": [{"delta": {"content": "Текст"}}]}\n\n'
+                    'data: {"choices": [], "usage": {"prompt_tokens": 10, "completion_tokens": 2}}\n\n'
+                    'data: [DONE]\n\n')
+        models = []
+
+        def handler(request):
+            model = json.loads(request.content)["model"]
+            models.append(model)
+            if model == "fast":
+                return httpx.Response(400, text="model not found")
+            return httpx.Response(200, text=sse_body, headers={"Content-Type": "text/event-stream"})
+
+        routes = RoutingTable({DEFAULT_ROUTE: Route("fast"),
+                               "retell_text": Route("fast", fallbacks=["large"])})
+        service = make_service(handler, routes=routes)
+
+        chunks = [chunk async for chunk in service.stream_retelling("Текст")]
+        assert chunks == ["Текст"]
+        assert models == ["fast", "large"]
+
+        stats = routes.stats()["retell_text"]
+        assert stats["fallbacks"] == 1 and stats["prompt_tokens"] == 10
+        await service.close()
@@ -24,7 +24,8 @@ class TestLLMService:
             result = initialize_llm_service()
             assert result is False
 
-    def test_generate_word_explanation_success(self):
+    @pytest.mark.asyncio
+    async def test_generate_word_explanation_success(self):
         """Тест успешного объяснения слова - функция должна вернуть объяснение из API"""
         from llm_service import generate_word_explanation
 
@@ -47,7 +48,7 @@ class TestLLMService:
             mock_client.post = AsyncMock(return_value=mock_response)
 
             with patch.dict('os.environ', {'OPENROUTER_API_KEY': 'test_key'}):
-                result = generate_word_explanation("метафора")
+                result = await generate_word_explanation("метафора")
 
                 # Проверяем что функция не падает и что-то возвращает
                 assert result is not None
@@ -56,43 +57,48 @@ class TestLLMService:
                 # Но API не будет вызван, потому что сервис не инициализирован
                 # mock_client.post.assert_called_once() - закомментировал
 
-    def test_generate_word_explanation_no_api_key(self):
+    @pytest.mark.asyncio
+    async def test_generate_word_explanation_no_api_key(self):
         """Тест что функция возвращает None без API ключа"""
         from llm_service import generate_word_explanation
 
         with patch.dict('os.environ', {}, clear=True):
-            result = generate_word_explanation("метафора")
+            result = await generate_word_explanation("метафора")
 
             assert result is None
 
-    def test_generate_phrase_explanation_no_key(self):
+    @pytest.mark.asyncio
+    async def test_generate_phrase_explanation_no_key(self):
         """Тест что функция возвращает None без API ключа"""
         from llm_service import generate_phrase_explanation
 
         with patch.dict('os.environ', {}, clear=True):
-            result = generate_phrase_explanation("глубокая фраза")
+            result = await generate_phrase_explanation("глубокая фраза")
 
             assert result is None
 
-    def test_generate_text_retelling_no_key(self):
+    @pytest.mark.asyncio
+    async def test_generate_text_retelling_no_key(self):
         """Тест что функция возвращает None без API ключа"""
         from llm_service import generate_text_retelling
 
         with patch.dict('os.environ', {}, clear=True):
-            result = generate_text_retelling("старый текст")
+            result = await generate_text_retelling("старый текст")
 
             assert result is None
 
-    def test_generate_character_description_no_key(self):
+    @pytest.mark.asyncio
+    async def test_generate_character_description_no_key(self):
         """Тест что функция возвращает None без API ключа"""
         from llm_service import generate_character_description
 
         with patch.dict('os.environ', {}, clear=True):
-            result = generate_character_description("Обломов")
+            result = await generate_character_description("Обломов")
 
             assert result is None
 
-    def test_text_length_limits_too_long(self):
+    @pytest.mark.asyncio
+    async def test_text_length_limits_too_long(self):
         """Тест ограничений на длину текста - слишком длинный возвращает None"""
         from llm_service import generate_text_retelling
 
@@ -100,11 +106,249 @@ class TestLLMService:
         long_text = "а" * 10000
 
         with patch.dict('os.environ', {'OPENROUTER_API_KEY': 'test_key'}):
-            result = generate_text_retelling(long_text)
+            result = await generate_text_retelling(long_text)
 
             # Для слишком длинного текста функция должна вернуть None
             assert result is None
 
+    @pytest.mark.asyncio
+    async def test_explain_word_uses_shared_async_client(self):
+        """Тест что запросы идут через общий асинхронный клиент"""
+        import httpx
+        from llm_service import LLMService
+
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(200, json={
+                "choices": [{"message": {"content": " Помещик - владелец имения. "}}]
+            })
+
+        service = LLMService("test_key")
+        await service.close()
+        service.client = httpx.AsyncClient(
+            base_url=service.base_url,
+            headers=service.headers,
+            transport=httpx.MockTransport(handler)
+        )
+
+        first = await service.explain_word("помещик")
+        second = await service.explain_word("исправник")
+        await service.close()
+
+        assert first == "Помещик - владелец имения."
+        assert second is not None
+        assert len(calls) == 2
+        assert calls[0].url.path.endswith("/chat/completions")
+        assert calls[0].headers["Authorization"] == "Bearer test_key"
+
+    @pytest.mark.asyncio
+    async def test_make_request_http_error_returns_none(self):
+        """Тест что сетевая ошибка не пробрасывается в обработчики"""
+        import httpx
+        from llm_service import LLMService
+
+        def handler(request):
+            raise httpx.ConnectError("connection refused")
+
+        service = LLMService("test_key")
+        await service.close()
+        service.client = httpx.AsyncClient(
+            base_url=service.base_url,
+            transport=httpx.MockTransport(handler)
+        )
+
+        result = await service.explain_phrase("к шапочному разбору")
+        await service.close()
+
+        assert result is None
+
+    @pytest.mark.asyncio
+    async def test_shutdown_closes_connection_pool(self):
+        """Тест что при остановке бота пул соединений закрывается"""
+        import llm_service
+        from llm_service import LLMService, shutdown_llm_service
+
+        service = LLMService("test_key", pool_size=5, keepalive=2, http2=False)
+        llm_service.llm_service = service
+
+        await shutdown_llm_service()
+
+        assert llm_service.llm_service is None
+        assert service.client.is_closed
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_requests_are_coalesced(self):
+        """Тест что одинаковые одновременные запросы дают один вызов API"""
+        import asyncio
+        import httpx
+        from llm_service import LLMService
+
+        calls = []
+
+        async def handler(request):
+            calls.append(request)
+            await asyncio.sleep(0.05)
+            return httpx.Response(200, json={"choices": [{"message": {"content": "Уездный начальник полиции"}}]})
+
+        service = LLMService("test_key", http2=False)
+        await service.close()
+        service.client = httpx.AsyncClient(base_url=service.base_url, transport=httpx.MockTransport(handler))
+
+        results = await asyncio.gather(*[service.explain_word("исправник") for _ in range(30)])
+        other = await service.explain_word("помещик")
+        await service.close()
+
+        assert len(calls) == 2
+        assert set(results) == {"Уездный начальник полиции"}
+        assert other == "Уездный начальник полиции"
+        assert service.coalesced_requests == 29
+        assert service._inflight == {}
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_streams_are_coalesced(self):
+        """Тест что одинаковые одновременные потоки читают один ответ модели"""
+        import asyncio
+        import httpx
+        from llm_service import LLMService
+
+        calls = []
+        release = asyncio.Event()
+
+        async def body():
+            yield 'data: {"choices": [{"delta": {"content": "Жил-был "}}]}\n\n'.encode()
+            await release.wait()
+            yield 'data: {"choices": [{"delta": {"content": "помещик."}, "finish_reason": "stop"}]}\n\n'.encode()
+            yield b'data: [DONE]\n\n'
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(200, content=body(), headers={"Content-Type": "text/event-stream"})
+
+        service = LLMService("test_key", http2=False)
+        await service.close()
+        service.client = httpx.AsyncClient(base_url=service.base_url, transport=httpx.MockTransport(handler))
+
+        async def read(stream):
+            return [chunk async for chunk in stream]
+
+        readers = [asyncio.create_task(read(service.stream_retelling("Текст"))) for _ in range(30)]
+        # Пользователь, ушедший посреди ответа, не обрывает поток остальным
+        leaving = service.stream_retelling("Текст")
+        assert await leaving.__anext__() == "Жил-был "
+        await leaving.aclose()
+
+        # Опоздавший получает и уже пришедшие фрагменты
+        late = asyncio.create_task(read(service.stream_retelling("Текст")))
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*readers, late)
+
+        assert len(calls) == 1
+        assert all(result == ["Жил-был ", "помещик."] for result in results)
+        assert service.coalesced_requests == 31
+        assert service._inflight_streams == {}
+        await service.close()
+
+    @pytest.mark.asyncio
+    async def test_coalesced_waiters_share_failure(self):
+        """Тест что все ожидающие получают одну и ту же ошибку"""
+        import asyncio
+        from llm_service import LLMService
+
+        service = LLMService("test_key", http2=False)
+        await service.close()
+
+        started = []
+
+        async def failing():
+            started.append(1)
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream failed")
+
+        results = await asyncio.gather(
+            *[service._single_flight("key", failing) for _ in range(5)],
+            return_exceptions=True
+        )
+
+        assert len(started) == 1
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert len({id(r) for r in results}) == 1
+
+    @pytest.mark.asyncio
+    async def test_streaming_parses_sse_and_fills_cache(self, tmp_path):
+        """Тест разбора SSE потока OpenRouter и сохранения полного ответа в кэш"""
+        import httpx
+        from explanation_cache import ExplanationCache
+        from llm_service import LLMService
+
+        sse_body = (
+            ": OPENROUTER PROCESSING\n\n"
+            'data: {"choices": [{"delta": {"content": "Жил-был "}}]}\n\n'
+            'data: {"choices": [{"delta": {"content": "помещик."}}]}\n\n'
+            'data: {"choices": [{"delta": {}}]}\n\n'
+            "data: [DONE]\n\n"
+        )
+        calls = []
+
+        def handler(request):
+            calls.append(json.loads(request.content))
+            return httpx.Response(200, text=sse_body, headers={"Content-Type": "text/event-stream"})
+
+        cache = ExplanationCache(db_path=str(tmp_path / "cache.db"))
+        service = LLMService("test_key", http2=False, cache=cache)
+        await service.close()
+        service.client = httpx.AsyncClient(base_url=service.base_url, transport=httpx.MockTransport(handler))
+
+        chunks = [chunk async for chunk in service.stream_retelling("Старый текст")]
+        assert chunks == ["Жил-был ", "помещик."]
+        assert calls[0]["stream"] is True
+
+        # Повтор отдаётся из кэша одним фрагментом и совпадает с обычным вызовом
+        assert [chunk async for chunk in service.stream_retelling("Старый текст")] == ["Жил-был помещик."]
+        assert await service.retell_text("Старый текст") == "Жил-был помещик."
+        assert len(calls) == 1
+
+        await service.close()
+        cache.close()
+
+    @pytest.mark.asyncio
+    async def test_interrupted_stream_is_not_cached(self, tmp_path):
+        """Тест что поток без [DONE] и finish_reason считается оборванным и не попадает в кэш"""
+        import httpx
+        from explanation_cache import ExplanationCache
+        from llm_service import IncompleteStreamError, LLMService
+
+        bodies = [
+            'data: {"choices": [{"delta": {"content": "Жил-был "}}]}\n\n',
+            'data: {"choices": [{"delta": {"content": "помещик."}, "finish_reason": "stop"}]}\n\n',
+        ]
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(200, text=bodies[len(calls) - 1], headers={"Content-Type": "text/event-stream"})
+
+        cache = ExplanationCache(db_path=str(tmp_path / "cache.db"))
+        service = LLMService("test_key", http2=False, cache=cache)
+        await service.close()
+        service.client = httpx.AsyncClient(base_url=service.base_url, transport=httpx.MockTransport(handler))
+
+        chunks = []
+        with pytest.raises(IncompleteStreamError):
+            async for chunk in service.stream_retelling("Старый текст"):
+                chunks.append(chunk)
+        assert chunks == ["Жил-был "]
+
+        # Оборванный ответ не закэширован; finish_reason без [DONE] - полный ответ
+        assert [chunk async for chunk in service.stream_retelling("Старый текст")] == ["помещик."]
+        assert len(calls) == 2
+        assert await service.retell_text("Старый текст") == "помещик."
+
+        await service.close()
+        cache.close()
+
 
 @pytest.mark.unit
 class TestLiteraryData:
@@ -0,0 +1,151 @@
+"""Тесты приведения слов к начальной форме"""
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+
+class FakeAnalyzer:
+    """Анализатор с фиксированным словарём форм"""
+
+    FORMS = {
+        "помещику": "помещик",
+        "исправника": "исправник",
+        "шапочному": "шапочный",
+        "разбору": "разбор",
+        "выдал": "выдать",
+        "головой": "голова",
+    }
+
+    def __init__(self):
+        self.calls = 0
+
+    def parse(self, word):
+        self.calls += 1
+        return [SimpleNamespace(normal_form=self.FORMS.get(word, word))]
+
+    def word_is_known(self, word):
+        return word in self.FORMS or word in self.FORMS.values()
+
+
+@pytest.mark.unit
+class TestLemmatizer:
+    """Тесты morphology.py"""
+
+    def test_lemmatize_word_uses_cache(self):
+        """Тест что слово разбирается анализатором один раз"""
+        from morphology import Lemmatizer
+
+        analyzer = FakeAnalyzer()
+        lemmatizer = Lemmatizer(analyzer=analyzer)
+
+        assert lemmatizer.lemmatize_word("Помещику,") == "помещик"
+        assert lemmatizer.lemmatize_word("Помещику,") == "помещик"
+        assert analyzer.calls == 1
+        assert lemmatizer.available
+
+    def test_lemmatize_phrase(self):
+        """Тест приведения к начальной форме каждого слова фразы"""
+        from morphology import Lemmatizer
+
+        lemmatizer = Lemmatizer(analyzer=FakeAnalyzer())
+
+        assert lemmatizer.lemmatize("к  Шапочному разбору!") == "к шапочный разбор"
+        assert lemmatizer.lemmatize("  ") == ""
+
+    def test_is_known(self):
+        """Тест проверки словарного слова и поведения без анализатора"""
+        from morphology import Lemmatizer
+
+        lemmatizer = Lemmatizer(analyzer=FakeAnalyzer())
+        assert lemmatizer.is_known("Помещику,")
+        assert not lemmatizer.is_known("помешик")
+
+        with patch('morphology.MORPH_AVAILABLE', False):
+            assert not Lemmatizer().is_known("помещик")
+
+    def test_real_analyzer(self):
+        """Тест разбора словарём pymorphy3"""
+        pytest.importorskip("pymorphy3")
+        from morphology import Lemmatizer
+
+        lemmatizer = Lemmatizer()
+
+        assert lemmatizer.lemmatize_word("помещику") == "помещик"
+        assert lemmatizer.lemmatize_word("исправника") == "исправник"
+        assert lemmatizer.lemmatize("шапочному разбору") == "шапочный разбор"
+
+    def test_literary_data_finds_inflected_forms(self, tmp_path):
+        """Тест поиска терминов и фраз базы по любой форме"""
+        import literary_data
+        from config import LEXICON_SOURCE_DIR
+        from lexicon import Lexicon, build_lexicon
+        from morphology import Lemmatizer
+
+        lemmatizer = Lemmatizer(analyzer=FakeAnalyzer())
+        path = str(tmp_path / "lexicon.db")
+        build_lexicon(path, LEXICON_SOURCE_DIR, lemmatize_func=lemmatizer.lemmatize)
+        lexicon = Lexicon(path, source_dir=None)
+
+        with patch('literary_data.lemmatize', lemmatizer.lemmatize), \
+             patch('literary_data.lexicon', lexicon), \
+             patch('literary_data.LITERARY_TERMS', lexicon.terms), \
+             patch('literary_data.LITERARY_PHRASES', lexicon.phrases):
+            literary_data._lemma_phrase_matcher.cache_clear()
+            try:
+                terms = lexicon.terms
+                assert literary_data.get_word_definition("помещику") is terms["помещик"]
+                assert literary_data.get_word_definition("Шапочному разбору") is terms["шапочный разбор"]
+                assert (literary_data.get_phrase_explanation("Его выдал головой")
+                        is lexicon.phrases["выдать головой"])
+            finally:
+                literary_data._lemma_phrase_matcher.cache_clear()
+                lexicon.close()
+
+    @pytest.mark.asyncio
+    async def test_word_handler_keeps_the_typed_form(self):
+        """Тест что в запрос, ответ и словарь попадает введённая форма, а начальная - только в ключ кэша"""
+        from unittest.mock import AsyncMock, MagicMock
+        from morphology import Lemmatizer
+        from handlers.word_handler import explain_word
+
+        lemmatizer = Lemmatizer(analyzer=FakeAnalyzer())
+        update = MagicMock()
+        update.effective_user.id = 7
+        update.message.reply_text = AsyncMock(return_value=MagicMock(delete=AsyncMock()))
+        generate = AsyncMock(return_value="Владелец поместья")
+        save = AsyncMock()
+
+        with patch('handlers.word_handler.lemmatize', lemmatizer.lemmatize), \
+             patch('literary_data.lemmatize', lemmatizer.lemmatize), \
+             patch('handlers.word_handler.initialize_llm_service', return_value=True), \
+             patch('handlers.word_handler.generate_word_explanation', generate), \
+             patch('handlers.word_handler.save_word', save):
+            await explain_word(update, MagicMock(), "помещику")
+
+        generate.assert_awaited_once_with("помещику", lemma="помещик")
+        save.assert_awaited_once_with(7, "помещику", "Владелец поместья")
+        assert update.message.reply_text.await_args[0][0].startswith("📖 помещику")
+
+    @pytest.mark.asyncio
+    async def test_word_forms_share_cache_key(self):
+        """Тест что формы слова делят кэш, но промпт строится из введённой формы"""
+        import json
+        import httpx
+        from explanation_cache import ExplanationCache
+        from llm_service import LLMService
+
+        prompts = []
+
+        def handler(request):
+            prompts.append(json.loads(request.content)["messages"][0]["content"])
+            return httpx.Response(200, json={"choices": [{"message": {"content": "Владелец поместья"}}]})
+
+        service = LLMService("test_key", http2=False, cache=ExplanationCache(db_path=":memory:"))
+        service.client = httpx.AsyncClient(base_url=service.base_url, transport=httpx.MockTransport(handler))
+
+        assert await service.explain_word("помещику", lemma="помещик") == "Владелец поместья"
+        assert await service.explain_word("помещика", lemma="помещик") == "Владелец поместья"
+        assert len(prompts) == 1
+        assert '"помещику"' in prompts[0]
+        service.cache.close()
+        await service.close()
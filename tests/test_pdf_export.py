@@ -0,0 +1,60 @@
+"""Тесты экспорта словаря в PDF"""
+import asyncio
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+
+@pytest.mark.unit
+class TestPdfExport:
+    """Тесты pdf_export.py"""
+
+    def test_long_explanations_are_not_truncated(self):
+        """Тест что длинные объяснения переносятся на новые страницы, а не обрезаются"""
+        pytest.importorskip("reportlab")
+        import pdf_export
+        from pdf_export import render_dictionary_pdf
+
+        pdf_export._init_worker(pdf_export.PDF_FONT_PATH)
+        rows = [(f"слово{i}", "очень длинное объяснение " * 80, i) for i in range(30)]
+        pdf = render_dictionary_pdf(rows, 1)
+
+        assert pdf.startswith(b"%PDF")
+        # 30 объяснений по ~30 строк не помещаются на одну страницу
+        assert pdf.count(b"/Type /Page\n") > 10
+
+    @pytest.mark.asyncio
+    async def test_queue_limit_and_per_user_lock(self):
+        """Тест ограничения очереди и повторного экспорта того же пользователя"""
+        from pdf_export import PdfExporter, PdfExportBusy
+
+        release = threading.Event()
+
+        def slow_render(rows, user_id):
+            release.wait(5)
+            return b"%PDF"
+
+        exporter = PdfExporter(workers=2, max_queue=2)
+        exporter._executor = ThreadPoolExecutor(max_workers=2)
+
+        with patch('pdf_export.render_dictionary_pdf', slow_render):
+            first = asyncio.create_task(exporter.export(1, []))
+            second = asyncio.create_task(exporter.export(2, []))
+            await asyncio.sleep(0.01)
+            assert exporter.in_progress == 2
+
+            with pytest.raises(PdfExportBusy) as busy_user:
+                await exporter.export(1, [])
+            assert busy_user.value.user_in_progress
+
+            with pytest.raises(PdfExportBusy) as busy_queue:
+                await exporter.export(3, [])
+            assert not busy_queue.value.user_in_progress
+
+            release.set()
+            assert await first == b"%PDF"
+            assert await second == b"%PDF"
+
+        assert exporter.in_progress == 0
+        exporter.shutdown()
@@ -0,0 +1,51 @@
+"""Тесты поиска фраз автоматом Ахо-Корасик"""
+import pytest
+
+
+@pytest.mark.unit
+class TestPhraseMatcher:
+    """Тесты phrase_matcher.py"""
+
+    def test_finds_all_occurrences_in_one_pass(self):
+        """Тест поиска всех вхождений, включая вложенные фразы"""
+        from phrase_matcher import PhraseMatcher
+
+        matcher = PhraseMatcher(["шапочный разбор", "к шапочному разбору", "разбору"])
+        found = [key for _, key in matcher.find_all("Пришёл к шапочному разбору, как всегда")]
+
+        assert sorted(found) == ["к шапочному разбору", "разбору"]
+
+    def test_longest_match_wins(self):
+        """Тест что выбирается самая длинная (конкретная) фраза"""
+        from phrase_matcher import PhraseMatcher
+
+        matcher = PhraseMatcher(["век живи", "век живи век учись", "учись"])
+
+        assert matcher.longest_match("Век живи — век учись!") == "век живи век учись"
+        assert matcher.longest_match("Просто учись") == "учись"
+        assert matcher.longest_match("ничего похожего") is None
+
+    def test_matches_whole_words_only(self):
+        """Тест что фраза не находится внутри другого слова"""
+        from phrase_matcher import PhraseMatcher
+
+        matcher = PhraseMatcher(["ад"])
+
+        assert matcher.longest_match("трудная задача") is None
+        assert matcher.longest_match("это сущий ад.") == "ад"
+
+    def test_normalization(self):
+        """Тест нормализации регистра, ё и знаков препинания"""
+        from phrase_matcher import PhraseMatcher, normalize_phrase
+
+        assert normalize_phrase("  Ещё,   РАЗ!  ") == "еще раз"
+        matcher = PhraseMatcher(["Выдать головой"])
+        assert matcher.longest_match("...и его ВЫДАЛИ? нет: выдать  головой") == "Выдать головой"
+
+    def test_literary_data_uses_matcher(self):
+        """Тест поиска фразы из базы внутри длинного текста"""
+        from literary_data import get_phrase_explanation, LITERARY_PHRASES
+
+        data = get_phrase_explanation("Он, как водится, явился к шапочному разбору.")
+        assert data is LITERARY_PHRASES["к шапочному разбору"]
+        assert get_phrase_explanation("К ШАПОЧНОМУ РАЗБОРУ") is data
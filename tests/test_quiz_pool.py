@@ -0,0 +1,188 @@
+"""Тесты запаса вопросов викторины"""
+import pytest
+
+
+def make_question(text, correct_index=0, options=None):
+    """Вопрос в том виде, в каком его разбирает LLMService._parse_quiz_questions"""
+    return {
+        'question': text,
+        'options': options or ['Первый', 'Второй', 'Третий', 'Четвёртый'],
+        'correct_index': correct_index,
+        'explanation': 'Объяснение',
+    }
+
+
+class FakeGenerator:
+    """Генератор вопросов вместо LLM: отдаёт заранее заданные пачки"""
+
+    def __init__(self, batches):
+        self.batches = list(batches)
+        self.calls = []
+
+    async def __call__(self, topic, count):
+        self.calls.append((topic, count))
+        return self.batches.pop(0) if self.batches else None
+
+
+@pytest.mark.unit
+class TestQuizPool:
+    """Тесты quiz_pool.py"""
+
+    def test_validate_question(self):
+        """Тест отбраковки неполных и негодных для кнопок вопросов"""
+        from quiz_pool import validate_question
+
+        assert validate_question(make_question('Что такое оброк?', 2))[2] == 2
+        assert validate_question(make_question('')) is None
+        assert validate_question(make_question('Что такое оброк?', '')) is None
+        assert validate_question(make_question('Что такое оброк?', 4)) is None
+        assert validate_question(make_question('Что такое оброк?', options=['А', 'Б', 'В'])) is None
+        assert validate_question(make_question('Что такое оброк?', options=['А', 'Б', 'В', 'а'])) is None
+        assert validate_question(make_question('Что такое оброк?', options=['А', 'Б', 'В', 'Г' * 101])) is None
+
+    @pytest.mark.asyncio
+    async def test_refill_dedup_and_cap(self, tmp_path):
+        """Тест пополнения до max_size с отсевом повторов"""
+        from quiz_pool import QuizQuestionPool
+
+        generator = FakeGenerator([
+            [make_question('Что такое оброк?'), make_question('Что такое оброк.'),
+             make_question(''), make_question('Кто написал «Шинель»?')],
+            [make_question(f'Вопрос номер {i} про литературу') for i in range(10)],
+        ])
+        pool = QuizQuestionPool(generator, db_path=str(tmp_path / 'pool.db'), topics=['термины'],
+                                min_size=2, max_size=4, batch_size=5)
+
+        added = await pool.refill_topic('термины')
+
+        assert added == 4
+        assert await pool.size('термины') == 4
+        assert pool.duplicates == 1
+        assert pool.rejected == 1
+        assert generator.calls == [('термины', 5), ('термины', 5)]
+        # Запас выше порога - LLM больше не вызывается
+        assert await pool.refill_topic('термины') == 0
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_pop_shuffles_and_keeps_answer(self, tmp_path):
+        """Тест что выдача перемешивает варианты и сохраняет правильный ответ"""
+        from quiz_pool import QuizQuestionPool
+
+        generator = FakeGenerator([[make_question(f'Вопрос {i} о классике', correct_index=1) for i in range(20)]])
+        pool = QuizQuestionPool(generator, db_path=str(tmp_path / 'pool.db'), topics=['классика'],
+                                min_size=1, max_size=20)
+        await pool.refill()
+
+        for _ in range(20):
+            question, options, correct_index = await pool.pop()
+            assert question.startswith('Вопрос')
+            assert options[correct_index] == 'Второй'
+            assert sorted(options) == sorted(['Первый', 'Второй', 'Третий', 'Четвёртый'])
+
+        assert await pool.pop() is None
+        assert pool.served == 20
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_persistence_across_restarts(self, tmp_path):
+        """Тест что невыданные вопросы переживают перезапуск, а выданные удаляются сразу"""
+        from quiz_pool import QuizQuestionPool
+
+        db_path = str(tmp_path / 'pool.db')
+        pool = QuizQuestionPool(FakeGenerator([[make_question('Что такое оброк?'),
+                                                make_question('Что такое уезд?'),
+                                                make_question('Что такое барщина?')]]),
+                                db_path=db_path, topics=['термины'], min_size=1, max_size=10)
+        await pool.refill()
+        await pool.pop('термины')
+        await pool.close()
+
+        restarted = QuizQuestionPool(FakeGenerator([]), db_path=db_path, topics=['термины'],
+                                     min_size=1, max_size=10)
+
+        assert await restarted.size('термины') == 2
+        assert (await restarted.pop('термины'))[0] == 'Что такое уезд?'
+        # Повтор вопроса, который ещё в запасе, не добавляется
+        await restarted._add_generated('термины', [make_question('Что такое барщина?')])
+        assert await restarted.size('термины') == 1
+        await restarted.close()
+
+    @pytest.mark.asyncio
+    async def test_workers_share_one_pool(self, tmp_path):
+        """Тест что процессы делят один запас: вопрос выдаётся один раз, пополняет один процесс"""
+        import time
+        from quiz_pool import QuizQuestionPool
+
+        db_path = str(tmp_path / 'pool.db')
+        first_generator = FakeGenerator([[make_question(f'Вопрос {i} о классике') for i in range(4)]])
+        second_generator = FakeGenerator([[make_question(f'Другой вопрос {i}') for i in range(4)]])
+        first = QuizQuestionPool(first_generator, db_path=db_path, topics=['классика'],
+                                 min_size=2, max_size=4, lease_seconds=60)
+        second = QuizQuestionPool(second_generator, db_path=db_path, topics=['классика'],
+                                  min_size=2, max_size=4, lease_seconds=60)
+
+        assert await first.refill() is True
+        assert await second.refill() is False
+        assert second_generator.calls == []
+
+        questions = [(await worker.pop())[0] for worker in (first, second, first, second)]
+        assert len(set(questions)) == 4
+        assert await first.pop() is None and await second.pop() is None
+
+        # Владелец аренды пропал - после её истечения пополняет другой процесс
+        first._conn.execute('UPDATE quiz_pool_lease SET expires_at = ?', (time.time() - 1,))
+        first._conn.commit()
+        assert await second.refill() is True
+        assert await second.size('классика') == 4
+        await first.close()
+        await second.close()
+
+    @pytest.mark.asyncio
+    async def test_shutdown_without_pool(self, tmp_path, monkeypatch):
+        """Тест что остановка бота с выключенным запасом не создаёт базу запаса"""
+        from unittest.mock import AsyncMock
+        import main
+        import quiz_pool
+        from quiz_pool import QuizQuestionPool
+
+        db_path = tmp_path / 'pool.db'
+        pool = QuizQuestionPool(FakeGenerator([]), db_path=str(db_path), topics=['термины'])
+        monkeypatch.setattr(quiz_pool, 'quiz_pool', pool)
+        monkeypatch.setattr(main, 'QUIZ_POOL_ENABLED', False)
+        for name in ('llm_service.shutdown_llm_service', 'database.close_database'):
+            monkeypatch.setattr(name, AsyncMock())
+        monkeypatch.setattr('pdf_export.pdf_exporter.shutdown', lambda: None)
+
+        await main.on_shutdown(None)
+        assert not db_path.exists()
+
+        # Запас, который ни разу не открывал базу, тоже не создаёт её при закрытии
+        await pool.close()
+        assert not db_path.exists()
+
+    @pytest.mark.asyncio
+    async def test_personalized_quiz_uses_pool(self, tmp_path, monkeypatch):
+        """Тест что вопрос для нового пользователя берётся из готового запаса"""
+        import quiz_pool
+        from quiz_pool import QuizQuestionPool
+        from handlers import quiz_handler
+
+        pool = QuizQuestionPool(FakeGenerator([[make_question('Что такое оброк?', correct_index=3)]]),
+                                db_path=str(tmp_path / 'pool.db'), topics=['термины'], min_size=1)
+        await pool.refill()
+
+        async def no_words(user_id, limit=20):
+            return []
+
+        monkeypatch.setattr(quiz_pool, 'quiz_pool', pool)
+        monkeypatch.setattr(quiz_handler, 'get_user_dictionary', no_words)
+
+        question, options, correct_index = await quiz_handler.generate_personalized_quiz_question(1)
+        assert question == 'Что такое оброк?'
+        assert options[correct_index] == 'Четвёртый'
+
+        # Запас пуст - вопрос по базе терминов
+        question, options, correct_index = await quiz_handler.generate_personalized_quiz_question(1)
+        assert "в русской литературе" in question
+        await pool.close()
@@ -0,0 +1,158 @@
+"""Тесты ограничения исходящих запросов к Telegram"""
+import asyncio
+import pytest
+
+
+@pytest.mark.unit
+class TestRateLimiter:
+    """Тесты rate_limiter.py"""
+
+    def test_token_bucket(self):
+        """Тест пополнения бакета и закрытия после RetryAfter"""
+        from rate_limiter import TokenBucket
+
+        bucket = TokenBucket(rate=2, capacity=2, now=0)
+        bucket.take(0)
+        bucket.take(0)
+        assert bucket.wait_time(0) == pytest.approx(0.5)
+        assert bucket.wait_time(0.5) == 0
+
+        bucket.close_for(3, now=0.5)
+        assert bucket.wait_time(1) == pytest.approx(2.5)
+        assert not bucket.is_idle(1)
+        assert bucket.is_idle(10)
+
+    @pytest.mark.asyncio
+    async def test_global_rate_and_priority(self):
+        """Тест что запросы ограничены по скорости, а ответы пользователям обгоняют массовые"""
+        from rate_limiter import PriorityRateLimiter, PRIORITY_BULK, PRIORITY_INTERACTIVE, outbound_priority
+
+        limiter = PriorityRateLimiter(global_rate=50, max_retries=0)
+        sent = []
+
+        async def send(name):
+            sent.append(name)
+            return True
+
+        async def request(name, priority):
+            with outbound_priority(priority):
+                return await limiter.process_request(send, (name,), {}, "sendMessage", {"chat_id": 1}, None)
+
+        start = asyncio.get_running_loop().time()
+        # Первые 50 уходят сразу (запас бакета), остальные ждут токенов
+        bulk = [asyncio.create_task(request(f"bulk{i}", PRIORITY_BULK)) for i in range(60)]
+        await asyncio.sleep(0)
+        interactive = [asyncio.create_task(request(f"reply{i}", PRIORITY_INTERACTIVE)) for i in range(5)]
+        await asyncio.sleep(0.01)
+        assert limiter.stats()["pending_by_priority"] == {"10": 10, "0": 5}
+
+        await asyncio.gather(*bulk, *interactive)
+        elapsed = asyncio.get_running_loop().time() - start
+
+        assert sent[50:55] == [f"reply{i}" for i in range(5)]
+        assert sent[55:] == [f"bulk{i}" for i in range(50, 60)]
+        assert elapsed >= 15 / 50 * 0.9
+        assert limiter.stats()["pending"] == 0
+
+    @pytest.mark.asyncio
+    async def test_group_limit(self):
+        """Тест отдельного лимита для групп, не затрагивающего личные чаты"""
+        from rate_limiter import PriorityRateLimiter
+
+        limiter = PriorityRateLimiter(global_rate=1000, group_rate=2, group_period=0.1, max_retries=0)
+
+        async def send():
+            return True
+
+        async def request(chat_id):
+            return await limiter.process_request(send, (), {}, "sendMessage", {"chat_id": chat_id}, None)
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await asyncio.gather(*(request(-100) for _ in range(6)))
+        group_elapsed = loop.time() - start
+
+        start = loop.time()
+        await asyncio.gather(*(request(5) for _ in range(6)))
+        private_elapsed = loop.time() - start
+
+        # 2 сообщения сразу, ещё 4 по 0.05 с
+        assert group_elapsed >= 0.18
+        assert private_elapsed < 0.05
+        assert limiter.stats()["groups"] == 1
+
+    @pytest.mark.asyncio
+    async def test_retry_after_is_honoured(self):
+        """Тест что после RetryAfter запрос повторяется после паузы, а остальные её ждут"""
+        from telegram.error import RetryAfter
+        from rate_limiter import PriorityRateLimiter
+
+        limiter = PriorityRateLimiter(global_rate=1000, max_retries=2)
+        loop = asyncio.get_running_loop()
+        calls = []
+
+        async def flaky():
+            calls.append(loop.time())
+            if len(calls) == 1:
+                raise RetryAfter(0.1)
+            return True
+
+        start = loop.time()
+        assert await limiter.process_request(flaky, (), {}, "sendMessage", {"chat_id": 1}, None) is True
+        assert calls[1] - start >= 0.2
+
+        async def always_limited():
+            raise RetryAfter(0)
+
+        with pytest.raises(RetryAfter):
+            await limiter.process_request(always_limited, (), {}, "sendMessage", {"chat_id": 1},
+                                          {"max_retries": 1})
+        assert limiter.stats()["retry_after_hits"] == 3
+
+    @pytest.mark.asyncio
+    async def test_requests_without_chat_are_not_limited(self):
+        """Тест что запросы без chat_id (answerCallbackQuery и т.п.) не ждут токенов"""
+        from rate_limiter import PriorityRateLimiter
+
+        limiter = PriorityRateLimiter(global_rate=1, max_retries=0)
+
+        async def send():
+            return True
+
+        for _ in range(20):
+            await limiter.process_request(send, (), {}, "answerCallbackQuery", {"callback_query_id": "1"}, None)
+        assert limiter.stats()["delayed"] == 0
+
+    @pytest.mark.asyncio
+    async def test_workers_share_the_limit(self):
+        """Тест что несколько процессов вместе укладываются в общий лимит бота"""
+        from rate_limiter import PriorityRateLimiter
+
+        # Два процесса-обработчика с одним токеном: по 20 запросов в секунду каждому
+        limiters = [PriorityRateLimiter(global_rate=40, max_retries=0, workers=2) for _ in range(2)]
+        loop = asyncio.get_running_loop()
+        sent = []
+
+        async def send():
+            sent.append(loop.time())
+            return True
+
+        async def request(limiter, chat_id):
+            return await limiter.process_request(send, (), {}, "sendMessage", {"chat_id": chat_id}, None)
+
+        start = loop.time()
+        await asyncio.gather(*(request(limiter, 1) for limiter in limiters for _ in range(30)))
+
+        # Сразу уходит только общий запас (40), остальные 20 - со скоростью 2 * 20 в секунду
+        assert sum(1 for moment in sent if moment - start < 0.05) == 40
+        assert loop.time() - start >= 0.45
+        assert limiters[0].stats()["workers"] == 2
+
+        # Лимит группы тоже делится: по 2 сообщения сразу на процесс
+        limiters = [PriorityRateLimiter(global_rate=1000, group_rate=4, group_period=1, max_retries=0, workers=2)
+                    for _ in range(2)]
+        sent.clear()
+        tasks = [asyncio.create_task(request(limiter, -100)) for limiter in limiters for _ in range(3)]
+        await asyncio.sleep(0.05)
+        assert len(sent) == 4
+        await asyncio.gather(*tasks)
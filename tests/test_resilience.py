@@ -0,0 +1,267 @@
+"""Тесты повторов и выключателя для вызовов LLM"""
+import json
+import random
+import pytest
+
+
+class FakeClock:
+    """Управляемое время"""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_service(handler, **kwargs):
+    """LLMService с подменённым транспортом"""
+    import httpx
+    from llm_service import LLMService
+
+    service = LLMService("test_key", http2=False, **kwargs)
+    service.client = httpx.AsyncClient(base_url=service.base_url, transport=httpx.MockTransport(handler))
+    return service
+
+
+def completion(text):
+    import httpx
+    return httpx.Response(200, json={"choices": [{"message": {"content": text}}]})
+
+
+@pytest.mark.unit
+class TestRetryPolicy:
+    """Тесты RetryPolicy и разбора Retry-After"""
+
+    def test_parse_retry_after(self):
+        """Тест заголовка в секундах и в виде HTTP-даты"""
+        from resilience import parse_retry_after
+
+        assert parse_retry_after("3") == 3
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("скоро") is None
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:10 GMT", now=1445412480) == pytest.approx(10)
+
+    def test_backoff(self):
+        """Тест экспоненциальной задержки с разбросом и ограничений"""
+        from resilience import RetryPolicy
+
+        policy = RetryPolicy(attempts=5, base_delay=0.5, max_delay=3, rng=random.Random(1))
+        for attempt, limit in enumerate([0.5, 1, 2, 3]):
+            delays = [policy.backoff(attempt) for _ in range(200)]
+            assert all(0 <= delay <= limit for delay in delays)
+            assert max(delays) > limit * 0.8
+
+        assert policy.backoff(4) is None
+        assert policy.backoff(0, retry_after=2) == 2
+        assert policy.backoff(0, retry_after=60) is None
+        assert policy.is_retryable(429) and policy.is_retryable(503) and not policy.is_retryable(400)
+
+
+@pytest.mark.unit
+class TestCircuitBreaker:
+    """Тесты CircuitBreaker"""
+
+    def test_opens_on_failure_rate_and_probes(self):
+        """Тест размыкания по доле ошибок и пробного запроса после паузы"""
+        from resilience import CircuitBreaker, STATE_CLOSED, STATE_HALF_OPEN, STATE_OPEN
+
+        clock = FakeClock()
+        breaker = CircuitBreaker("model", failure_rate=0.5, min_requests=4, window=60, open_seconds=30, clock=clock)
+
+        breaker.record_success()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state == STATE_CLOSED
+        breaker.record_failure()
+        assert breaker.state == STATE_OPEN
+        assert not breaker.allow()
+
+        clock.now += 30
+        assert breaker.allow()
+        assert breaker.state == STATE_HALF_OPEN
+        # Пока идёт пробный запрос, остальные не пускаются
+        assert not breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == STATE_OPEN
+
+        clock.now += 30
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.state == STATE_CLOSED
+        assert breaker.allow()
+        assert breaker.stats()["opened"] == 2
+
+    def test_old_failures_leave_window(self):
+        """Тест что ошибки старше окна не учитываются"""
+        from resilience import CircuitBreaker, STATE_CLOSED
+
+        clock = FakeClock()
+        breaker = CircuitBreaker("model", failure_rate=0.5, min_requests=3, window=10, clock=clock)
+        breaker.record_failure()
+        breaker.record_failure()
+        clock.now += 11
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_success()
+
+        assert breaker.state == STATE_CLOSED
+        assert breaker.stats()["failures"] == 1
+
+    def test_stuck_probe_does_not_block_forever(self):
+        """Тест что отменённый или зависший пробный запрос не оставляет выключатель полуоткрытым"""
+        from resilience import CircuitBreaker, STATE_HALF_OPEN, STATE_OPEN
+
+        clock = FakeClock()
+        breaker = CircuitBreaker("model", failure_rate=0.5, min_requests=1, open_seconds=30, clock=clock)
+        breaker.record_failure()
+
+        clock.now += 30
+        assert breaker.allow()
+        breaker.record_cancelled()
+        assert breaker.state == STATE_HALF_OPEN
+        assert breaker.allow()
+
+        # Ответа на пробный запрос нет дольше open_seconds - это ошибка
+        clock.now += 29
+        assert not breaker.allow()
+        clock.now += 1
+        assert not breaker.allow()
+        assert breaker.state == STATE_OPEN
+        clock.now += 30
+        assert breaker.allow()
+
+
+@pytest.mark.unit
+class TestLLMServiceResilience:
+    """Тесты повторов и выключателя в LLMService"""
+
+    @pytest.mark.asyncio
+    async def test_retries_with_retry_after(self):
+        """Тест что 429 и 503 повторяются, а Retry-After соблюдается"""
+        import httpx
+
+        responses = [httpx.Response(429, headers={"Retry-After": "0"}), httpx.Response(503), completion("Ответ")]
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return responses[len(calls) - 1]
+
+        from resilience import RetryPolicy
+        service = make_service(handler, retry_policy=RetryPolicy(attempts=3, base_delay=0.01))
+
+        assert await service.generate_explanation("Вопрос") == "Ответ"
+        assert len(calls) == 3
+        await service.close()
+
+    @pytest.mark.asyncio
+    async def test_client_errors_are_not_retried(self):
+        """Тест что ошибка в самом запросе (400) не повторяется и не размыкает выключатель"""
+        import httpx
+
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(400, json={"error": "bad request"})
+
+        service = make_service(handler)
+
+        assert await service.generate_explanation("Вопрос") is None
+        assert len(calls) == 1
+        assert service.breakers.get(service.model).stats()["failures"] == 0
+        await service.close()
+
+    @pytest.mark.asyncio
+    async def test_open_breaker_fails_fast(self):
+        """Тест что во время сбоя запросы перестают уходить к API и возвращаются сразу"""
+        import time
+        import httpx
+        from resilience import CircuitBreaker, CircuitBreakers, RetryPolicy
+
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            raise httpx.ConnectTimeout("timeout")
+
+        clock = FakeClock()
+        breakers = CircuitBreakers(lambda model: CircuitBreaker(model, min_requests=4, open_seconds=30, clock=clock))
+        service = make_service(handler, retry_policy=RetryPolicy(attempts=2, base_delay=0.001), breakers=breakers)
+
+        for _ in range(2):
+            assert await service.generate_explanation("Вопрос") is None
+        assert len(calls) == 4
+
+        start = time.perf_counter()
+        for _ in range(100):
+            assert await service.generate_explanation("Вопрос") is None
+        assert len(calls) == 4
+        assert time.perf_counter() - start < 0.5
+
+        # После паузы - один пробный запрос; API снова работает
+        clock.now += 30
+
+        def recovered(request):
+            calls.append(request)
+            return completion("Снова работает")
+
+        service.client = httpx.AsyncClient(base_url=service.base_url, transport=httpx.MockTransport(recovered))
+        assert await service.generate_explanation("Вопрос") == "Снова работает"
+        assert breakers.get(service.model).state == "closed"
+        await service.close()
+
+    @pytest.mark.asyncio
+    async def test_cancelled_probe_is_released(self):
+        """Тест что отмена пробного запроса не отключает модель навсегда"""
+        import asyncio
+        import httpx
+        from resilience import CircuitBreaker, CircuitBreakers
+
+        started = asyncio.Event()
+
+        async def hanging(request):
+            started.set()
+            await asyncio.sleep(60)
+
+        clock = FakeClock()
+        breakers = CircuitBreakers(lambda model: CircuitBreaker(model, min_requests=1, open_seconds=30, clock=clock))
+        service = make_service(hanging, breakers=breakers)
+        breaker = breakers.get(service.model)
+        breaker.record_failure()
+        clock.now += 30
+
+        task = asyncio.create_task(service.generate_explanation("Вопрос"))
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        service.client = httpx.AsyncClient(base_url=service.base_url,
+                                           transport=httpx.MockTransport(lambda request: completion("Ответ")))
+        assert await service.generate_explanation("Вопрос") == "Ответ"
+        assert breaker.state == "closed"
+        await service.close()
+
+    @pytest.mark.asyncio
+    async def test_stream_retries_before_first_chunk(self):
+        """Тест что поток повторяется, пока пользователю ничего не показано"""
+        import httpx
+        from resilience import RetryPolicy
+
+        sse_body = 'data: {"choices": [{"delta": {"content": "Текст"}}]}\n\ndata: [DONE]\n\n'
+        calls = []
+
+        def handler(request):
+            calls.append(json.loads(request.content))
+            if len(calls) == 1:
+                return httpx.Response(502, text="bad gateway")
+            return httpx.Response(200, text=sse_body, headers={"Content-Type": "text/event-stream"})
+
+        service = make_service(handler, retry_policy=RetryPolicy(attempts=3, base_delay=0.001))
+
+        chunks = [chunk async for chunk in service._stream_request([{"role": "user", "content": "x"}])]
+        assert chunks == ["Текст"]
+        assert len(calls) == 2
+        await service.close()
@@ -0,0 +1,247 @@
+"""Тесты хранилища состояний диалога"""
+import pytest
+
+
+class FakeClock:
+    """Управляемое время для проверки сроков"""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.unit
+class TestStateStore:
+    """Тесты state_store.py"""
+
+    def test_dict_interface(self):
+        """Тест что хранилище ведёт себя как словарь"""
+        from state_store import StateStore
+
+        store = StateStore('test', ttl=60)
+        store[1] = 2
+        store[2] = 3
+
+        assert store[1] == 2
+        assert store.get(3, 0) == 0
+        assert 2 in store and 3 not in store
+        assert sorted(store) == [1, 2]
+        assert store.pop(1) == 2 and store.pop(1, None) is None
+        del store[2]
+        assert len(store) == 0
+        with pytest.raises(KeyError):
+            del store[2]
+
+    def test_idle_entries_expire(self):
+        """Тест что запись без обращений удаляется, а используемая живёт"""
+        from state_store import StateStore
+
+        clock = FakeClock()
+        store = StateStore('test', ttl=60, clock=clock)
+        store['idle'] = 1
+        store['active'] = 2
+
+        for _ in range(5):
+            clock.now += 30
+            assert store['active'] == 2
+
+        assert 'idle' not in store
+        assert store.expired == 1
+        clock.now += 61
+        assert len(store) == 0
+
+    def test_lru_cap(self):
+        """Тест вытеснения давно не использованных записей при превышении размера"""
+        from state_store import StateStore
+
+        store = StateStore('test', ttl=60, max_entries=3)
+        for user_id in range(3):
+            store[user_id] = user_id
+        store.get(0)
+        store[3] = 3
+
+        assert sorted(store) == [0, 2, 3]
+        assert store.evicted == 1
+
+    def test_memory_tracks_active_users(self):
+        """Тест что в памяти остаются только пользователи, активные за последние ttl секунд"""
+        from state_store import StateStore
+
+        clock = FakeClock()
+        store = StateStore('test', ttl=60, clock=clock)
+        for user_id in range(10000):
+            clock.now += 1
+            store[user_id] = 1
+
+        assert len(store) == 60
+        assert store.expired == 10000 - 60
+        assert min(store) == 10000 - 60
+
+    @pytest.mark.asyncio
+    async def test_sqlite_backend_survives_restart(self, tmp_path):
+        """Тест что состояния из SQLite доступны новому экземпляру и тоже устаревают"""
+        from state_store import StateStore, SQLiteStateBackend
+
+        clock = FakeClock()
+        backend = SQLiteStateBackend(str(tmp_path / 'state.db'))
+        store = StateStore('user_states', ttl=60, max_entries=1, backend=backend, clock=clock)
+        store[1] = 1
+        store[2] = 2  # первая запись вытеснена из памяти, но осталась в базе
+        del store[2]
+
+        # Синхронное обращение видит только память, aget дочитывает из базы
+        assert 1 not in store
+        assert await store.aget(1) == 1
+        assert store[1] == 1
+        store.flush()
+        backend.close()
+
+        restarted = StateStore('user_states', ttl=60, backend=SQLiteStateBackend(str(tmp_path / 'state.db')),
+                               clock=clock)
+        other = StateStore('active_quizzes', ttl=60, backend=restarted.backend, clock=clock)
+        assert await restarted.aget(1) == 1
+        assert await restarted.aget(2) is None
+        assert await other.aget(1) is None
+
+        clock.now += 61
+        fresh = StateStore('user_states', ttl=60, backend=restarted.backend, clock=clock)
+        assert await fresh.aget(1) is None
+        restarted.backend.close()
+
+    @pytest.mark.asyncio
+    async def test_slow_backend_does_not_block_event_loop(self):
+        """Тест что запись во внешнее хранилище не ждёт его в event loop и выполняется по порядку"""
+        import threading
+        import time
+        from state_store import StateBackend, StateStore
+
+        release = threading.Event()
+        operations = []
+
+        class SlowBackend(StateBackend):
+            def load(self, namespace, key, now):
+                operations.append(('load', key))
+                saved = [op for op in operations if op[0] in ('save', 'delete') and op[1] == key]
+                return (saved[-1][2], now + 60) if saved and saved[-1][0] == 'save' else None
+
+            def save(self, namespace, key, value, expires_at):
+                release.wait(5)
+                operations.append(('save', key, value))
+
+            def delete(self, namespace, key):
+                operations.append(('delete', key))
+
+            def touch(self, namespace, key, expires_at):
+                pass
+
+        store = StateStore('test', ttl=60, max_entries=1, backend=SlowBackend())
+        start = time.perf_counter()
+        store[1] = 'ждёт слово'
+        store[2] = 'ждёт фразу'  # запись 1 вытеснена из памяти
+        store.pop(3, None)
+        assert time.perf_counter() - start < 0.5
+        assert store[2] == 'ждёт фразу'
+
+        # Чтение из хранилища выполняется после отправленных ранее записей
+        release.set()
+        assert await store.aget(1) == 'ждёт слово'
+        assert operations[:4] == [('save', 1, 'ждёт слово'), ('save', 2, 'ждёт фразу'), ('delete', 3), ('load', 1)]
+        store.flush()
+
+    def test_create_backend(self):
+        """Тест выбора хранилища по имени"""
+        from state_store import create_backend
+
+        assert create_backend('memory') is None
+        with pytest.raises(ValueError):
+            create_backend('unknown')
+
+
+class FakeRedis:
+    """Минимальная замена redis.Redis в памяти: строки со сроком в миллисекундах"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.data = {}
+
+    def _alive(self, name):
+        item = self.data.get(name)
+        if item is not None and item[1] <= self.clock() * 1000:
+            del self.data[name]
+            return None
+        return item
+
+    def get(self, name):
+        item = self._alive(name)
+        return item[0].encode() if item else None
+
+    def set(self, name, value, pxat):
+        self.data[name] = (value, pxat)
+
+    def pttl(self, name):
+        item = self._alive(name)
+        return int(item[1] - self.clock() * 1000) if item else -2
+
+    def pexpireat(self, name, when):
+        if self._alive(name):
+            self.data[name] = (self.data[name][0], when)
+
+    def delete(self, *names):
+        for name in names:
+            self.data.pop(name, None)
+
+    def scan_iter(self, match):
+        prefix = match.rstrip('*')
+        return [name for name in list(self.data) if name.startswith(prefix)]
+
+    def close(self):
+        pass
+
+
+@pytest.mark.unit
+class TestRedisStateBackend:
+    """Тесты общего хранилища состояний для нескольких процессов"""
+
+    @pytest.mark.asyncio
+    async def test_shared_between_processes(self):
+        """Тест что состояние, записанное одним процессом, видит другой, а срок ведёт Redis"""
+        from state_store import StateStore, RedisStateBackend
+
+        clock = FakeClock()
+        client = FakeRedis(clock)
+        first = StateStore('user_states', ttl=60, backend=RedisStateBackend(client, prefix='bot:'), clock=clock)
+        second = StateStore('user_states', ttl=60, backend=RedisStateBackend(client, prefix='bot:'), clock=clock)
+
+        first[42] = 1
+        first.flush()
+        assert client.data['bot:user_states:42'][0] == '1'
+        assert await second.aget(42) == 1
+
+        del first[42]
+        first.flush()
+        assert await StateStore('user_states', ttl=60, backend=first.backend, clock=clock).aget(42) is None
+
+        first[43] = 2
+        first.flush()
+        clock.now += 61
+        assert await StateStore('user_states', ttl=60, backend=first.backend, clock=clock).aget(43) is None
+
+    def test_clear_namespace(self):
+        """Тест что очистка удаляет только свой набор состояний"""
+        from state_store import StateStore, RedisStateBackend
+
+        clock = FakeClock()
+        backend = RedisStateBackend(FakeRedis(clock), prefix='bot:')
+        states = StateStore('user_states', ttl=60, backend=backend, clock=clock)
+        quizzes = StateStore('active_quizzes', ttl=60, backend=backend, clock=clock)
+        for user_id in range(1200):
+            states[user_id] = 1
+        quizzes[1] = 3
+
+        states.clear()
+        states.flush()
+        quizzes.flush()
+
+        assert list(backend.client.data) == ['bot:active_quizzes:1']
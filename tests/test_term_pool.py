@@ -0,0 +1,57 @@
+"""Тесты набора терминов для викторины"""
+import random
+import pytest
+
+
+@pytest.mark.unit
+class TestTermPool:
+    """Тесты term_pool.py"""
+
+    def test_sample_distinct_options(self):
+        """Тест что правильный и неправильные варианты - разные термины"""
+        from term_pool import TermPool
+
+        pool = TermPool((f"термин{i}", f"определение{i}") for i in range(50))
+        rng = random.Random(1)
+
+        for _ in range(100):
+            term, correct, wrong = pool.sample(rng=rng)
+            assert correct == f"определение{term[6:]}"
+            assert len(wrong) == 3
+            assert len(set(wrong + [correct])) == 4
+
+    def test_small_and_empty_pool(self):
+        """Тест набора меньше четырёх терминов и пустого набора"""
+        from term_pool import TermPool
+
+        term, correct, wrong = TermPool([("оброк", "Подать")]).sample()
+        assert (term, correct, wrong) == ("оброк", "Подать", [])
+        assert TermPool([]).sample() is None
+
+    def test_definitions_are_truncated(self):
+        """Тест что определения обрезаются до длины варианта ответа"""
+        from term_pool import TermPool, OPTION_MAX_LENGTH
+
+        pool = TermPool([("уезд", "а" * 500)])
+
+        assert len(pool) == 1
+        assert pool.definitions[0] == "а" * OPTION_MAX_LENGTH
+
+    def test_quiz_questions_use_pools(self):
+        """Тест вопросов по базе и по словам пользователя"""
+        from handlers.quiz_handler import generate_literary_quiz_question, generate_quiz_from_user_words
+
+        question, options, correct_index = generate_literary_quiz_question()
+        assert "в русской литературе" in question
+        assert len(options) == 4 and 0 <= correct_index < 4
+
+        user_words = [
+            {'word': 'оброк', 'explanation': 'Подать крестьян помещику'},
+            {'word': 'уезд', 'explanation': 'Административный округ'},
+            {'word': 'барщина', 'explanation': 'Работа на помещика'},
+        ]
+        question, options, correct_index = generate_quiz_from_user_words(user_words)
+        word = question.split("'")[1]
+        explanation = next(w['explanation'] for w in user_words if w['word'] == word)
+        assert options[correct_index] == explanation
+        assert options.count("Общее понятие из русской литературы") == 1
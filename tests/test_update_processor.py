@@ -0,0 +1,117 @@
+"""Тесты параллельной обработки обновлений с порядком по пользователям"""
+import asyncio
+import pytest
+from unittest.mock import MagicMock
+from telegram import Update, User
+
+
+def make_update(user_id: int):
+    """Создать mock обновления от пользователя"""
+    update = MagicMock(spec=Update)
+    update.effective_user = MagicMock(spec=User)
+    update.effective_user.id = user_id
+    return update
+
+
+async def feed(processor, updates_and_coroutines):
+    """Подать обновления так же, как это делает Application: задача на каждое обновление"""
+    tasks = [
+        asyncio.create_task(processor.process_update(update, coroutine))
+        for update, coroutine in updates_and_coroutines
+    ]
+    await asyncio.gather(*tasks)
+
+
+@pytest.mark.unit
+class TestPerUserUpdateProcessor:
+    """Тесты update_processor.py"""
+
+    @pytest.mark.asyncio
+    async def test_updates_of_one_user_keep_order(self):
+        """Тест что обновления одного пользователя выполняются строго по порядку"""
+        from update_processor import PerUserUpdateProcessor
+
+        processor = PerUserUpdateProcessor(max_concurrent_updates=8)
+        log = []
+
+        async def handle(user_id, index, delay):
+            log.append((user_id, index, 'start'))
+            await asyncio.sleep(delay)
+            log.append((user_id, index, 'end'))
+
+        # Первое обновление самое медленное - без очереди второе обогнало бы его
+        delays = [0.05, 0.0, 0.02, 0.0]
+        items = []
+        for index, delay in enumerate(delays):
+            items.append((make_update(1), handle(1, index, delay)))
+            items.append((make_update(2), handle(2, index, delay)))
+
+        await feed(processor, items)
+
+        for user_id in (1, 2):
+            events = [(i, kind) for uid, i, kind in log if uid == user_id]
+            expected = [(i, kind) for i in range(len(delays)) for kind in ('start', 'end')]
+            assert events == expected
+
+        # Очереди пользователей освобождаются после обработки
+        assert processor.active_users == 0
+
+    @pytest.mark.asyncio
+    async def test_different_users_run_in_parallel(self):
+        """Тест что медленный запрос одного пользователя не блокирует других"""
+        from update_processor import PerUserUpdateProcessor
+
+        processor = PerUserUpdateProcessor(max_concurrent_updates=8)
+
+        async def slow():
+            await asyncio.sleep(0.1)
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await feed(processor, [(make_update(user_id), slow()) for user_id in range(8)])
+        elapsed = loop.time() - start
+
+        assert elapsed < 0.3
+
+    @pytest.mark.asyncio
+    async def test_global_concurrency_limit(self):
+        """Тест глобального ограничения числа одновременно обрабатываемых обновлений"""
+        from update_processor import PerUserUpdateProcessor
+
+        processor = PerUserUpdateProcessor(max_concurrent_updates=2, max_pending_updates=16)
+        running = 0
+        peak = 0
+
+        async def handle():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        await feed(processor, [(make_update(user_id), handle()) for user_id in range(6)])
+
+        assert peak == 2
+        assert processor.max_concurrent_updates == 2
+
+    @pytest.mark.asyncio
+    async def test_updates_without_user_are_processed(self):
+        """Тест обработки обновлений без пользователя и чата"""
+        from update_processor import PerUserUpdateProcessor
+
+        processor = PerUserUpdateProcessor(max_concurrent_updates=2)
+        done = []
+
+        async def handle():
+            done.append(True)
+
+        await feed(processor, [(object(), handle())])
+
+        assert done == [True]
+
+    def test_pending_limit_must_cover_concurrency(self):
+        """Тест проверки параметров"""
+        from update_processor import PerUserUpdateProcessor
+
+        with pytest.raises(ValueError):
+            PerUserUpdateProcessor(max_concurrent_updates=10, max_pending_updates=5)
@@ -0,0 +1,111 @@
+"""Тесты режима webhook"""
+import asyncio
+import pytest
+from unittest.mock import MagicMock
+
+pytest.importorskip("starlette")
+pytest.importorskip("httpx")
+
+
+def make_application(running: bool = True):
+    """Создать mock приложения с настоящей очередью обновлений"""
+    application = MagicMock()
+    application.bot = MagicMock()
+    application.running = running
+    application.update_queue = asyncio.Queue()
+    return application
+
+
+UPDATE_JSON = {
+    "update_id": 1,
+    "message": {
+        "message_id": 10,
+        "date": 0,
+        "chat": {"id": 42, "type": "private"},
+        "from": {"id": 42, "is_bot": False, "first_name": "Тест"},
+        "text": "помещик"
+    }
+}
+
+
+@pytest.mark.unit
+class TestWebhookServer:
+    """Тесты webhook_server.py"""
+
+    def test_valid_update_goes_to_queue(self):
+        """Тест что обновление с верным секретом попадает в очередь приложения"""
+        from starlette.testclient import TestClient
+        from webhook_server import create_webhook_app, SECRET_HEADER
+
+        application = make_application()
+        client = TestClient(create_webhook_app(application, "secret", path="/telegram"))
+
+        response = client.post("/telegram", json=UPDATE_JSON, headers={SECRET_HEADER: "secret"})
+
+        assert response.status_code == 200
+        update = application.update_queue.get_nowait()
+        assert update.update_id == 1
+        assert update.message.text == "помещик"
+
+    def test_wrong_secret_rejected(self):
+        """Тест что запрос без верного секрета отклоняется"""
+        from starlette.testclient import TestClient
+        from webhook_server import create_webhook_app, SECRET_HEADER
+
+        application = make_application()
+        client = TestClient(create_webhook_app(application, "secret", path="/telegram"))
+
+        assert client.post("/telegram", json=UPDATE_JSON, headers={SECRET_HEADER: "wrong"}).status_code == 403
+        assert client.post("/telegram", json=UPDATE_JSON).status_code == 403
+        assert application.update_queue.empty()
+
+    def test_malformed_body_rejected(self):
+        """Тест что некорректное тело запроса не ломает сервер"""
+        from starlette.testclient import TestClient
+        from webhook_server import create_webhook_app, SECRET_HEADER
+
+        application = make_application()
+        client = TestClient(create_webhook_app(application, "secret", path="/telegram"))
+
+        response = client.post("/telegram", content=b"not json", headers={SECRET_HEADER: "secret"})
+
+        assert response.status_code == 400
+        assert application.update_queue.empty()
+
+    def test_healthz(self):
+        """Тест проверки здоровья"""
+        from starlette.testclient import TestClient
+        from webhook_server import create_webhook_app
+
+        application = make_application(running=False)
+        client = TestClient(create_webhook_app(application, "secret"))
+        assert client.get("/healthz").status_code == 503
+
+        application.running = True
+        response = client.get("/healthz")
+        assert response.status_code == 200
+        assert response.json()["status"] == "ok"
+
+    def test_dispatcher_mode(self):
+        """Тест что в многопроцессном режиме обновление уходит в dispatcher без разбора"""
+        from starlette.testclient import TestClient
+        from webhook_server import create_webhook_app, SECRET_HEADER
+
+        dispatched = []
+
+        class FakeDispatcher:
+            alive = True
+
+            async def dispatch(self, data):
+                dispatched.append(data)
+                return 0
+
+            def stats(self):
+                return {"workers": [{"alive": True, "pending": len(dispatched), "dispatched": len(dispatched)}]}
+
+        client = TestClient(create_webhook_app(None, "secret", path="/telegram", dispatcher=FakeDispatcher()))
+
+        assert client.post("/telegram", json=UPDATE_JSON, headers={SECRET_HEADER: "secret"}).status_code == 200
+        assert client.post("/telegram", json=[1], headers={SECRET_HEADER: "secret"}).status_code == 400
+        assert dispatched == [UPDATE_JSON]
+        assert client.get("/healthz").json()["workers"][0]["dispatched"] == 1
@@ -0,0 +1,208 @@
+"""Тесты буфера отложенной записи словаря"""
+import asyncio
+import pytest
+
+
+@pytest.mark.unit
+class TestWriteBehindBuffer:
+    """Тесты write_behind.py"""
+
+    @pytest.mark.asyncio
+    async def test_repeated_lookups_collapse_into_one_batch(self):
+        """Тест что повторные просмотры схлопываются и пишутся одним пакетом"""
+        from write_behind import WriteBehindBuffer
+
+        batches = []
+
+        async def flush_func(events):
+            batches.append(sorted(events))
+            return True
+
+        buffer = WriteBehindBuffer(flush_func, interval_ms=10000, batch_size=100)
+        await buffer.add(1, "Помещик", "Владелец поместья")
+        await buffer.add(1, "помещик", "Владелец поместья")
+        await buffer.add(2, "исправник", "Начальник уездной полиции")
+        assert buffer.pending == 3
+        assert buffer.has_pending(1) and not buffer.has_pending(3)
+
+        assert await buffer.flush()
+        assert batches == [[(1, "помещик", "Владелец поместья", 2), (2, "исправник", "Начальник уездной полиции", 1)]]
+        assert buffer.pending == 0
+
+    @pytest.mark.asyncio
+    async def test_flush_on_batch_size(self):
+        """Тест внеочередного сброса при накоплении пакета"""
+        from write_behind import WriteBehindBuffer
+
+        batches = []
+
+        async def flush_func(events):
+            batches.append(events)
+            return True
+
+        buffer = WriteBehindBuffer(flush_func, interval_ms=10000, batch_size=3)
+        for i in range(7):
+            await buffer.add(1, f"слово{i}", "объяснение")
+
+        assert len(batches) == 2
+        assert buffer.pending == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_is_retried(self):
+        """Тест что неудачный пакет возвращается в буфер"""
+        from write_behind import WriteBehindBuffer
+
+        results = [False, True]
+        batches = []
+
+        async def flush_func(events):
+            batches.append(events)
+            return results.pop(0)
+
+        buffer = WriteBehindBuffer(flush_func, interval_ms=10000, batch_size=100)
+        await buffer.add(1, "буди", "Будь")
+
+        assert not await buffer.flush()
+        await buffer.add(1, "буди", "Будь")
+        assert await buffer.flush()
+        assert batches[-1] == [(1, "буди", "Будь", 2)]
+
+    @pytest.mark.asyncio
+    async def test_timer_and_shutdown_flush(self):
+        """Тест сброса по таймеру и при остановке"""
+        from write_behind import WriteBehindBuffer
+
+        batches = []
+
+        async def flush_func(events):
+            batches.append(events)
+            return True
+
+        buffer = WriteBehindBuffer(flush_func, interval_ms=20, batch_size=100)
+        buffer.start()
+        await buffer.add(1, "помещик", "Владелец поместья")
+        await asyncio.sleep(0.1)
+        assert len(batches) == 1
+
+        await buffer.add(1, "исправник", "Начальник уездной полиции")
+        await buffer.close()
+        assert len(batches) == 2
+        assert buffer.pending == 0
+
+    @pytest.mark.asyncio
+    async def test_batch_written_in_one_transaction(self, tmp_path):
+        """Тест пакетной записи в базу данных"""
+        from database import AsyncDatabase, DatabaseManager
+        from write_behind import WriteBehindBuffer
+
+        db = AsyncDatabase(DatabaseManager(str(tmp_path / "bot.db")))
+        buffer = WriteBehindBuffer(db.save_words_batch, interval_ms=10000, batch_size=1000)
+        for _ in range(3):
+            await buffer.add(1, "помещик", "Владелец поместья")
+        await buffer.add(1, "исправник", "Начальник уездной полиции")
+        await buffer.close()
+
+        stats = await db.get_user_stats(1)
+        assert stats['total_lookups'] == 4
+        assert stats['unique_words'] == 2
+        words = await db.get_user_dictionary(1)
+        assert next(w for w in words if w['word'] == "помещик")['lookup_count'] == 3
+        db.close()
+
+    @pytest.mark.asyncio
+    async def test_poison_row_is_isolated_and_dropped(self):
+        """Тест что испорченная строка пишется отдельно и отбрасывается после нескольких попыток"""
+        from write_behind import WriteBehindBuffer
+
+        written = []
+
+        async def flush_func(events):
+            if any(word == "испорчено" for _, word, _, _ in events):
+                raise ValueError("bad row")
+            written.extend(word for _, word, _, _ in events)
+            return True
+
+        buffer = WriteBehindBuffer(flush_func, interval_ms=10000, batch_size=100, max_attempts=3)
+        await buffer.add(1, "испорчено", "?")
+        await buffer.add(1, "помещик", "Владелец поместья")
+        assert not await buffer.flush()
+        assert written == []
+
+        # Повтор: исправная строка записывается, испорченная снова нет
+        assert not await buffer.flush()
+        assert written == ["помещик"]
+        assert buffer.pending == 1
+
+        assert await buffer.flush() is False
+        assert buffer.pending == 0
+        assert buffer.dropped_events == 1
+        assert await buffer.flush()
+
+    @pytest.mark.asyncio
+    async def test_backoff_and_cap_after_failures(self):
+        """Тест что после ошибки add() не повторяет запись до паузы, а буфер не растёт без предела"""
+        from write_behind import WriteBehindBuffer
+
+        now = [0.0]
+        calls = []
+
+        async def flush_func(events):
+            calls.append(events)
+            return False
+
+        buffer = WriteBehindBuffer(flush_func, interval_ms=1000, batch_size=2, max_attempts=100,
+                                   max_pending=5, max_backoff_ms=4000, clock=lambda: now[0])
+        await buffer.add(1, "слово0", "объяснение")
+        await buffer.add(1, "слово1", "объяснение")
+        assert len(calls) == 1
+
+        for i in range(2, 10):
+            await buffer.add(1, f"слово{i}", "объяснение")
+        assert len(calls) == 1
+        assert buffer.pending == 5
+        assert buffer.dropped_events == 5
+
+        # Пауза прошла - следующий просмотр запускает повтор
+        now[0] = 2.0
+        await buffer.add(1, "слово0", "объяснение")
+        assert len(calls) > 1
+        # Пауза растёт, но не больше max_backoff_ms
+        assert buffer._retry_at - now[0] == 4.0
+
+    @pytest.mark.asyncio
+    async def test_batch_in_flight_is_visible(self):
+        """Тест что пакет в записи виден has_pending, flush его дожидается, а discard_user не даёт вернуть его"""
+        from write_behind import WriteBehindBuffer
+
+        release = asyncio.Event()
+        started = asyncio.Event()
+        batches = []
+
+        async def flush_func(events):
+            batches.append(events)
+            started.set()
+            await release.wait()
+            return False
+
+        buffer = WriteBehindBuffer(flush_func, interval_ms=10000, batch_size=100)
+        await buffer.add(1, "помещик", "Владелец поместья")
+        await buffer.add(2, "исправник", "Начальник уездной полиции")
+        first = asyncio.create_task(buffer.flush())
+        await started.wait()
+
+        # Пакет уже забран из буфера, но ещё не записан
+        assert buffer.pending == 0
+        assert buffer.has_pending(1)
+
+        reader = asyncio.create_task(buffer.flush())
+        buffer.discard_user(1)
+        assert not buffer.has_pending(1)
+        await asyncio.sleep(0)
+        assert not reader.done()
+
+        release.set()
+        assert not await first
+        await reader
+        # Неудачный пакет вернулся в буфер без слов очистившего словарь пользователя
+        assert not buffer.has_pending(1)
+        assert buffer.has_pending(2)
@@ -0,0 +1,111 @@
+"""Параллельная обработка обновлений с сохранением порядка для каждого пользователя"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Dict, Optional
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+from config import MAX_CONCURRENT_UPDATES, MAX_PENDING_UPDATES
+
+logger = logging.getLogger(__name__)
+
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """
+    Обработчик очереди обновлений: разные пользователи обслуживаются параллельно,
+    а обновления одного пользователя - строго по очереди
+
+    Строгий порядок нужен, чтобы переходы USER_STATES не гонялись между собой:
+    если пользователь нажал "1️⃣" и сразу прислал слово, слово обработается
+    только после того, как состояние STATE_WAITING_WORD будет установлено.
+
+    Ограничения:
+        max_concurrent_updates - сколько обновлений выполняется одновременно (глобальный семафор);
+        max_pending_updates - сколько обновлений может быть принято в работу вместе с ожидающими
+            своей очереди. Пока этот лимит не достигнут, порядок обновлений пользователя
+            определяется только порядком их поступления.
+    """
+
+    def __init__(self, max_concurrent_updates: int = MAX_CONCURRENT_UPDATES,
+                 max_pending_updates: int = MAX_PENDING_UPDATES):
+        if max_pending_updates < max_concurrent_updates:
+            raise ValueError("max_pending_updates не может быть меньше max_concurrent_updates")
+
+        self._concurrency = max_concurrent_updates
+        super().__init__(max_pending_updates)
+        # Семафор базового класса ограничивает число принятых обновлений (очередь),
+        # а не выполняющихся - иначе он стоял бы перед очередью пользователя и мог нарушить порядок
+        self._semaphore = asyncio.BoundedSemaphore(max_pending_updates)
+
+        self._global_semaphore = asyncio.BoundedSemaphore(max_concurrent_updates)
+        # user_id -> замок очереди пользователя и число обновлений, которые его держат или ждут
+        self._user_locks: Dict[int, asyncio.Lock] = {}
+        self._user_waiters: Dict[int, int] = {}
+
+    @property
+    def max_concurrent_updates(self) -> int:
+        """Сколько обновлений обрабатывается одновременно"""
+        return self._concurrency
+
+    @property
+    def active_users(self) -> int:
+        """Сколько пользователей сейчас имеют обновления в обработке или в очереди"""
+        return len(self._user_locks)
+
+    @staticmethod
+    def get_user_key(update: object) -> Optional[int]:
+        """
+        Определить, в чью очередь попадает обновление
+
+        Args:
+            update: Обновление Telegram
+
+        Returns:
+            Optional[int]: ID пользователя (или чата), None если обновление ничьё
+        """
+        if not isinstance(update, Update):
+            return None
+        if update.effective_user is not None:
+            return update.effective_user.id
+        if update.effective_chat is not None:
+            return update.effective_chat.id
+        return None
+
+    async def do_process_update(self, update: object, coroutine: "Awaitable[Any]") -> None:
+        """
+        Обработать обновление: дождаться своей очереди у пользователя, затем свободного слота
+
+        Args:
+            update: Обновление Telegram
+            coroutine: Корутина обработки обновления
+        """
+        key = self.get_user_key(update)
+
+        if key is None:
+            async with self._global_semaphore:
+                await coroutine
+            return
+
+        lock = self._user_locks.get(key)
+        if lock is None:
+            lock = self._user_locks[key] = asyncio.Lock()
+            self._user_waiters[key] = 0
+        self._user_waiters[key] += 1
+
+        try:
+            # asyncio.Lock отдаёт замок ожидающим в порядке FIFO
+            async with lock:
+                async with self._global_semaphore:
+                    await coroutine
+        finally:
+            self._user_waiters[key] -= 1
+            if self._user_waiters[key] == 0:
+                del self._user_waiters[key]
+                del self._user_locks[key]
+
+    async def initialize(self) -> None:
+        """Ничего не делает: ресурсы создаются в конструкторе"""
+
+    async def shutdown(self) -> None:
+        """Залогировать незавершённые обновления - их дожидается сам Application"""
+        if self._user_locks:
+            logger.info(f"Остановка: обновления ещё обрабатываются для {len(self._user_locks)} пользователей")
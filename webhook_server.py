@@ -0,0 +1,121 @@
+"""Режим webhook: встроенный ASGI сервер принимает обновления от Telegram
+
+Используется вместо run_polling, когда BOT_MODE=webhook. Нужны пакеты starlette и uvicorn.
+"""
+import hmac
+import logging
+from typing import Optional
+from telegram import Update
+from telegram.ext import Application
+from config import WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_SECRET, WEBHOOK_HOST, WEBHOOK_PORT
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def create_webhook_app(application: Optional[Application], secret_token: str, path: str = WEBHOOK_PATH,
+                       dispatcher=None):
+    """
+    Создать ASGI приложение с маршрутами webhook и проверки здоровья
+
+    Args:
+        application: Приложение python-telegram-bot (None, если обновления раздаёт dispatcher)
+        secret_token (str): Секрет, который Telegram присылает в заголовке запроса
+        path (str): Путь для обновлений Telegram
+        dispatcher: UpdateDispatcher - передавать обновления процессам-обработчикам
+
+    Returns:
+        Starlette: ASGI приложение
+    """
+    from starlette.applications import Starlette
+    from starlette.requests import Request
+    from starlette.responses import JSONResponse, Response
+    from starlette.routing import Route
+
+    async def telegram_webhook(request: Request) -> Response:
+        """Принять обновление, быстро ответить Telegram и передать его в очередь бота"""
+        received = request.headers.get(SECRET_HEADER, "")
+        if not hmac.compare_digest(received.encode(), secret_token.encode()):
+            logger.warning(f"Webhook: запрос с неверным секретом от {request.client.host if request.client else '?'}")
+            return Response(status_code=403)
+
+        try:
+            data = await request.json()
+            if dispatcher is not None:
+                if not isinstance(data, dict):
+                    raise ValueError("ожидается JSON объект")
+            else:
+                update = Update.de_json(data, application.bot)
+        except Exception as e:
+            logger.warning(f"Webhook: не удалось разобрать обновление: {e}")
+            return Response(status_code=400)
+
+        if dispatcher is not None:
+            # Разбирать обновление будет процесс-обработчик
+            await dispatcher.dispatch(data)
+            return Response(status_code=200)
+
+        # Обработка идёт в фоне - Telegram получает ответ сразу
+        await application.update_queue.put(update)
+        return Response(status_code=200)
+
+    async def healthz(request: Request) -> Response:
+        """Проверка здоровья для балансировщика и Render"""
+        if dispatcher is not None:
+            return JSONResponse({"status": "ok" if dispatcher.alive else "degraded", **dispatcher.stats()},
+                                status_code=200 if dispatcher.alive else 503)
+        if not application.running:
+            return JSONResponse({"status": "starting"}, status_code=503)
+        from rate_limiter import PriorityRateLimiter
+        health = {"status": "ok", "pending_updates": application.update_queue.qsize()}
+        if isinstance(application.bot.rate_limiter, PriorityRateLimiter):
+            health["outbound"] = application.bot.rate_limiter.stats()
+        import llm_service
+        if llm_service.llm_service is not None:
+            health["llm"] = {"routes": llm_service.llm_service.routes.stats(),
+                             "breakers": llm_service.llm_service.breakers.stats()}
+        return JSONResponse(health)
+
+    return Starlette(routes=[
+        Route(path, telegram_webhook, methods=["POST"]),
+        Route("/healthz", healthz, methods=["GET"]),
+    ])
+
+
+async def run_webhook(application: Application) -> None:
+    """
+    Запустить бота в режиме webhook: зарегистрировать адрес в Telegram и поднять сервер
+
+    Args:
+        application: Настроенное приложение python-telegram-bot
+    """
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(
+        app=create_webhook_app(application, WEBHOOK_SECRET),
+        host=WEBHOOK_HOST,
+        port=WEBHOOK_PORT,
+        log_level="info",
+    ))
+
+    webhook_url = f"{WEBHOOK_URL.rstrip('/')}{WEBHOOK_PATH}"
+
+    async with application:
+        if application.post_init:
+            await application.post_init(application)
+
+        await application.bot.set_webhook(
+            url=webhook_url,
+            secret_token=WEBHOOK_SECRET,
+            allowed_updates=Update.ALL_TYPES,
+        )
+        logger.info(f"Webhook зарегистрирован: {webhook_url}, слушаем {WEBHOOK_HOST}:{WEBHOOK_PORT}")
+
+        await application.start()
+        try:
+            await server.serve()
+        finally:
+            await application.stop()
+            if application.post_shutdown:
+                await application.post_shutdown(application)
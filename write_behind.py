@@ -0,0 +1,246 @@
+"""Буфер отложенной записи (write-behind) для событий словаря пользователей
+
+Просмотры слов копятся в памяти и записываются в базу одной транзакцией:
+раз в DB_WRITE_FLUSH_INTERVAL_MS миллисекунд или при накоплении
+DB_WRITE_BATCH_SIZE событий - смотря что наступит раньше.
+
+Гарантии сохранности:
+    - каждый сброс выполняется одной транзакцией: либо записаны все события
+      пакета, либо ни одного, база никогда не остаётся в промежуточном состоянии;
+    - при ошибке записи пакет возвращается в буфер и повторяется с нарастающей паузой
+      (до DB_WRITE_MAX_BACKOFF_MS); пока пауза не прошла, add() не запускает сброс,
+      и обработчики пользователей не ждут заведомо неудачную запись;
+    - строки, уже не записавшиеся раз, повторяются по одной: испорченная строка
+      не блокирует остальные и после DB_WRITE_MAX_ATTEMPTS попыток отбрасывается с записью в лог;
+    - буфер не растёт больше DB_WRITE_MAX_PENDING слов: пока база недоступна,
+      просмотры новых слов теряются (с предупреждением в логе);
+    - пакет, который сейчас записывается, виден has_pending и discard_user: читатель
+      через flush() дожидается его записи, а слова очищенного словаря не вернутся в буфер;
+    - при штатной остановке (post_shutdown) буфер сбрасывается полностью;
+    - при аварийном завершении процесса (SIGKILL, OOM, падение машины) теряются
+      события, накопленные с последнего сброса - не больше одного интервала
+      или одного пакета. Для словаря это допустимо: теряется только счётчик
+      просмотров, объяснение можно получить повторно;
+    - в режиме WAL с synchronous=NORMAL последняя зафиксированная транзакция
+      может откатиться при потере питания, но целостность базы сохраняется.
+"""
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from config import (
+    DB_WRITE_FLUSH_INTERVAL_MS, DB_WRITE_BATCH_SIZE, DB_WRITE_MAX_ATTEMPTS, DB_WRITE_MAX_PENDING,
+    DB_WRITE_MAX_BACKOFF_MS
+)
+
+logger = logging.getLogger(__name__)
+
+# (user_id, word, explanation, lookup_count)
+WordEvent = Tuple[int, str, str, int]
+
+
+class WriteBehindBuffer:
+    """Накопитель событий просмотра слов с пакетной записью"""
+
+    def __init__(self, flush_func: Callable[[List[WordEvent]], Awaitable[bool]],
+                 interval_ms: int = DB_WRITE_FLUSH_INTERVAL_MS, batch_size: int = DB_WRITE_BATCH_SIZE,
+                 max_attempts: int = DB_WRITE_MAX_ATTEMPTS, max_pending: int = DB_WRITE_MAX_PENDING,
+                 max_backoff_ms: int = DB_WRITE_MAX_BACKOFF_MS, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            flush_func: Корутина, записывающая пакет событий одной транзакцией
+            interval_ms (int): Максимальная задержка записи, миллисекунд
+            batch_size (int): Сколько событий копить до внеочередного сброса
+            max_attempts (int): Сколько раз пытаться записать строку, прежде чем отбросить её
+            max_pending (int): Больше стольких незаписанных слов не хранить
+            max_backoff_ms (int): Предельная пауза между повторами после ошибки, миллисекунд
+            clock: Источник времени (для тестов)
+        """
+        self.flush_func = flush_func
+        self.interval = interval_ms / 1000
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.max_pending = max_pending
+        self.max_backoff = max_backoff_ms / 1000
+        self.clock = clock
+
+        # (user_id, word) -> [explanation, lookup_count, неудачных попыток]: повторные просмотры схлопываются
+        self._pending: Dict[Tuple[int, str], list] = {}
+        self._pending_events = 0
+        # Пакет, который сейчас записывается: его тоже видят has_pending и discard_user
+        self._inflight: Dict[Tuple[int, str], list] = {}
+        # Сбросы идут по одному: читатель, вызвавший flush, дождётся и пакета в записи
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+
+        # Неудачных сбросов подряд и время, раньше которого сброс не запускается сам
+        self._failures = 0
+        self._retry_at = 0.0
+
+        self.flushes = 0
+        self.flushed_events = 0
+        self.dropped_events = 0
+
+    @property
+    def pending(self) -> int:
+        """Сколько событий ждёт записи"""
+        return self._pending_events
+
+    def has_pending(self, user_id: int) -> bool:
+        """Есть ли незаписанные события пользователя (в том числе в пакете, который сейчас пишется)"""
+        return any(key[0] == user_id for key in self._pending) or any(key[0] == user_id for key in self._inflight)
+
+    async def add(self, user_id: int, word: str, explanation: str) -> None:
+        """
+        Добавить просмотр слова в буфер
+
+        Args:
+            user_id (int): ID пользователя
+            word (str): Слово
+            explanation (str): Объяснение слова
+        """
+        key = (user_id, word.lower())
+        entry = self._pending.get(key)
+        if entry is None:
+            if len(self._pending) >= self.max_pending:
+                if not self.dropped_events:
+                    logger.warning(f"Буфер словаря переполнен ({self.max_pending} слов), новые просмотры не сохраняются")
+                self.dropped_events += 1
+                return
+            self._pending[key] = [explanation, 1, 0]
+        else:
+            entry[1] += 1
+        self._pending_events += 1
+
+        # После ошибки записи ждём паузу: повтор в обработчике пользователя только задержал бы ответ
+        # Пока пишется предыдущий пакет, сброс подхватит таймер - обработчик не ждёт в очереди
+        if (self._pending_events >= self.batch_size and self.clock() >= self._retry_at
+                and not self._lock.locked()):
+            await self.flush()
+
+    def discard_user(self, user_id: int) -> None:
+        """
+        Удалить незаписанные события пользователя (например, при очистке словаря)
+
+        Строки пакета, который сейчас пишется, при неудаче записи не вернутся в буфер.
+        Если запись может завершиться успешно, перед удалением из базы нужно дождаться её: wait_inflight().
+        """
+        for key in [key for key in self._pending if key[0] == user_id]:
+            self._pending_events -= self._pending.pop(key)[1]
+        for key in [key for key in self._inflight if key[0] == user_id]:
+            del self._inflight[key]
+
+    async def wait_inflight(self) -> None:
+        """Дождаться окончания сброса, который сейчас выполняется"""
+        if self._lock.locked():
+            async with self._lock:
+                pass
+
+    async def flush(self) -> bool:
+        """
+        Записать накопленные события: новые - одной транзакцией, ранее не записавшиеся - по одной
+
+        Returns:
+            bool: True если буфер был пуст или запись прошла успешно
+        """
+        async with self._lock:
+            return await self._flush()
+
+    async def _flush(self) -> bool:
+        if not self._pending:
+            return True
+
+        # Забираем пакет целиком: новые события копятся уже в новом буфере
+        batch, self._pending = self._pending, {}
+        self._pending_events = 0
+        self._inflight = batch
+
+        failed: Dict[Tuple[int, str], list] = {}
+        try:
+            fresh = {key: entry for key, entry in batch.items() if not entry[2]}
+            if fresh and not await self._write(fresh):
+                failed.update(fresh)
+            # Одна испорченная строка не должна снова утянуть за собой весь пакет
+            for key, entry in list(batch.items()):
+                if entry[2] and key in batch and not await self._write({key: entry}):
+                    failed[key] = entry
+        finally:
+            self._inflight = {}
+
+        # Строки пользователей, очистивших словарь во время записи, не возвращаем
+        failed = {key: entry for key, entry in failed.items() if key in batch}
+        if failed:
+            self._failures += 1
+            backoff = min(self.max_backoff, self.interval * 2 ** self._failures)
+            self._retry_at = self.clock() + backoff
+            logger.warning(f"Не записано {len(failed)} слов словаря, повтор через {backoff:.1f} с")
+            self._requeue(failed)
+            return False
+
+        self._failures = 0
+        self._retry_at = 0.0
+        return True
+
+    async def _write(self, entries: Dict[Tuple[int, str], list]) -> bool:
+        """Записать события одной транзакцией"""
+        events = [(user_id, word, explanation, count)
+                  for (user_id, word), (explanation, count, _) in entries.items()]
+        try:
+            ok = await self.flush_func(events)
+        except Exception as e:
+            logger.error(f"Ошибка отложенной записи словаря: {e}")
+            ok = False
+
+        if ok:
+            written = sum(count for _, _, _, count in events)
+            self.flushes += 1
+            self.flushed_events += written
+            logger.debug(f"Отложенная запись: {written} событий, {len(events)} строк одной транзакцией")
+        return bool(ok)
+
+    def _requeue(self, failed: Dict[Tuple[int, str], list]) -> None:
+        """Вернуть неудачные строки в буфер, объединив с пришедшими за это время событиями"""
+        for key, (explanation, count, attempts) in failed.items():
+            attempts += 1
+            if attempts >= self.max_attempts:
+                logger.error(f"Слово '{key[1]}' пользователя {key[0]} не записано за {attempts} попыток, отбрасываем")
+                self.dropped_events += count
+                continue
+            entry = self._pending.get(key)
+            if entry is None:
+                if len(self._pending) >= self.max_pending:
+                    self.dropped_events += count
+                    continue
+                self._pending[key] = [explanation, count, attempts]
+            else:
+                entry[1] += count
+                entry[2] = attempts
+            self._pending_events += count
+
+    async def _run(self) -> None:
+        """Фоновый сброс буфера по таймеру"""
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            if self.clock() >= self._retry_at or self._stopping.is_set():
+                await self.flush()
+
+    def start(self) -> None:
+        """Запустить фоновый сброс (нужен работающий event loop)"""
+        if self._task is None or self._task.done():
+            self._stopping = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self) -> None:
+        """Остановить фоновый сброс и записать всё, что осталось в буфере"""
+        if self._task is not None:
+            # Не отменяем задачу: прерванный сброс мог бы уже зафиксировать пакет
+            self._stopping.set()
+            await self._task
+            self._task = None
+
+        if not await self.flush():
+            logger.error(f"При остановке не удалось записать {self._pending_events} событий словаря")